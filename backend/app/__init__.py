@@ -1,13 +1,48 @@
+import importlib
+import threading
+import time
 from flask import Flask
 from flask_cors import CORS
-from pymongo import MongoClient
 from app.config import Config
 
-# MongoDB client - will be initialized when app is created
+# MongoDB client and database of the last create_app; models go through
+# app.models.repository instead, which stays valid after a fork
 mongo_client = None
 db = None
 
+# Route modules, in registration order
+BLUEPRINTS = [
+    'sensor_routes', 'reading_routes', 'recommendation_routes', 'alert_routes', 'weather_routes',
+    'irrigation_routes', 'disease_routes', 'yield_routes', 'notification_routes', 'farm_routes',
+    'auth_routes', 'event_routes'
+]
+
+def ensure_indexes():
+    """Create the collection indexes the models rely on"""
+    from app.models import reading as reading_model
+    from app.models import alert as alert_model
+    from app.models import user as user_model
+    from app.models import recommendation as rec_model
+    
+    try:
+        reading_model.ensure_indexes()
+        alert_model.ensure_indexes()
+        user_model.ensure_indexes()
+        rec_model.ensure_indexes()
+    except Exception as e:
+        print(f"Error creating MongoDB indexes: {e}")
+
+def check_database():
+    """Ping a lazily connected database, then create the indexes if it is up"""
+    from app.models.repository import mongo
+    
+    if mongo.check():
+        ensure_indexes()
+
 def create_app(config_class=Config):
+    started = time.perf_counter()
+    profile = []
+    
     app = Flask(__name__)
     app.config.from_object(config_class)
     
@@ -16,37 +51,38 @@ def create_app(config_class=Config):
     
     # Initialize MongoDB
     global mongo_client, db
-    try:
-        mongo_client = MongoClient(app.config['MONGO_URI'])
-        # Explicitly specify database name instead of using get_default_database()
-        db_name = app.config['MONGO_URI'].split('/')[-1]
-        db = mongo_client[db_name]
-        
-        # Simple test to verify connection
-        mongo_client.admin.command('ping')
-        print(f"MongoDB connected successfully to database: {db_name}")
-    except Exception as e:
-        print(f"MongoDB connection error: {e}")
-        # Allow app to run without MongoDB for development
-        db = None
-    
-    # Register blueprints
-    from app.routes import sensor_routes, reading_routes, recommendation_routes, alert_routes, weather_routes, irrigation_routes, disease_routes, yield_routes, notification_routes, farm_routes, auth_routes
-    
-    app.register_blueprint(sensor_routes.bp)
-    app.register_blueprint(reading_routes.bp)
-    app.register_blueprint(recommendation_routes.bp)
-    app.register_blueprint(alert_routes.bp)
-    app.register_blueprint(weather_routes.bp)
-    app.register_blueprint(irrigation_routes.bp)
-    app.register_blueprint(disease_routes.bp)
-    app.register_blueprint(yield_routes.bp)
-    app.register_blueprint(notification_routes.bp)  
-    app.register_blueprint(farm_routes.bp)
-    app.register_blueprint(auth_routes.bp)
-
+    step = time.perf_counter()
+    from app.models.repository import mongo
+    mongo.connect(app.config)
+    mongo_client, db = mongo.client, mongo.database
+    profile.append(('mongodb', time.perf_counter() - step))
+    
+    # Register blueprints; their services are created on first use, so
+    # importing them is cheap
+    for name in BLUEPRINTS:
+        step = time.perf_counter()
+        module = importlib.import_module(f'app.routes.{name}')
+        app.register_blueprint(module.bp)
+        profile.append((name, time.perf_counter() - step))
+    
+    # Create collection indexes once the models are bound to the database;
+    # with a lazy connection the server is first pinged in the background,
+    # so startup doesn't wait on it and an unreachable one is noticed
+    step = time.perf_counter()
+    if db is not None:
+        if app.config.get('MONGO_LAZY_CONNECT') and not app.config.get('MONGO_MOCK'):
+            threading.Thread(target=check_database, name='check-database', daemon=True).start()
+        else:
+            ensure_indexes()
+    profile.append(('indexes', time.perf_counter() - step))
+    
+    if app.config.get('STARTUP_PROFILE'):
+        print(f"Startup took {(time.perf_counter() - started) * 1000:.0f} ms:")
+        for name, seconds in sorted(profile, key=lambda item: item[1], reverse=True):
+            print(f"  {name:<24}{seconds * 1000:8.1f} ms")
+    
     @app.route('/health')
     def health_check():
-        return {'status': 'healthy'}
+        return {'status': 'healthy', 'database': mongo.available}
     
     return app
\ No newline at end of file
@@ -11,6 +11,21 @@ class Config:
     
     # MongoDB configurations
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/agri_system')
+    # Use an in-memory mongomock client instead of a real server (offline testing)
+    MONGO_MOCK = os.environ.get('MONGO_MOCK', 'False') == 'True'
+    # Connect on first use instead of pinging the server at startup
+    MONGO_LAZY_CONNECT = os.environ.get('MONGO_LAZY_CONNECT', 'False') == 'True'
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '3000'))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '3000'))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', '20000'))
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+    # Default write concern: a number of nodes or 'majority', optionally journaled
+    MONGO_WRITE_CONCERN = os.environ.get('MONGO_WRITE_CONCERN', '1')
+    MONGO_JOURNAL = os.environ.get('MONGO_JOURNAL', 'False') == 'True'
+    
+    # Print how long each startup step took
+    STARTUP_PROFILE = os.environ.get('STARTUP_PROFILE', 'False') == 'True'
     
     # AI model paths
     MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml', 'models')
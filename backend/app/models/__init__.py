@@ -4,6 +4,7 @@ from datetime import datetime
 FARMERS_COLLECTION = 'farmers'
 SENSORS_COLLECTION = 'sensors'
 DATA_READINGS_COLLECTION = 'data_readings'
+READING_ROLLUPS_COLLECTION = 'reading_rollups'
 RECOMMENDATIONS_COLLECTION = 'recommendations'
 ALERTS_COLLECTION = 'alerts'
 
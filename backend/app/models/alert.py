@@ -0,0 +1,90 @@
+import uuid
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.models import ALERTS_COLLECTION, get_timestamp
+from app.models.repository import Repository
+
+alerts = Repository(ALERTS_COLLECTION)
+
+# Alerts are stored as:
+# {
+#     'id', 'farmer_id', 'sensor_id', 'field_id',
+#     'type': 'warning' | 'danger',
+#     'rule': 'low' | 'high', 'measurement', 'value', 'threshold',
+#     'message', 'reading_timestamp', 'dedup_key', 'created_at', 'is_read'
+# }
+
+def ensure_indexes():
+    """Create the indexes used to list a farmer's alerts"""
+    if not alerts.available:
+        return
+    
+    alerts.create_index([('id', ASCENDING)], unique=True, name='alert_id')
+    alerts.create_index(
+        [('farmer_id', ASCENDING), ('created_at', DESCENDING)],
+        name='farmer_created'
+    )
+    alerts.create_index(
+        [('farmer_id', ASCENDING), ('is_read', ASCENDING), ('created_at', DESCENDING)],
+        name='farmer_unread_created'
+    )
+    alerts.create_index(
+        [('dedup_key', ASCENDING)],
+        unique=True,
+        partialFilterExpression={'dedup_key': {'$type': 'string'}},
+        name='alert_dedup'
+    )
+
+def create_alerts(new_alerts):
+    """
+    Store a batch of alerts in one round trip
+    
+    Alerts are upserted on their dedup_key, so when several worker
+    processes raise the same alert only the first write stores it.
+    
+    Args:
+        new_alerts: List of alert dictionaries with a dedup_key, without
+            id/created_at/is_read
+    
+    Returns:
+        The alerts actually stored
+    """
+    now = get_timestamp()
+    documents = [
+        dict(alert, id=str(uuid.uuid4()), created_at=now, is_read=False)
+        for alert in new_alerts
+    ]
+    
+    if not alerts.available or not documents:
+        return documents
+    
+    operations = [
+        UpdateOne(
+            {'dedup_key': document['dedup_key']},
+            {'$setOnInsert': {key: value for key, value in document.items() if key != 'dedup_key'}},
+            upsert=True
+        )
+        for document in documents
+    ]
+    try:
+        upserted = set(alerts.bulk_write(operations).upserted_ids)
+    except BulkWriteError as e:
+        # Two processes upserting the same key at once; the loser's alert is a duplicate
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
+        upserted = {entry['index'] for entry in e.details.get('upserted', [])}
+    
+    return [document for index, document in enumerate(documents) if index in upserted]
+
+def get_alerts(farmer_id, limit=50, unread_only=False):
+    """Get a farmer's most recent alerts, newest first"""
+    query = {'farmer_id': farmer_id}
+    if unread_only:
+        query['is_read'] = False
+    
+    return alerts.find_list(query, {'_id': 0}, sort=[('created_at', DESCENDING)], limit=limit)
+
+def mark_as_read(alert_id):
+    """Mark an alert as read; returns True if it exists"""
+    result = alerts.update_one({'id': alert_id}, {'$set': {'is_read': True}})
+    return result.matched_count > 0
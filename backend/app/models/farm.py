@@ -1,5 +1,4 @@
 from app.models import get_timestamp
-from app import db
 
 def create_farm(farmer_id, name, location, area_hectares, crops=None):
     """Create a new farm record"""
@@ -17,8 +16,7 @@ def create_farm(farmer_id, name, location, area_hectares, crops=None):
     farm['_id'] = str(len(get_farms_by_farmer(farmer_id)) + 1)
     
     # In a real app, this would save to MongoDB
-    # result = db['farms'].insert_one(farm)
-    # farm['_id'] = str(result.inserted_id)
+    # farm['_id'] = Repository('farms').insert_one(farm)
     
     return farm
 
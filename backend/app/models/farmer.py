@@ -1,5 +1,7 @@
 from app.models import FARMERS_COLLECTION, get_timestamp
-from app import db
+from app.models.repository import Repository, stringify_id
+
+farmers = Repository(FARMERS_COLLECTION)
 
 def create_farmer(name, phone, location):
     """Create a new farmer record"""
@@ -15,19 +17,18 @@ def create_farmer(name, phone, location):
     }
     
     # Handle case when MongoDB isn't connected
-    if db is None:
+    if not farmers.available:
         import uuid
         farmer['_id'] = str(uuid.uuid4())
         return farmer
     
-    result = db[FARMERS_COLLECTION].insert_one(farmer)
-    farmer['_id'] = str(result.inserted_id)
+    farmer['_id'] = farmers.insert_one(farmer)
     return farmer
 
 def get_farmer(farmer_id):
     """Get a farmer by ID"""
     # Handle case when MongoDB isn't connected
-    if db is None:
+    if not farmers.available:
         return {
             '_id': farmer_id,
             'name': 'Simulated Farmer',
@@ -36,15 +37,12 @@ def get_farmer(farmer_id):
         }
     
     from bson.objectid import ObjectId
-    farmer = db[FARMERS_COLLECTION].find_one({'_id': ObjectId(farmer_id)})
-    if farmer:
-        farmer['_id'] = str(farmer['_id'])
-    return farmer
+    return stringify_id(farmers.find_one({'_id': ObjectId(farmer_id)}))
 
 def get_all_farmers():
     """Get all farmers"""
     # Handle case when MongoDB isn't connected
-    if db is None:
+    if not farmers.available:
         return [{
             '_id': 'farmer-001',
             'name': 'Simulated Farmer',
@@ -52,7 +50,14 @@ def get_all_farmers():
             'farmLocation': {'latitude': 0, 'longitude': 0}
         }]
     
-    farmers = list(db[FARMERS_COLLECTION].find())
-    for farmer in farmers:
-        farmer['_id'] = str(farmer['_id'])
-    return farmers
\ No newline at end of file
+    return farmers.find_list()
+
+def iter_farmers(projection=None):
+    """Iterate over all farmers without loading them into memory at once"""
+    # Handle case when MongoDB isn't connected
+    if not farmers.available:
+        yield from get_all_farmers()
+        return
+    
+    for farmer in farmers.find({}, projection):
+        yield stringify_id(farmer)
\ No newline at end of file
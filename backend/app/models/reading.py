@@ -0,0 +1,352 @@
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, UpdateOne
+from app.models import DATA_READINGS_COLLECTION, READING_ROLLUPS_COLLECTION, get_timestamp
+from app.models.repository import Repository
+from app.utils.window_stats import live_windows
+from app.services.alert_engine import alert_engine
+from app.services.event_hub import event_hub
+
+# Readings are stored in one document per sensor per hour:
+# {
+#     'sensor_id': 'sensor-001',
+#     'bucket_start': datetime(2025, 4, 2, 14),
+#     'type': 'soil_moisture',
+#     'unit': '%',
+#     'n_samples': 2,
+#     'samples': [{'t': datetime(...), 'v': 41.2}, {'t': datetime(...), 'v': 40.8}]
+# }
+BUCKET_SIZE = timedelta(hours=1)
+
+# Named *_store since 'readings' is used for lists of readings throughout
+readings_store = Repository(DATA_READINGS_COLLECTION)
+
+# Aggregates kept up to date as readings arrive, one document per sensor per
+# period: {'sensor_id', 'resolution', 'bucket_start', 'type', 'unit',
+#          'count', 'sum', 'min', 'max', 'last', 'last_t'}
+ROLLUP_RESOLUTIONS = {
+    'hour': lambda timestamp: timestamp.replace(minute=0, second=0, microsecond=0),
+    'day': lambda timestamp: timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+
+rollups_store = Repository(READING_ROLLUPS_COLLECTION)
+
+def ensure_indexes():
+    """Create the indexes used by the ingest and range queries"""
+    if not readings_store.available:
+        return
+    
+    readings_store.create_index(
+        [('sensor_id', ASCENDING), ('bucket_start', ASCENDING)],
+        unique=True,
+        name='sensor_bucket'
+    )
+    rollups_store.create_index(
+        [('sensor_id', ASCENDING), ('resolution', ASCENDING), ('bucket_start', ASCENDING)],
+        unique=True,
+        name='sensor_resolution_bucket'
+    )
+
+def get_bucket_start(timestamp):
+    """Truncate a timestamp to the start of its storage bucket"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def parse_timestamp(value):
+    """Parse an ISO timestamp into a naive UTC datetime"""
+    if value is None:
+        return datetime.utcnow()
+    
+    if isinstance(value, datetime):
+        timestamp = value
+    else:
+        timestamp = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def normalize_reading(reading):
+    """
+    Validate an incoming reading and split it into its stored parts
+    
+    Args:
+        reading: Dictionary in the API format
+            {'sensor_id', 'timestamp', 'data': {<type>: value, 'unit': unit}}
+    
+    Returns:
+        Tuple of (sensor_id, timestamp, type, value, unit)
+    
+    Raises:
+        ValueError: If the reading is missing fields or has a bad value
+    """
+    if not isinstance(reading, dict):
+        raise ValueError('Each reading must be an object')
+    
+    sensor_id = reading.get('sensor_id')
+    if not sensor_id:
+        raise ValueError('Missing required field: sensor_id')
+    
+    data = reading.get('data')
+    if not isinstance(data, dict):
+        raise ValueError('Missing required field: data')
+    
+    measurements = [key for key in data.keys() if key != 'unit']
+    if len(measurements) != 1:
+        raise ValueError('Reading data must contain exactly one measurement')
+    type_name = measurements[0]
+    
+    try:
+        value = float(data[type_name])
+        timestamp = parse_timestamp(reading.get('timestamp'))
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid value or timestamp for sensor {sensor_id}')
+    # NaN and infinity parse as floats but would poison the rollups and window stats
+    if not math.isfinite(value):
+        raise ValueError(f'Invalid value or timestamp for sensor {sensor_id}')
+    
+    return str(sensor_id), timestamp, type_name, value, data.get('unit')
+
+def ingest_readings(readings):
+    """
+    Store a batch of readings in hourly bucket documents
+    
+    Args:
+        readings: List of readings in the API format
+    
+    Returns:
+        Dictionary with the number of stored readings and touched buckets
+    
+    Raises:
+        ValueError: If any reading is invalid; nothing is stored in that case
+    """
+    # Group samples by bucket so each bucket gets a single update
+    buckets = OrderedDict()
+    for reading in readings:
+        sensor_id, timestamp, type_name, value, unit = normalize_reading(reading)
+        key = (sensor_id, get_bucket_start(timestamp))
+        bucket = buckets.setdefault(key, {'type': type_name, 'unit': unit, 'samples': []})
+        bucket['samples'].append({'t': timestamp, 'v': value})
+    
+    if not buckets:
+        return {'inserted': 0, 'buckets': 0}
+    
+    now = get_timestamp()
+    operations = [
+        UpdateOne(
+            {'sensor_id': sensor_id, 'bucket_start': bucket_start},
+            {
+                '$push': {'samples': {'$each': bucket['samples']}},
+                '$inc': {'n_samples': len(bucket['samples'])},
+                '$set': {'type': bucket['type'], 'unit': bucket['unit'], 'updated_at': now},
+                '$setOnInsert': {'created_at': now}
+            },
+            upsert=True
+        )
+        for (sensor_id, bucket_start), bucket in buckets.items()
+    ]
+    readings_store.bulk_write(operations, ordered=False)
+    
+    update_rollups(buckets)
+    
+    samples = [
+        (sensor_id, sample['t'], bucket['type'], sample['v'])
+        for (sensor_id, _), bucket in buckets.items()
+        for sample in bucket['samples']
+    ]
+    
+    # Keep the in-process analysis windows current
+    live_windows.update_many(samples)
+    
+    # Check the batch against the sensors' alert thresholds
+    alerts = alert_engine.process(samples)
+    
+    if event_hub.has_watchers():
+        publish_events(buckets, alerts)
+    
+    return {
+        'inserted': len(samples),
+        'buckets': len(buckets),
+        'alerts': len(alerts)
+    }
+
+def publish_events(buckets, alerts):
+    """Push newly stored readings and alerts to the clients streaming their farmer's events"""
+    from app.models import sensor as sensor_model
+    
+    registry = sensor_model.get_registry()
+    farmers = {}
+    readings_by_farmer = {}
+    for (sensor_id, _), bucket in buckets.items():
+        if sensor_id not in farmers:
+            sensor = registry.get(sensor_id)
+            farmers[sensor_id] = sensor.get('farmer_id') if sensor else None
+        if farmers[sensor_id] is None:
+            continue
+        
+        readings_by_farmer.setdefault(farmers[sensor_id], []).extend(
+            {
+                'sensor_id': sensor_id,
+                'timestamp': sample['t'].isoformat(),
+                'data': {bucket['type']: sample['v'], 'unit': bucket['unit']}
+            }
+            for sample in bucket['samples']
+        )
+    
+    for farmer_id, readings in readings_by_farmer.items():
+        event_hub.publish(farmer_id, 'readings', readings)
+    for alert in alerts:
+        event_hub.publish(alert['farmer_id'], 'alert', alert)
+
+def get_readings(sensor_id, hours=24, end=None):
+    """
+    Get a sensor's readings for a time window, oldest first
+    
+    Only the buckets overlapping the window are read, so the cost depends on
+    the window length rather than on the size of the collection.
+    
+    Args:
+        sensor_id: ID of the sensor
+        hours: Length of the window in hours
+        end: End of the window (defaults to now, UTC)
+    
+    Returns:
+        List of readings in the API format
+    """
+    end = parse_timestamp(end)
+    start = end - timedelta(hours=hours)
+    
+    cursor = readings_store.find(
+        {
+            'sensor_id': sensor_id,
+            'bucket_start': {'$gte': get_bucket_start(start), '$lte': end}
+        },
+        {'_id': 0, 'type': 1, 'unit': 1, 'samples': 1}
+    ).sort('bucket_start', ASCENDING)
+    
+    readings = []
+    for bucket in cursor:
+        # Samples can arrive out of order within a bucket
+        for sample in sorted(bucket.get('samples', []), key=lambda s: s['t']):
+            if start <= sample['t'] <= end:
+                readings.append({
+                    'sensor_id': sensor_id,
+                    'timestamp': sample['t'].isoformat(),
+                    'data': {
+                        bucket['type']: sample['v'],
+                        'unit': bucket.get('unit')
+                    }
+                })
+    
+    return readings
+
+def update_rollups(buckets):
+    """
+    Fold newly ingested samples into the hourly and daily aggregates
+    
+    Args:
+        buckets: Mapping of (sensor_id, bucket_start) to the bucket's
+            type, unit and new samples, as built by ingest_readings
+    """
+    # Combine the batch per rollup period first so each period gets one upsert
+    periods = OrderedDict()
+    for (sensor_id, _), bucket in buckets.items():
+        for resolution, truncate in ROLLUP_RESOLUTIONS.items():
+            for sample in bucket['samples']:
+                key = (sensor_id, resolution, truncate(sample['t']))
+                period = periods.get(key)
+                if period is None:
+                    periods[key] = {
+                        'type': bucket['type'],
+                        'unit': bucket['unit'],
+                        'count': 1,
+                        'sum': sample['v'],
+                        'min': sample['v'],
+                        'max': sample['v'],
+                        'last': sample['v'],
+                        'last_t': sample['t']
+                    }
+                    continue
+                
+                period['count'] += 1
+                period['sum'] += sample['v']
+                period['min'] = min(period['min'], sample['v'])
+                period['max'] = max(period['max'], sample['v'])
+                if sample['t'] >= period['last_t']:
+                    period['last'] = sample['v']
+                    period['last_t'] = sample['t']
+    
+    operations = []
+    for (sensor_id, resolution, bucket_start), period in periods.items():
+        key = {'sensor_id': sensor_id, 'resolution': resolution, 'bucket_start': bucket_start}
+        operations.append(UpdateOne(
+            key,
+            {
+                '$inc': {'count': period['count'], 'sum': period['sum']},
+                '$min': {'min': period['min']},
+                '$max': {'max': period['max']},
+                '$set': {'type': period['type'], 'unit': period['unit']},
+                '$setOnInsert': {'last': period['last'], 'last_t': period['last_t']}
+            },
+            upsert=True
+        ))
+        # Only move 'last' forward if this batch holds a newer sample
+        operations.append(UpdateOne(
+            {**key, 'last_t': {'$lt': period['last_t']}},
+            {'$set': {'last': period['last'], 'last_t': period['last_t']}}
+        ))
+    
+    rollups_store.bulk_write(operations, ordered=True)
+
+def get_rollups(sensor_id, resolution='hour', hours=24, end=None):
+    """
+    Get a sensor's aggregated readings for a time window, oldest first
+    
+    Args:
+        sensor_id: ID of the sensor
+        resolution: 'hour' or 'day'
+        hours: Length of the window in hours
+        end: End of the window (defaults to now, UTC)
+    
+    Returns:
+        List of readings in the API format, with the period mean as the
+        value and the raw aggregates under 'stats'
+    
+    Raises:
+        ValueError: If the resolution is not supported
+    """
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise ValueError(f"Unsupported resolution: {resolution}")
+    
+    end = parse_timestamp(end)
+    start = ROLLUP_RESOLUTIONS[resolution](end - timedelta(hours=hours))
+    
+    cursor = rollups_store.find(
+        {
+            'sensor_id': sensor_id,
+            'resolution': resolution,
+            'bucket_start': {'$gte': start, '$lte': end}
+        },
+        {'_id': 0}
+    ).sort('bucket_start', ASCENDING)
+    
+    rollups = []
+    for period in cursor:
+        rollups.append({
+            'sensor_id': sensor_id,
+            'timestamp': period['bucket_start'].isoformat(),
+            'resolution': resolution,
+            'data': {
+                period['type']: round(period['sum'] / period['count'], 2),
+                'unit': period.get('unit')
+            },
+            'stats': {
+                'count': period['count'],
+                'sum': period['sum'],
+                'min': period['min'],
+                'max': period['max'],
+                'last': period['last']
+            }
+        })
+    
+    return rollups
@@ -0,0 +1,150 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
+from app.models import RECOMMENDATIONS_COLLECTION, get_timestamp
+from app.models.repository import Repository
+
+recommendations = Repository(RECOMMENDATIONS_COLLECTION)
+
+# An open recommendation of the same type and severity suppresses new ones this long
+DEDUP_WINDOW = timedelta(hours=24)
+
+# Recommendations are stored as:
+# {
+#     'id', 'farmer_id', 'type',
+#     'details': {'message', 'severity', 'data'},
+#     'created_at', 'is_read'
+# }
+
+def ensure_indexes():
+    """Create the indexes used to list and deduplicate a farmer's recommendations"""
+    if not recommendations.available:
+        return
+    
+    recommendations.create_index([('id', ASCENDING)], unique=True, name='recommendation_id')
+    # id breaks ties between recommendations of one batch, which share created_at,
+    # so the pagination sort is served by the index alone
+    recommendations.create_index(
+        [('farmer_id', ASCENDING), ('created_at', DESCENDING), ('id', DESCENDING)],
+        name='farmer_created'
+    )
+
+def encode_cursor(recommendation):
+    """Opaque pagination cursor pointing just past a recommendation"""
+    position = json.dumps([recommendation['created_at'], recommendation['id']])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, recommendation_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(created_at, str) or not isinstance(recommendation_id, str):
+        raise ValueError('Invalid cursor')
+    return created_at, recommendation_id
+
+def create_recommendations(farmer_id, items):
+    """
+    Store a batch of recommendations for a farmer in one ordered insert
+    
+    Items matching an open (unread) recommendation of the same type and
+    severity created within DEDUP_WINDOW, or an earlier item of the batch,
+    are skipped.
+    
+    Args:
+        farmer_id: ID of the farmer
+        items: List of {'type', 'details': {'message', 'severity', 'data'}}
+    
+    Returns:
+        The newly stored recommendations, in the order given
+    """
+    now = get_timestamp()
+    seen = set()
+    if recommendations.available and items:
+        since = (datetime.fromisoformat(now) - DEDUP_WINDOW).isoformat()
+        for existing in recommendations.find(
+            {
+                'farmer_id': farmer_id,
+                'is_read': False,
+                'created_at': {'$gte': since},
+                'type': {'$in': sorted({item['type'] for item in items})}
+            },
+            {'_id': 0, 'type': 1, 'details.severity': 1}
+        ):
+            seen.add((existing['type'], existing.get('details', {}).get('severity')))
+    
+    documents = []
+    for item in items:
+        key = (item['type'], item['details'].get('severity'))
+        if key in seen:
+            continue
+        seen.add(key)
+        documents.append({
+            'id': str(uuid.uuid4()),
+            'farmer_id': farmer_id,
+            'type': item['type'],
+            'details': item['details'],
+            'created_at': now,
+            'is_read': False
+        })
+    
+    if recommendations.available:
+        recommendations.insert_many(documents, ordered=True)
+    
+    return documents
+
+def create_recommendation(farmer_id, type, details):
+    """Store a single recommendation; returns None if it duplicates an open one"""
+    stored = create_recommendations(farmer_id, [{'type': type, 'details': details}])
+    return stored[0] if stored else None
+
+def get_recommendations(farmer_id, limit=20, cursor=None, unread_only=False):
+    """
+    Get a page of a farmer's recommendations, newest first
+    
+    Args:
+        farmer_id: ID of the farmer
+        limit: Page size
+        cursor: next_cursor of the previous page, or None for the first page
+        unread_only: Only return recommendations not marked as read
+    
+    Returns:
+        Tuple of (recommendations, next_cursor); next_cursor is None on the
+        last page
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    query = {'farmer_id': farmer_id}
+    if unread_only:
+        query['is_read'] = False
+    if cursor:
+        created_at, recommendation_id = decode_cursor(cursor)
+        query['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, 'id': {'$lt': recommendation_id}}
+        ]
+    
+    # One extra document tells whether there is a next page
+    page = recommendations.find_list(
+        query,
+        {'_id': 0},
+        sort=[('created_at', DESCENDING), ('id', DESCENDING)],
+        limit=limit + 1
+    )
+    if len(page) > limit:
+        return page[:limit], encode_cursor(page[limit - 1])
+    return page, None
+
+def mark_as_read(recommendation_id):
+    """Mark a recommendation as read; returns True if it exists"""
+    result = recommendations.update_one({'id': recommendation_id}, {'$set': {'is_read': True}})
+    return result.matched_count > 0
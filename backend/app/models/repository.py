@@ -0,0 +1,215 @@
+import os
+import threading
+from pymongo import MongoClient, WriteConcern
+
+class MongoConnection:
+    """
+    The process-wide pooled MongoClient
+    
+    MongoClient is thread-safe and pools connections, so one per process is
+    shared by every repository. It is not fork-safe, though: a process
+    forked after the client was created (e.g. gunicorn --preload workers)
+    gets a fresh client on first use instead of the parent's sockets.
+    """
+    
+    def __init__(self):
+        self.config = None
+        self.available = False
+        self.db_name = None
+        
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def _create_client(self):
+        config = self.config
+        if config.get('MONGO_MOCK'):
+            import mongomock
+            return mongomock.MongoClient()
+        
+        options = {}
+        write_concern = config.get('MONGO_WRITE_CONCERN', '1')
+        options['w'] = int(write_concern) if write_concern.isdigit() else write_concern
+        if config.get('MONGO_JOURNAL'):
+            options['journal'] = True
+        
+        return MongoClient(
+            config['MONGO_URI'],
+            connect=not config.get('MONGO_LAZY_CONNECT'),
+            serverSelectionTimeoutMS=config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+            connectTimeoutMS=config['MONGO_CONNECT_TIMEOUT_MS'],
+            socketTimeoutMS=config['MONGO_SOCKET_TIMEOUT_MS'],
+            maxPoolSize=config['MONGO_MAX_POOL_SIZE'],
+            minPoolSize=config['MONGO_MIN_POOL_SIZE'],
+            **options
+        )
+    
+    def connect(self, config):
+        """
+        Create the client from the app config and check the server
+        
+        With MONGO_LAZY_CONNECT the server isn't contacted here at all; the
+        database is assumed to be available until check() says otherwise.
+        
+        Returns:
+            True if the database can be used
+        """
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self.config = config
+            # Explicitly specify database name instead of using get_default_database()
+            self.db_name = config['MONGO_URI'].split('/')[-1].split('?')[0]
+            self._client = self._create_client()
+            self._pid = os.getpid()
+        
+        if config.get('MONGO_LAZY_CONNECT') and not config.get('MONGO_MOCK'):
+            print(f"MongoDB will connect on first use to database: {self.db_name}")
+            self.available = True
+            return True
+        
+        return self.check()
+    
+    def check(self):
+        """
+        Ping the server and record whether the database can be used
+        
+        Blocks for up to the server selection timeout. When the ping fails
+        `available` is dropped, so models fall back to their no-database
+        behavior instead of failing every request.
+        
+        Returns:
+            True if the database can be used
+        """
+        try:
+            # Simple test to verify connection (bounded by the server selection timeout)
+            self._process_client().admin.command('ping')
+            print(f"MongoDB connected successfully to database: {self.db_name}")
+            self.available = True
+        except Exception as e:
+            print(f"MongoDB connection error: {e}")
+            # Allow app to run without MongoDB for development
+            self.available = False
+        return self.available
+    
+    def _process_client(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # The parent's client must not be used (or closed) here
+                    self._client = self._create_client()
+                    self._pid = os.getpid()
+        return self._client
+    
+    @property
+    def client(self):
+        """The client for this process, or None if the database is unavailable"""
+        if not self.available:
+            return None
+        return self._process_client()
+    
+    @property
+    def database(self):
+        client = self.client
+        return client[self.db_name] if client is not None else None
+
+# Shared by all repositories in the process
+mongo = MongoConnection()
+
+def stringify_id(document):
+    """Convert a document's ObjectId to a string in place; passes None through"""
+    if document is not None and '_id' in document:
+        document['_id'] = str(document['_id'])
+    return document
+
+class Repository:
+    """
+    Access to one collection through the shared client
+    
+    The collection is looked up on every call, so a repository can be
+    created at import time, before the app connects, and keeps working
+    after a fork. Methods mirror pymongo's Collection, plus find_list for
+    the common "query, project, sort, limit, stringify ids" read.
+    """
+    
+    def __init__(self, name, write_concern=None):
+        self.name = name
+        self.write_concern = write_concern
+    
+    @property
+    def available(self):
+        return mongo.available
+    
+    @property
+    def collection(self):
+        database = mongo.database
+        if database is None:
+            raise RuntimeError('MongoDB is not available')
+        collection = database[self.name]
+        if self.write_concern is not None:
+            collection = collection.with_options(write_concern=self.write_concern)
+        return collection
+    
+    def with_write_concern(self, **options):
+        """Repository for the same collection with another write concern, e.g. w=0"""
+        return Repository(self.name, WriteConcern(**options))
+    
+    def create_index(self, keys, **kwargs):
+        return self.collection.create_index(keys, **kwargs)
+    
+    def find(self, filter=None, projection=None, **kwargs):
+        return self.collection.find(filter or {}, projection, **kwargs)
+    
+    def find_one(self, filter=None, projection=None, **kwargs):
+        return self.collection.find_one(filter or {}, projection, **kwargs)
+    
+    def find_list(self, filter=None, projection=None, sort=None, limit=0):
+        """
+        Run a query and return the documents as a list
+        
+        Args:
+            filter: Query document
+            projection: Fields to return; only fetch what the caller needs
+            sort: List of (field, direction) pairs
+            limit: Maximum number of documents (0 for no limit)
+        """
+        cursor = self.collection.find(filter or {}, projection, sort=sort, limit=limit)
+        return [stringify_id(document) for document in cursor]
+    
+    def insert_one(self, document):
+        """Insert a document; returns its id as a string and leaves `document` unchanged"""
+        return str(self.collection.insert_one(dict(document)).inserted_id)
+    
+    def insert_many(self, documents, ordered=False):
+        """
+        Insert documents in one round trip
+        
+        Returns:
+            List of the inserted ids as strings; `documents` are left unchanged
+        """
+        documents = [dict(document) for document in documents]
+        if not documents:
+            return []
+        result = self.collection.insert_many(documents, ordered=ordered)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    
+    def update_one(self, filter, update, **kwargs):
+        return self.collection.update_one(filter, update, **kwargs)
+    
+    def update_many(self, filter, update, **kwargs):
+        return self.collection.update_many(filter, update, **kwargs)
+    
+    def replace_one(self, filter, replacement, **kwargs):
+        return self.collection.replace_one(filter, replacement, **kwargs)
+    
+    def find_one_and_update(self, filter, update, **kwargs):
+        return self.collection.find_one_and_update(filter, update, **kwargs)
+    
+    def delete_one(self, filter):
+        return self.collection.delete_one(filter)
+    
+    def bulk_write(self, operations, ordered=False):
+        """Send a list of write operations in one round trip; no-op when empty"""
+        if not operations:
+            return None
+        return self.collection.bulk_write(operations, ordered=ordered)
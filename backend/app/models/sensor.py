@@ -1,9 +1,242 @@
+import threading
+import uuid
+from pymongo import ASCENDING, ReturnDocument
 from app.models import SENSORS_COLLECTION, get_timestamp
-from app import db
+from app.models.repository import Repository
+
+# Fields that cannot be changed through update_sensor
+PROTECTED_FIELDS = ['id', 'farmer_id', 'created_at']
+
+# Fields with a secondary index in the registry (and in MongoDB)
+INDEXED_FIELDS = ['farmer_id', 'field_id', 'type']
+
+# Simulated sensors used when MongoDB isn't connected
+DEFAULT_SENSORS = [
+    {
+        'id': 'sensor-001',
+        'farmer_id': 'farmer-001',
+        'name': 'Main Field Soil Sensor',
+        'type': 'soil_moisture',
+        'location': 'Field 1 - North Corner',
+        'field_id': '1',
+        'status': 'active',
+        'configuration': {
+            'reading_interval': 30,  # minutes
+            'alert_threshold': 25,   # minimum moisture percentage
+            'calibration_factor': 1.0
+        },
+        'created_at': '2023-01-15T08:30:00.000Z',
+        'updated_at': '2023-06-20T14:15:00.000Z'
+    },
+    {
+        'id': 'sensor-002',
+        'farmer_id': 'farmer-001',
+        'name': 'Weather Station',
+        'type': 'temperature',
+        'location': 'Field 1 - Center',
+        'field_id': '1',
+        'status': 'active',
+        'configuration': {
+            'reading_interval': 15,  # minutes
+            'alert_threshold_high': 35,  # maximum temperature (°C)
+            'alert_threshold_low': 5,    # minimum temperature (°C)
+            'calibration_factor': 1.0
+        },
+        'created_at': '2023-01-15T09:45:00.000Z',
+        'updated_at': '2023-06-20T14:15:00.000Z'
+    },
+    {
+        'id': 'sensor-003',
+        'farmer_id': 'farmer-001',
+        'name': 'Humidity Monitor',
+        'type': 'humidity',
+        'location': 'Field 1 - East Side',
+        'field_id': '1',
+        'status': 'active',
+        'configuration': {
+            'reading_interval': 30,  # minutes
+            'alert_threshold_high': 90,  # maximum humidity (%)
+            'alert_threshold_low': 30,   # minimum humidity (%)
+            'calibration_factor': 1.0
+        },
+        'created_at': '2023-01-15T10:15:00.000Z',
+        'updated_at': '2023-06-20T14:15:00.000Z'
+    }
+]
+
+class SensorRegistry:
+    """
+    Sensor store with O(1) lookups by id, farmer_id, field_id and type
+    
+    Without a collection the sensors live in memory, indexed by hash maps
+    that are kept consistent on every write. With a MongoDB collection the
+    same lookups are served by matching indexes in the database so every
+    worker process sees the same sensors.
+    """
+    
+    def __init__(self, sensors=None, collection=None):
+        self._lock = threading.RLock()
+        self._collection = collection
+        self._by_id = {}
+        # field name -> field value -> {sensor id: sensor}; inner dicts keep
+        # insertion order and allow O(1) removal
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        # Bumped on every write made through this registry, so derived data
+        # (like compiled alert rules) knows when to rebuild
+        self.generation = 0
+        
+        if collection is not None:
+            self._ensure_indexes()
+        
+        for sensor in sensors or []:
+            self.add(sensor)
+    
+    def _ensure_indexes(self):
+        """Create the MongoDB indexes matching the in-memory ones"""
+        self._collection.create_index([('id', ASCENDING)], unique=True)
+        for field in INDEXED_FIELDS:
+            self._collection.create_index([(field, ASCENDING)])
+    
+    def _index(self, sensor):
+        for field in INDEXED_FIELDS:
+            bucket = self._indexes[field].setdefault(sensor.get(field), {})
+            bucket[sensor['id']] = sensor
+    
+    def _unindex(self, sensor):
+        for field in INDEXED_FIELDS:
+            bucket = self._indexes[field].get(sensor.get(field))
+            if bucket is not None:
+                bucket.pop(sensor['id'], None)
+                if not bucket:
+                    del self._indexes[field][sensor.get(field)]
+    
+    def _find_by(self, field, value):
+        if self._collection is not None:
+            return list(self._collection.find({field: value}, {'_id': 0}))
+        
+        with self._lock:
+            return list(self._indexes[field].get(value, {}).values())
+    
+    def _changed(self):
+        """Bump the generation after a write; under the lock so no bump is lost"""
+        with self._lock:
+            self.generation += 1
+    
+    def add(self, sensor):
+        """Add a sensor, replacing any existing sensor with the same id"""
+        if self._collection is not None:
+            self._collection.replace_one({'id': sensor['id']}, dict(sensor), upsert=True)
+            self._changed()
+            return sensor
+        
+        with self._lock:
+            self.generation += 1
+            existing = self._by_id.get(sensor['id'])
+            if existing is not None:
+                self._unindex(existing)
+            self._by_id[sensor['id']] = sensor
+            self._index(sensor)
+        return sensor
+    
+    def get(self, sensor_id):
+        """Get a sensor by ID, or None"""
+        if self._collection is not None:
+            return self._collection.find_one({'id': sensor_id}, {'_id': 0})
+        
+        return self._by_id.get(sensor_id)
+    
+    def by_farmer(self, farmer_id):
+        """Get all sensors for a farmer"""
+        return self._find_by('farmer_id', farmer_id)
+    
+    def by_field(self, field_id):
+        """Get all sensors for a field"""
+        return self._find_by('field_id', field_id)
+    
+    def by_type(self, type):
+        """Get all sensors of a type"""
+        return self._find_by('type', type)
+    
+    def all(self):
+        """Get all sensors"""
+        if self._collection is not None:
+            return list(self._collection.find({}, {'_id': 0}))
+        
+        with self._lock:
+            return list(self._by_id.values())
+    
+    def update(self, sensor_id, updates):
+        """Apply updates to a sensor and re-index it; returns None if missing"""
+        changes = {key: value for key, value in updates.items() if key not in PROTECTED_FIELDS}
+        changes['updated_at'] = get_timestamp()
+        
+        if self._collection is not None:
+            sensor = self._collection.find_one_and_update(
+                {'id': sensor_id},
+                {'$set': changes},
+                projection={'_id': 0},
+                return_document=ReturnDocument.AFTER
+            )
+            self._changed()
+            return sensor
+        
+        with self._lock:
+            self.generation += 1
+            sensor = self._by_id.get(sensor_id)
+            if sensor is None:
+                return None
+            
+            self._unindex(sensor)
+            sensor.update(changes)
+            self._index(sensor)
+            return sensor
+    
+    def delete(self, sensor_id):
+        """Delete a sensor; returns True if it existed"""
+        if self._collection is not None:
+            deleted = self._collection.delete_one({'id': sensor_id}).deleted_count > 0
+            self._changed()
+            return deleted
+        
+        with self._lock:
+            self.generation += 1
+            sensor = self._by_id.pop(sensor_id, None)
+            if sensor is None:
+                return False
+            
+            self._unindex(sensor)
+            return True
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """Get the process-wide sensor registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                if not Repository(SENSORS_COLLECTION).available:
+                    # Copy the defaults so updates don't leak into the constant
+                    _registry = SensorRegistry(
+                        sensors=[dict(sensor, configuration=dict(sensor['configuration'])) for sensor in DEFAULT_SENSORS]
+                    )
+                else:
+                    # The repository mirrors the Collection methods the registry uses
+                    collection = Repository(SENSORS_COLLECTION)
+                    _registry = SensorRegistry(collection=collection)
+                    if collection.find_one({}, {'_id': 1}) is None:
+                        # Start an empty database with the default sensors, so
+                        # ingested readings have sensors (and thresholds) to match;
+                        # add() upserts by id, so racing workers don't duplicate them
+                        for sensor in DEFAULT_SENSORS:
+                            _registry.add(dict(sensor, configuration=dict(sensor['configuration'])))
+    return _registry
 
 def create_sensor(farmer_id, name, type, location, field_id, configuration=None):
     """Create a new sensor record"""
     sensor = {
+        'id': str(uuid.uuid4()),
         'farmer_id': farmer_id,
         'name': name,
         'type': type,
@@ -14,126 +247,40 @@ def create_sensor(farmer_id, name, type, location, field_id, configuration=None)
         'created_at': get_timestamp(),
         'updated_at': get_timestamp()
     }
-
-    # For simulation, generate a unique ID
-    import uuid
-    sensor['id'] = str(uuid.uuid4())
     
-    # Store in simulated database
-    get_all_sensors().append(sensor)
-    
-    return sensor
+    return get_registry().add(sensor)
 
 def get_sensor(sensor_id):
     """Get a sensor by ID"""
-    sensors = get_all_sensors()
-    for sensor in sensors:
-        if sensor.get('id') == sensor_id:
-            return sensor
-    return None
+    return get_registry().get(sensor_id)
 
 def get_sensors_by_farmer(farmer_id):
     """Get all sensors for a specific farmer"""
-    sensors = get_all_sensors()
-    return [sensor for sensor in sensors if sensor.get('farmer_id') == farmer_id]
+    return get_registry().by_farmer(farmer_id)
 
 def get_sensors_by_field(field_id):
     """Get all sensors for a specific field"""
-    sensors = get_all_sensors()
-    return [sensor for sensor in sensors if sensor.get('field_id') == field_id]
+    return get_registry().by_field(field_id)
+
+def get_sensors_by_type(type):
+    """Get all sensors of a specific type"""
+    return get_registry().by_type(type)
 
 def update_sensor(sensor_id, updates):
     """Update a sensor's information"""
-    sensor = get_sensor(sensor_id)
-    if not sensor:
-        return None
-    
-    # Update fields
-    for key, value in updates.items():
-        if key not in ['id', 'farmer_id', 'created_at']:
-            sensor[key] = value
-    
-    sensor['updated_at'] = get_timestamp()
-    return sensor
+    return get_registry().update(sensor_id, updates)
 
 def delete_sensor(sensor_id):
     """Delete a sensor"""
-    sensors = get_all_sensors()
-    for i, sensor in enumerate(sensors):
-        if sensor.get('id') == sensor_id:
-            sensors.pop(i)
-            return True
-    return False
+    return get_registry().delete(sensor_id)
 
 def update_sensor_status(sensor_id, status):
     """Update a sensor's status"""
-    sensor = get_sensor(sensor_id)
-    if not sensor:
-        return None
-    
-    sensor['status'] = status
-    sensor['updated_at'] = get_timestamp()
-    return sensor
+    return get_registry().update(sensor_id, {'status': status})
 
 def get_all_sensors():
-    """Get all sensors (simulated)"""
-    # This would typically be stored in a database
-    # We'll use a global variable to simulate persistence
-    global ALL_SENSORS
-    if not hasattr(get_all_sensors, 'ALL_SENSORS'):
-        get_all_sensors.ALL_SENSORS = [
-            {
-                'id': 'sensor-001',
-                'farmer_id': 'farmer-001',
-                'name': 'Main Field Soil Sensor',
-                'type': 'soil_moisture',
-                'location': 'Field 1 - North Corner',
-                'field_id': '1',
-                'status': 'active',
-                'configuration': {
-                    'reading_interval': 30,  # minutes
-                    'alert_threshold': 25,   # minimum moisture percentage
-                    'calibration_factor': 1.0
-                },
-                'created_at': '2023-01-15T08:30:00.000Z',
-                'updated_at': '2023-06-20T14:15:00.000Z'
-            },
-            {
-                'id': 'sensor-002',
-                'farmer_id': 'farmer-001',
-                'name': 'Weather Station',
-                'type': 'temperature',
-                'location': 'Field 1 - Center',
-                'field_id': '1',
-                'status': 'active',
-                'configuration': {
-                    'reading_interval': 15,  # minutes
-                    'alert_threshold_high': 35,  # maximum temperature (°C)
-                    'alert_threshold_low': 5,    # minimum temperature (°C)
-                    'calibration_factor': 1.0
-                },
-                'created_at': '2023-01-15T09:45:00.000Z',
-                'updated_at': '2023-06-20T14:15:00.000Z'
-            },
-            {
-                'id': 'sensor-003',
-                'farmer_id': 'farmer-001',
-                'name': 'Humidity Monitor',
-                'type': 'humidity',
-                'location': 'Field 1 - East Side',
-                'field_id': '1',
-                'status': 'active',
-                'configuration': {
-                    'reading_interval': 30,  # minutes
-                    'alert_threshold_high': 90,  # maximum humidity (%)
-                    'alert_threshold_low': 30,   # minimum humidity (%)
-                    'calibration_factor': 1.0
-                },
-                'created_at': '2023-01-15T10:15:00.000Z',
-                'updated_at': '2023-06-20T14:15:00.000Z'
-            }
-        ]
-    return get_all_sensors.ALL_SENSORS
+    """Get all sensors"""
+    return get_registry().all()
 
 def get_sensor_types():
     """Get available sensor types and their configuration options"""
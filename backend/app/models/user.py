@@ -1,29 +1,117 @@
 # app/models/user.py
-import hashlib
 import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import jwt
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
 from app.models import get_timestamp
-from app import db
+from app.utils.passwords import PasswordHasher
+from app.models.repository import Repository, stringify_id
 
-# Salt for password hashing
+users = Repository('users')
+
+# Salt of the legacy SHA-256 password hashes, still accepted (and replaced) at login
 SALT = os.environ.get('PASSWORD_SALT', 'developmentsalt')
 
+password_hasher = PasswordHasher(
+    n=int(os.environ.get('SCRYPT_N', 2 ** 14)),
+    r=int(os.environ.get('SCRYPT_R', 8)),
+    p=int(os.environ.get('SCRYPT_P', 1)),
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64)),
+    legacy_salt=SALT
+)
+
 # JWT secret key
 JWT_SECRET = os.environ.get('JWT_SECRET', 'developmentsecret')
 JWT_EXPIRATION = int(os.environ.get('JWT_EXPIRATION', 86400))  # 24 hours in seconds
 
+class TokenCache:
+    """
+    LRU of verified tokens -> user documents with a short TTL
+    
+    Lets authenticated requests skip the JWT decode and the user lookup.
+    An entry never outlives its token, and the TTL bounds how long a change
+    to the user document can go unnoticed.
+    """
+    
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        # token -> (expires_at on the monotonic clock, user)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[1].copy()
+    
+    def put(self, token, user, token_expires_at=None):
+        ttl = self.ttl
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        
+        with self._lock:
+            self._entries[token] = (time.monotonic() + ttl, user.copy())
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache(
+    ttl=int(os.environ.get('TOKEN_CACHE_TTL', 60)),
+    max_size=int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+)
+
 def hash_password(password):
-    """Hash a password with salt"""
-    return hashlib.sha256((password + SALT).encode()).hexdigest()
+    """Hash a password with scrypt (runs in the password hasher's pool)"""
+    return password_hasher.hash(password)
+
+def ensure_indexes():
+    """Create the unique indexes behind login lookups and registration"""
+    if not users.available:
+        return
+    
+    for field in ('username', 'email'):
+        try:
+            users.create_index(
+                [(field, ASCENDING)],
+                unique=True,
+                # Users without the field don't collide with each other
+                partialFilterExpression={field: {'$type': 'string'}},
+                name=f'unique_{field}'
+            )
+        except Exception as e:
+            # Existing duplicates have to be cleaned up by hand first
+            print(f"Could not create unique index on users.{field}: {e}")
 
 def create_user(username, email, password, name, phone=None):
-    """Create a new user"""
-    # Check if user already exists
-    if get_user_by_email(email) or get_user_by_username(username):
-        return None
+    """
+    Create a new user
+    
+    Relies on the unique indexes instead of looking the user up first, so
+    it is a single insert and two concurrent registrations can't both win.
     
+    Returns:
+        The user without the password hash, or None if the username or
+        email is already taken
+    """
     user = {
         'username': username,
         'email': email,
@@ -36,8 +124,10 @@ def create_user(username, email, password, name, phone=None):
     }
     
     # Insert user into MongoDB
-    result = db.users.insert_one(user)
-    user['_id'] = str(result.inserted_id)
+    try:
+        user['_id'] = users.insert_one(user)
+    except DuplicateKeyError:
+        return None
     
     # Return user without password hash
     user_data = user.copy()
@@ -49,45 +139,30 @@ def get_user_by_id(user_id):
     """Get a user by ID"""
     from bson.objectid import ObjectId
     
+    # The password hash never leaves the database here
     try:
-        user = db.users.find_one({'_id': ObjectId(user_id)})
+        user = users.find_one({'_id': ObjectId(user_id)}, {'password_hash': 0})
     except:
         # If not a valid ObjectId, try as a string (for backwards compatibility)
-        user = db.users.find_one({'_id': user_id})
-    
-    if user:
-        user['_id'] = str(user['_id'])
-        user_data = user.copy()
-        user_data.pop('password_hash', None)
-        return user_data
+        user = users.find_one({'_id': user_id}, {'password_hash': 0})
     
-    return None
+    return stringify_id(user)
 
 def get_user_by_username(username):
     """Get a user by username"""
-    user = db.users.find_one({'username': username})
-    if user:
-        user['_id'] = str(user['_id'])
-    return user
+    return stringify_id(users.find_one({'username': username}))
 
 def get_user_by_email(email):
     """Get a user by email"""
-    user = db.users.find_one({'email': email})
-    if user:
-        user['_id'] = str(user['_id'])
-    return user
+    return stringify_id(users.find_one({'email': email}))
 
 def authenticate_user(username_or_email, password):
     """Authenticate a user with username/email and password"""
     print(f"Attempting to authenticate: {username_or_email}")
     
-    # Try to find user by username or email
-    user = db.users.find_one({
-        '$or': [
-            {'username': username_or_email},
-            {'email': username_or_email}
-        ]
-    })
+    # Usernames can't contain '@', so one indexed equality lookup is enough
+    field = 'email' if '@' in username_or_email else 'username'
+    user = users.find_one({field: username_or_email})
     
     if not user:
         print(f"No user found with username/email: {username_or_email}")
@@ -99,23 +174,26 @@ def authenticate_user(username_or_email, password):
     user['_id'] = str(user['_id'])
     
     # Check password
-    input_hash = hash_password(password)
     stored_hash = user.get('password_hash')
-    print(f"Input password hash: {input_hash[:10]}...")
-    print(f"Stored password hash: {stored_hash[:10]}...")
     
-    if input_hash == stored_hash:
+    if password_hasher.verify(password, stored_hash):
         print("Password match successful!")
         # Return user without password hash
         user_data = user.copy()
         user_data.pop('password_hash', None)
         
+        updates = {'last_login': get_timestamp()}
+        if password_hasher.needs_rehash(stored_hash):
+            # Move legacy or outdated hashes to the current parameters
+            updates['password_hash'] = hash_password(password)
+        
         try:
-            # Update last login time
+            # Update last login time; unacknowledged, so the login doesn't
+            # wait for a second round trip (a lost rehash is redone next time)
             from bson.objectid import ObjectId
-            db.users.update_one(
+            users.with_write_concern(w=0).update_one(
                 {'_id': ObjectId(user['_id'])},
-                {'$set': {'last_login': get_timestamp()}}
+                {'$set': updates}
             )
             print("Updated last login time")
         except Exception as e:
@@ -135,6 +213,29 @@ def generate_token(user_id):
     
     return jwt.encode(payload, JWT_SECRET, algorithm='HS256')
 
+def get_user_by_token(token):
+    """
+    Get the user a token belongs to, or None if the token is invalid
+    
+    Verified tokens are cached for a short time, so repeated requests with
+    the same token skip the JWT decode and the database lookup.
+    """
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        # Invalid or expired token
+        return None
+    
+    user_id = payload.get('user_id')
+    user = get_user_by_id(user_id) if user_id else None
+    if user is not None:
+        token_cache.put(token, user, payload.get('exp'))
+    return user
+
 def verify_token(token):
     """Verify a JWT token and return the user ID if valid"""
     try:
@@ -149,10 +250,4 @@ def verify_token(token):
 
 def get_all_users():
     """Get all users from MongoDB"""
-    users = list(db.users.find())
-    
-    # Convert ObjectId to string for each user
-    for user in users:
-        user['_id'] = str(user['_id'])
-    
-    return users
\ No newline at end of file
+    return users.find_list()
\ No newline at end of file
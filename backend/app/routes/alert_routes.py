@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import random
+from app.models.repository import mongo
+from app.models import alert as alert_model
 
 bp = Blueprint('alerts', __name__, url_prefix='/api/alerts')
 
@@ -49,12 +51,21 @@ def generate_simulated_alerts(farmer_id):
 @bp.route('/', methods=['GET'])
 def get_alerts():
     farmer_id = request.args.get('farmer_id', 'farmer-001')
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+    unread_only = request.args.get('unread', 'false').lower() == 'true'
     
-    # Generate simulated alerts
-    alerts = generate_simulated_alerts(farmer_id)
+    if not mongo.available:
+        # Generate simulated alerts when no database is available
+        alerts = generate_simulated_alerts(farmer_id)
+        return jsonify(alerts)
+    
+    # Alerts raised by the threshold engine as readings are ingested
+    alerts = alert_model.get_alerts(farmer_id, limit, unread_only)
     return jsonify(alerts)
 
 @bp.route('/<alert_id>/read', methods=['PUT'])
 def mark_as_read(alert_id):
-    # In a real application, this would update MongoDB
+    if mongo.available and not alert_model.mark_as_read(alert_id):
+        return jsonify({'error': 'Alert not found'}), 404
+    
     return jsonify({'success': True, 'message': f'Alert {alert_id} marked as read'})
\ No newline at end of file
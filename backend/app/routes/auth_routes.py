@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.models import user as user_model
+from app.utils.passwords import HasherBusy
 import re
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -32,21 +33,20 @@ def register():
     if len(password) < 8:
         return jsonify({'error': 'Password must be at least 8 characters long'}), 400
     
-    # Check if user already exists
-    if user_model.get_user_by_email(email) or user_model.get_user_by_username(username):
-        return jsonify({'error': 'Username or email already in use'}), 400
-    
     # Create user
-    user = user_model.create_user(
-        username=username,
-        email=email,
-        password=password,
-        name=data['name'],
-        phone=data.get('phone')
-    )
+    try:
+        user = user_model.create_user(
+            username=username,
+            email=email,
+            password=password,
+            name=data['name'],
+            phone=data.get('phone')
+        )
+    except HasherBusy:
+        return jsonify({'error': 'Server busy, try again later'}), 503
     
     if not user:
-        return jsonify({'error': 'Failed to create user'}), 500
+        return jsonify({'error': 'Username or email already in use'}), 400
     
     # Generate token
     token = user_model.generate_token(user['_id'])
@@ -72,7 +72,10 @@ def login():
         return jsonify({'error': 'Username/email and password are required'}), 400
     
     # Authenticate user
-    user = user_model.authenticate_user(username_or_email, password)
+    try:
+        user = user_model.authenticate_user(username_or_email, password)
+    except HasherBusy:
+        return jsonify({'error': 'Server busy, try again later'}), 503
     
     if not user:
         print(f"Authentication failed for: {username_or_email}")
@@ -98,16 +101,13 @@ def get_current_user():
     
     token = auth_header.split(' ')[1]
     
-    # Verify token
-    user_id = user_model.verify_token(token)
-    
-    if not user_id:
-        return jsonify({'error': 'Invalid or expired token'}), 401
-    
-    # Get user
-    user = user_model.get_user_by_id(user_id)
+    # Verify token and get user (cached per token for a short time)
+    user = user_model.get_user_by_token(token)
     
     if not user:
+        # Only failures pay for a second decode, to pick the right error
+        if not user_model.verify_token(token):
+            return jsonify({'error': 'Invalid or expired token'}), 401
         return jsonify({'error': 'User not found'}), 404
     
     return jsonify(user)
\ No newline at end of file
@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify
 from app.services.disease_detection_service import DiseaseDetectionService
+from app.utils.lazy import LazyService
 import os
 
 bp = Blueprint('diseases', __name__, url_prefix='/api/diseases')
 
-# Initialize disease detection service
-disease_service = DiseaseDetectionService()
+# Disease detection service, created on first use
+disease_service = LazyService(DiseaseDetectionService)
 
 @bp.route('/analyze', methods=['POST'])
 def analyze_image():
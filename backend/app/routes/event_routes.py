@@ -0,0 +1,53 @@
+import os
+from flask import Blueprint, request, jsonify, Response
+from app.services.event_hub import event_hub, SubscriberLimitReached
+
+bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+# Seconds between keepalive comments on an idle stream
+HEARTBEAT_INTERVAL = int(os.environ.get('EVENT_HEARTBEAT_INTERVAL', 15))
+
+@bp.route('/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of a farmer's new readings, alerts and recommendations
+    
+    Clients reconnect with the Last-Event-ID header to resume. A 'resync'
+    event means events were lost (the client fell too far behind) and the
+    client should refetch from the REST endpoints before reconnecting.
+    """
+    farmer_id = request.args.get('farmer_id', 'farmer-001')
+    
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an integer'}), 400
+    
+    try:
+        subscription = event_hub.subscribe(farmer_id, last_event_id)
+    except SubscriberLimitReached:
+        return jsonify({'error': 'Too many open streams, try again later'}), 503
+    
+    def generate():
+        try:
+            yield f'retry: {HEARTBEAT_INTERVAL * 1000}\n\n'
+            while True:
+                frames = subscription.wait(HEARTBEAT_INTERVAL)
+                # The comment doubles as a check that the client is still there
+                yield ''.join(frames) if frames else ': keepalive\n\n'
+                if subscription.overflowed:
+                    yield 'event: resync\ndata: {}\n\n'
+                    return
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+    # The generator's finally doesn't run if the client is gone before the
+    # first chunk; unsubscribing twice is harmless
+    response.call_on_close(lambda: event_hub.unsubscribe(subscription))
+    return response
@@ -1,7 +1,7 @@
 # app/routes/irrigation_routes.py
 from flask import Blueprint, request, jsonify
 from app.services.irrigation_service import IrrigationService
-from app.routes import reading_routes
+from app.services.reading_provider import reading_provider
 from app.routes.weather_routes import weather_service
 
 bp = Blueprint('irrigation', __name__, url_prefix='/api/irrigation')
@@ -18,7 +18,7 @@ def get_irrigation_schedule():
     
     # Get soil moisture readings
     soil_moisture_sensor_id = 'sensor-001'  # Default sensor ID for soil moisture
-    soil_moisture_readings = reading_routes.generate_simulated_readings(soil_moisture_sensor_id, 48)
+    soil_moisture_readings = reading_provider.get_series(soil_moisture_sensor_id, 48)
     
     # Get weather forecast
     weather_forecast = weather_service.get_forecast(7)
@@ -1,10 +1,14 @@
-from flask import Blueprint, request, jsonify
+import json
+import queue
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from app.services.notification_service import NotificationService
+from app.utils.lazy import LazyService
+from app.models import farmer as farmer_model
 
 bp = Blueprint('notifications', __name__, url_prefix='/api/notifications')
 
-# Initialize notification service
-notification_service = NotificationService()
+# Notification service, created on first use (it starts delivery threads)
+notification_service = LazyService(NotificationService)
 
 @bp.route('/email', methods=['POST'])
 def send_email():
@@ -20,12 +24,16 @@ def send_email():
     if not email or not subject or not message:
         return jsonify({'error': 'Email, subject, and message are required'}), 400
     
-    success = notification_service.send_email(email, subject, message)
+    try:
+        notification_id = notification_service.enqueue_email(email, subject, message)
+    except queue.Full:
+        return jsonify({'error': 'Notification queue is full, try again later'}), 503
     
-    if success:
-        return jsonify({'success': True, 'message': 'Email notification sent'})
-    else:
-        return jsonify({'error': 'Failed to send email notification'}), 500
+    return jsonify({
+        'success': True,
+        'message': 'Email notification queued',
+        'notification_id': notification_id
+    }), 202
 
 @bp.route('/sms', methods=['POST'])
 def send_sms():
@@ -40,12 +48,97 @@ def send_sms():
     if not phone or not message:
         return jsonify({'error': 'Phone and message are required'}), 400
     
-    success = notification_service.send_sms(phone, message)
+    try:
+        notification_id = notification_service.enqueue_sms(phone, message)
+    except queue.Full:
+        return jsonify({'error': 'Notification queue is full, try again later'}), 503
     
-    if success:
-        return jsonify({'success': True, 'message': 'SMS notification sent'})
-    else:
-        return jsonify({'error': 'Failed to send SMS notification'}), 500
+    return jsonify({
+        'success': True,
+        'message': 'SMS notification queued',
+        'notification_id': notification_id
+    }), 202
+
+def farmers_in_county(county, chunk_size=1000):
+    """Lazily yield farmers whose farm location falls in the given county"""
+    from app.services.external_weather_service import COUNTY_INDEX
+    
+    def matching(chunk):
+        indexes, _ = COUNTY_INDEX.locate_many(
+            [farmer['farmLocation']['latitude'] for farmer in chunk],
+            [farmer['farmLocation']['longitude'] for farmer in chunk]
+        )
+        return [farmer for farmer, i in zip(chunk, indexes.tolist()) if COUNTY_INDEX.names[i] == county]
+    
+    # Geocode farmers in chunks to keep memory bounded
+    chunk = []
+    for farmer in farmer_model.iter_farmers({'name': 1, 'phone': 1, 'farmLocation': 1}):
+        location = farmer.get('farmLocation') or {}
+        if location.get('latitude') is None or location.get('longitude') is None:
+            continue
+        chunk.append(farmer)
+        if len(chunk) >= chunk_size:
+            yield from matching(chunk)
+            chunk = []
+    
+    if chunk:
+        yield from matching(chunk)
+
+@bp.route('/broadcast', methods=['POST'])
+def broadcast():
+    from app.services.external_weather_service import KENYA_COUNTIES
+    
+    data = request.json
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    channel = data.get('channel', 'sms')
+    subject = data.get('subject', 'Alert')
+    message = data.get('message')
+    recipients = data.get('recipients')
+    county = data.get('county')
+    
+    if channel not in ('email', 'sms'):
+        return jsonify({'error': 'Channel must be email or sms'}), 400
+    
+    if not message:
+        return jsonify({'error': 'Message is required'}), 400
+    
+    if recipients is None and not county:
+        return jsonify({'error': 'Recipients or county is required'}), 400
+    
+    if recipients is not None and not isinstance(recipients, list):
+        return jsonify({'error': 'Recipients must be a list'}), 400
+    
+    if county:
+        # Farmer records only have a phone number to reach them at
+        if channel != 'sms':
+            return jsonify({'error': 'County broadcasts can only be sent by sms'}), 400
+        if county not in KENYA_COUNTIES.values():
+            return jsonify({'error': f'Unknown county: {county}'}), 400
+        recipients = farmers_in_county(county)
+    
+    try:
+        results = notification_service.broadcast(channel, recipients, subject, message)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid message template: {e}'}), 400
+    
+    def generate():
+        # One JSON object per line so clients can process results as they arrive
+        for result in results:
+            yield json.dumps(result) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/status/<notification_id>', methods=['GET'])
+def get_notification_status(notification_id):
+    status = notification_service.get_delivery_status(notification_id)
+    
+    if not status:
+        return jsonify({'error': 'Notification not found'}), 404
+    
+    return jsonify(status)
 
 @bp.route('/history', methods=['GET'])
 def get_notification_history():
@@ -1,60 +1,91 @@
 from flask import Blueprint, request, jsonify
-import random
-from datetime import datetime, timedelta
 import os
 import json
+from app.models.repository import mongo
+from app.models import reading as reading_model
+from app.services.reading_provider import reading_provider
+from app.services.ai_service import AgriculturalAI
+from app.utils.window_stats import live_windows
 
 bp = Blueprint('readings', __name__, url_prefix='/api/readings')
 
+# Analyzes the live windows kept up to date by ingest
+ai = AgriculturalAI()
+
 def generate_simulated_readings(sensor_id, hours=24):
-    """Generate simulated sensor readings for development"""
-    readings = []
-    now = datetime.now()
-    
-    for i in range(hours):
-        timestamp = now - timedelta(hours=i)
-        
-        # Generate different values based on sensor type
-        if 'soil_moisture' in sensor_id or 'moisture' in sensor_id:
-            value = random.uniform(30, 70)
-            unit = '%'
-            type_name = 'soil_moisture'
-        elif 'temp' in sensor_id:
-            # Daily temperature cycle
-            hour_of_day = timestamp.hour
-            base_temp = 22 + 5 * (1 - abs(hour_of_day - 14) / 14)  # Peak at 2 PM
-            value = base_temp + random.uniform(-2, 2)
-            unit = '°C'
-            type_name = 'temperature'
-        elif 'humid' in sensor_id:
-            value = random.uniform(50, 80)
-            unit = '%'
-            type_name = 'humidity'
-        else:
-            value = random.uniform(0, 100)
-            unit = 'units'
-            type_name = 'unknown'
-        
-        readings.append({
-            'sensor_id': sensor_id,
-            'timestamp': timestamp.isoformat(),
-            'data': {
-                type_name: round(value, 1),
-                'unit': unit
-            }
-        })
-    
-    return sorted(readings, key=lambda x: x['timestamp'])
+    """Get simulated sensor readings for development (shared, read-only)"""
+    return reading_provider.get_readings(sensor_id, hours)
 
 # In app/routes/reading_routes.py - Add some debug logging
 @bp.route('/', methods=['GET'])
 def get_readings():
     sensor_id = request.args.get('sensor_id', 'sensor-001')
     hours = request.args.get('hours', default=24, type=int)
+    resolution = request.args.get('resolution', 'raw')
+    
+    if not mongo.available:
+        print(f"Generating readings for sensor {sensor_id} for {hours} hours")
+        # Generate simulated readings when no database is available
+        readings = generate_simulated_readings(sensor_id, hours)
+        print(f"Generated {len(readings)} readings")
+        return jsonify(readings)
+    
+    if resolution == 'raw':
+        readings = reading_model.get_readings(sensor_id, hours)
+        return jsonify(readings)
+    
+    # Serve pre-aggregated hourly or daily rollups
+    try:
+        rollups = reading_model.get_rollups(sensor_id, resolution, hours)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(rollups)
+
+@bp.route('/live', methods=['GET'])
+def get_live_stats():
+    sensor_id = request.args.get('sensor_id')
+    crop_type = request.args.get('crop_type', 'maize')
+    
+    if not sensor_id:
+        return jsonify({'error': 'Missing required parameter: sensor_id'}), 400
+    
+    # Statistics over the latest ingested readings, updated as they arrive
+    window = live_windows.get(sensor_id)
+    if window is None:
+        return jsonify({'error': f'No live readings for sensor {sensor_id}'}), 404
+    
+    analyzers = {
+        'soil_moisture': ai.analyze_soil_moisture,
+        'temperature': ai.analyze_temperature,
+        'humidity': ai.analyze_humidity
+    }
+    analyze = analyzers.get(window.type_name)
+    
+    return jsonify({
+        'sensor_id': sensor_id,
+        'stats': window.to_dict(),
+        'recommendation': analyze(window, crop_type) if analyze else None
+    })
+
+@bp.route('/', methods=['POST'])
+def ingest_readings():
+    data = request.json
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    # Accept either a bare list of readings or {'readings': [...]}
+    readings = data.get('readings') if isinstance(data, dict) else data
+    if not isinstance(readings, list):
+        return jsonify({'error': 'Readings must be a list'}), 400
+    
+    if not mongo.available:
+        return jsonify({'error': 'Reading storage is unavailable'}), 503
     
-    print(f"Generating readings for sensor {sensor_id} for {hours} hours")
-    # Generate simulated readings
-    readings = generate_simulated_readings(sensor_id, hours)
-    print(f"Generated {len(readings)} readings")
+    try:
+        result = reading_model.ingest_readings(readings)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(readings)
\ No newline at end of file
+    return jsonify({'success': True, **result}), 201
\ No newline at end of file
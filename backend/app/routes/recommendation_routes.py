@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 import random
 from app.models import recommendation as rec_model
 from app.services.recommendation_generator import RecommendationGenerator
-from app.routes import reading_routes  # Import to get simulated readings
+from app.services.reading_provider import reading_provider
+from app.services.event_hub import event_hub
+from app.models.repository import mongo
 
 bp = Blueprint('recommendations', __name__, url_prefix='/api/recommendations')
 
@@ -18,16 +20,10 @@ def get_recommendations():
     generate_new = request.args.get('generate', 'false').lower() == 'true'
     
     if generate_new:
-        # Get sensor readings
-        soil_moisture_readings = reading_routes.generate_simulated_readings('sensor-001', 48)
-        temperature_readings = reading_routes.generate_simulated_readings('sensor-002', 48)
-        humidity_readings = reading_routes.generate_simulated_readings('sensor-003', 48)
-        
-        # Organize readings by sensor ID
+        # Get sensor readings, organized by sensor ID
         sensor_data = {
-            'sensor-001': soil_moisture_readings,
-            'sensor-002': temperature_readings,
-            'sensor-003': humidity_readings
+            sensor_id: reading_provider.get_series(sensor_id, 48)
+            for sensor_id in ('sensor-001', 'sensor-002', 'sensor-003')
         }
         
         # Generate new recommendations
@@ -37,11 +33,36 @@ def get_recommendations():
             'maize'  # Default crop type
         )
         
-        return jsonify(new_recommendations)
+        # Let streaming clients pick them up without polling; only what was
+        # actually stored is new, duplicates of open ones were skipped
+        if new_recommendations:
+            event_hub.publish(farmer_id, 'recommendations', new_recommendations)
+        
+        if not mongo.available:
+            return jsonify(new_recommendations)
+        
+        # Fall through to the listing so the response holds the open
+        # recommendations along with the new ones, not just the new ones
+    
+    if not mongo.available:
+        # Use simulated data when no database is available
+        simulated_recommendations = generate_simulated_recommendations(farmer_id)
+        return jsonify(simulated_recommendations)
     
-    # Use simulated data for development
-    simulated_recommendations = generate_simulated_recommendations(farmer_id)
-    return jsonify(simulated_recommendations)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    unread_only = request.args.get('unread', 'false').lower() == 'true'
+    try:
+        recommendations, next_cursor = rec_model.get_recommendations(
+            farmer_id, limit, request.args.get('cursor'), unread_only
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # The body stays a plain list; the next page is requested with ?cursor=
+    response = jsonify(recommendations)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 def generate_simulated_recommendations(farmer_id):
     """Generate simulated recommendations for development"""
@@ -84,5 +105,7 @@ def generate_simulated_recommendations(farmer_id):
 
 @bp.route('/<rec_id>/read', methods=['PUT'])
 def mark_as_read(rec_id):
-    # In a real application, this would update MongoDB
+    if mongo.available and not rec_model.mark_as_read(rec_id):
+        return jsonify({'error': 'Recommendation not found'}), 404
+    
     return jsonify({'success': True, 'message': f'Recommendation {rec_id} marked as read'})
\ No newline at end of file
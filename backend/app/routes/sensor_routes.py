@@ -3,6 +3,9 @@ from app.models import sensor as sensor_model
 
 bp = Blueprint('sensors', __name__, url_prefix='/api/sensors')
 
+# Fields that can be changed through the update endpoint
+UPDATABLE_FIELDS = ['name', 'type', 'location', 'field_id', 'status', 'configuration']
+
 @bp.route('/', methods=['POST'])
 def create_sensor():
     data = request.json
@@ -14,17 +17,15 @@ def create_sensor():
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
-    # Create a new simulated sensor
-    sensor_id = f"sensor-{len(SIMULATED_SENSORS) + 1:03d}"
-    new_sensor = {
-        'id': sensor_id,
-        'type': data['type'],
-        'location': data['location'],
-        'farmer_id': data['farmer_id'],
-        'status': 'active'
-    }
-    
-    SIMULATED_SENSORS.append(new_sensor)
+    # Stored in the sensor registry, which the alert engine reads its thresholds from
+    new_sensor = sensor_model.create_sensor(
+        farmer_id=data['farmer_id'],
+        name=data.get('name', f"{data['type'].replace('_', ' ').title()} Sensor"),
+        type=data['type'],
+        location=data['location'],
+        field_id=data.get('field_id'),
+        configuration=data.get('configuration')
+    )
     return jsonify(new_sensor), 201
 
 @bp.route('/<sensor_id>', methods=['PUT'])
@@ -33,24 +34,17 @@ def update_sensor(sensor_id):
     if not data:
         return jsonify({'error': 'No data provided'}), 400
     
-    # Find the sensor
-    for sensor in SIMULATED_SENSORS:
-        if sensor['id'] == sensor_id:
-            # Update fields
-            for key in ['type', 'location', 'status']:
-                if key in data:
-                    sensor[key] = data[key]
-            return jsonify(sensor)
+    updates = {key: data[key] for key in UPDATABLE_FIELDS if key in data}
+    sensor = sensor_model.update_sensor(sensor_id, updates)
     
-    return jsonify({'error': 'Sensor not found'}), 404
+    if not sensor:
+        return jsonify({'error': 'Sensor not found'}), 404
+    
+    return jsonify(sensor)
 
 @bp.route('/<sensor_id>', methods=['DELETE'])
 def delete_sensor(sensor_id):
-    global SIMULATED_SENSORS
-    original_count = len(SIMULATED_SENSORS)
-    SIMULATED_SENSORS = [s for s in SIMULATED_SENSORS if s['id'] != sensor_id]
-    
-    if len(SIMULATED_SENSORS) < original_count:
+    if sensor_model.delete_sensor(sensor_id):
         return jsonify({'success': True, 'message': 'Sensor deleted'})
     
-    return jsonify({'error': 'Sensor not found'}), 404
\ No newline at end of file
+    return jsonify({'error': 'Sensor not found'}), 404
@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
-from app import db
+from app.models.repository import Repository
 
 bp = Blueprint('test', __name__, url_prefix='/api/test')
 
+test_collection = Repository('test_collection')
+
 @bp.route('/db-test', methods=['POST'])
 def test_mongodb_write():
     try:
@@ -11,13 +13,13 @@ def test_mongodb_write():
         data = request.get_json() or {"test": "data", "timestamp": str(datetime.now())}
         
         # Insert data into a test collection
-        result = db.test_collection.insert_one(data)
+        inserted_id = test_collection.insert_one(data)
         
         # Return success with the inserted ID
         return jsonify({
             "success": True, 
             "message": "Data successfully stored in MongoDB",
-            "inserted_id": str(result.inserted_id)
+            "inserted_id": inserted_id
         }), 201
     except Exception as e:
         return jsonify({
@@ -29,11 +31,8 @@ def test_mongodb_write():
 def test_mongodb_read():
     try:
         # Retrieve all documents from the test collection
-        data = list(db.test_collection.find())
-        
-        # Convert ObjectId to string for JSON serialization
-        for item in data:
-            item['_id'] = str(item['_id'])
+        # ObjectIds are converted to strings for JSON serialization
+        data = test_collection.find_list()
             
         return jsonify({
             "success": True,
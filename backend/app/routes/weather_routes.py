@@ -1,4 +1,5 @@
 # app/routes/weather_routes.py
+import math
 from flask import Blueprint, request, jsonify
 from app.services.weather_service import WeatherService
 
@@ -7,11 +8,47 @@ bp = Blueprint('weather', __name__, url_prefix='/api/weather')
 # Initialize the weather service
 weather_service = WeatherService()
 
+# Upper bound on coordinates accepted by the batch endpoint
+MAX_BATCH_COORDINATES = 5000
+
+def parse_coordinate(lat, lon):
+    """
+    Convert a latitude/longitude pair to floats
+    
+    Raises:
+        ValueError: If either is not a number, is NaN or infinite, or is out of range
+    """
+    lat, lon = float(lat), float(lon)
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        raise ValueError('Coordinates must be finite')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('Coordinates out of range')
+    return lat, lon
+
+def query_coordinate(default=(None, None)):
+    """
+    Get (lat, lon) from the query string, or `default` if either is missing
+    
+    Raises:
+        ValueError: If the coordinate is invalid
+    """
+    lat = request.args.get('lat')
+    lon = request.args.get('lon')
+    if lat is None or lon is None:
+        return default
+    return parse_coordinate(lat, lon)
+
+def invalid_coordinate():
+    """400 response for a bad lat/lon in the query string"""
+    return jsonify({'error': f"Invalid coordinate: {request.args.get('lat')}, {request.args.get('lon')}"}), 400
+
 @bp.route('/current', methods=['GET'])
 def get_current_weather():
     # Get location from query parameters (optional)
-    lat = request.args.get('lat', type=float)
-    lon = request.args.get('lon', type=float)
+    try:
+        lat, lon = query_coordinate()
+    except ValueError:
+        return invalid_coordinate()
     
     location = None
     if lat is not None and lon is not None:
@@ -30,20 +67,70 @@ def get_forecast():
     # Get number of days from query parameters
     days = request.args.get('days', 5, type=int)
     
-    # Get forecast
-    forecast = weather_service.get_forecast(days)
+    # Get location from query parameters (optional)
+    try:
+        lat, lon = query_coordinate()
+    except ValueError:
+        return invalid_coordinate()
+    
+    location = None
+    if lat is not None and lon is not None:
+        location = {'latitude': lat, 'longitude': lon}
+    
+    # Get forecast (deterministic per location and day, so repeat calls agree)
+    forecast = weather_service.get_forecast(days, location)
     return jsonify(forecast)
 
 @bp.route('/external', methods=['GET'])
 def get_external_weather():
+    import requests
     from app.services.external_weather_service import ExternalWeatherService
     
     # Get coordinates from query params (with defaults for Kenya)
-    lat = request.args.get('lat', 1.2921, type=float)
-    lon = request.args.get('lon', 36.8219, type=float)
+    try:
+        lat, lon = query_coordinate(default=(1.2921, 36.8219))
+    except ValueError:
+        return invalid_coordinate()
+    
+    # The service is cheap to create; the HTTP client and cache behind it are shared
+    external_service = ExternalWeatherService()
+    try:
+        weather_data = external_service.get_weather_by_coordinates(lat, lon)
+    except requests.RequestException as e:
+        return jsonify({'error': f'Weather provider unavailable: {e}'}), 502
+    
+    return jsonify(weather_data)
+
+@bp.route('/external/batch', methods=['POST'])
+def get_external_weather_batch():
+    from app.services.external_weather_service import ExternalWeatherService
+    
+    data = request.json
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    # Accept either a bare list or {'coordinates': [...]}
+    items = data.get('coordinates') if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return jsonify({'error': 'Coordinates must be a list'}), 400
+    
+    if len(items) > MAX_BATCH_COORDINATES:
+        return jsonify({'error': f'At most {MAX_BATCH_COORDINATES} coordinates per request'}), 400
+    
+    # Each item may be {'lat': .., 'lon': ..} or a [lat, lon] pair
+    coordinates = []
+    for item in items:
+        try:
+            if isinstance(item, dict):
+                coordinates.append(parse_coordinate(item['lat'], item['lon']))
+            else:
+                lat, lon = item
+                coordinates.append(parse_coordinate(lat, lon))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': f'Invalid coordinate: {item}'}), 400
     
-    # Create service and get weather data
-    weather_service = ExternalWeatherService()
-    weather_data = weather_service.get_weather_by_coordinates(lat, lon)
+    external_service = ExternalWeatherService()
+    results = external_service.get_weather_many(coordinates)
     
-    return jsonify(weather_data)
\ No newline at end of file
+    return jsonify(results)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from app.services.yield_prediction_service import YieldPredictionService
-from app.routes import reading_routes
+from app.services.reading_provider import reading_provider
 
 bp = Blueprint('yields', __name__, url_prefix='/api/yields')
 
@@ -17,13 +17,9 @@ def predict_yield():
     crop_type = data.get('crop_type', 'maize')
     area_hectares = data.get('area_hectares', 1.0)
     
-    # Get current conditions from simulated sensor data
-    soil_moisture_readings = reading_routes.generate_simulated_readings('sensor-001', 48)
-    temperature_readings = reading_routes.generate_simulated_readings('sensor-002', 48)
-    
-    # Extract latest values
-    latest_soil_moisture = soil_moisture_readings[-1]['data'].get('soil_moisture', 60) if soil_moisture_readings else 60
-    latest_temperature = temperature_readings[-1]['data'].get('temperature', 25) if temperature_readings else 25
+    # Get current conditions from the latest simulated sensor data
+    latest_soil_moisture = reading_provider.get_latest('sensor-001', 'soil_moisture', default=60)
+    latest_temperature = reading_provider.get_latest('sensor-002', 'temperature', default=25)
     
     # Combine with provided conditions or use defaults
     current_conditions = {
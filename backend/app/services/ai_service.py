@@ -1,7 +1,9 @@
 import numpy as np
-from datetime import datetime, timedelta
-import pandas as pd
-from sklearn.linear_model import LinearRegression
+from app.utils.reading_series import measurement_values
+from app.utils.window_stats import SlidingWindowStats
+
+# Number of most recent readings (hours) the analyzers look at
+ANALYSIS_WINDOW = 24
 
 class AgriculturalAI:
     def __init__(self):
@@ -37,34 +39,29 @@ class AgriculturalAI:
             }
         }
     
+    def _window(self, readings, measurement):
+        """
+        Statistics over the most recent readings of one measurement
+        
+        Args:
+            readings: A SlidingWindowStats (e.g. a live window kept up to date
+                as readings arrive), a ReadingSeries or a list of readings
+        """
+        if isinstance(readings, SlidingWindowStats):
+            return readings
+        values = measurement_values(readings[-ANALYSIS_WINDOW:], measurement)
+        return SlidingWindowStats.from_values(values, ANALYSIS_WINDOW, measurement)
+    
     def analyze_soil_moisture(self, readings, crop_type='maize'):
-        """Analyze soil moisture readings and provide recommendations"""
+        """Analyze soil moisture readings (window stats, ReadingSeries or list) and provide recommendations"""
         if not readings:
             return None
         
-        # Extract values and timestamps
-        values = [reading['data'].get('soil_moisture', 0) for reading in readings]
-        timestamps = [datetime.fromisoformat(reading['timestamp']) for reading in readings]
-        
-        # Get recent values (last 24 hours)
-        recent_values = values[-24:] if len(values) >= 24 else values
-        
-        # Calculate statistics
-        current = values[-1] if values else 0
-        avg = np.mean(recent_values)
-        min_val = np.min(recent_values)
-        max_val = np.max(recent_values)
-        
-        # Calculate trend over last 24 hours
-        if len(values) >= 2:
-            # Use linear regression to determine trend
-            X = np.array(range(len(recent_values))).reshape(-1, 1)
-            y = np.array(recent_values)
-            model = LinearRegression()
-            model.fit(X, y)
-            trend = model.coef_[0]
-        else:
-            trend = 0
+        stats = self._window(readings, 'soil_moisture')
+        current = stats.latest
+        
+        # Least-squares trend over the window, per reading
+        trend = stats.slope
         
         # Get optimal range for the crop
         min_optimal, max_optimal = self.crop_requirements.get(
@@ -107,7 +104,8 @@ class AgriculturalAI:
                 }
             }
         elif trend < -0.5:  # Significant decreasing trend
-            hours_until_critical = (min_optimal - current) / (-trend) if trend < 0 else 48
+            # Hours until the trend line reaches the bottom of the optimal range
+            hours_until_critical = stats.samples_until(min_optimal)
             if hours_until_critical < 24:
                 return {
                     'type': 'irrigation',
@@ -133,22 +131,14 @@ class AgriculturalAI:
         }
     
     def analyze_temperature(self, readings, crop_type='maize'):
-        """Analyze temperature readings and provide recommendations"""
+        """Analyze temperature readings (window stats, ReadingSeries or list) and provide recommendations"""
         if not readings:
             return None
         
-        # Extract values and timestamps
-        values = [reading['data'].get('temperature', 0) for reading in readings]
-        timestamps = [datetime.fromisoformat(reading['timestamp']) for reading in readings]
-        
-        # Get recent values (last 24 hours)
-        recent_values = values[-24:] if len(values) >= 24 else values
-        
-        # Calculate statistics
-        current = values[-1] if values else 0
-        avg = np.mean(recent_values)
-        min_val = np.min(recent_values)
-        max_val = np.max(recent_values)
+        stats = self._window(readings, 'temperature')
+        current = stats.latest
+        min_val = stats.min
+        max_val = stats.max
         
         # Get optimal range for the crop
         min_optimal, max_optimal = self.crop_requirements.get(
@@ -204,19 +194,12 @@ class AgriculturalAI:
         }
     
     def analyze_humidity(self, readings, crop_type='maize'):
-        """Analyze humidity readings and provide recommendations"""
+        """Analyze humidity readings (window stats, ReadingSeries or list) and provide recommendations"""
         if not readings:
             return None
         
-        # Extract values
-        values = [reading['data'].get('humidity', 0) for reading in readings]
-        
-        # Get recent values (last 24 hours)
-        recent_values = values[-24:] if len(values) >= 24 else values
-        
-        # Calculate statistics
-        current = values[-1] if values else 0
-        avg = np.mean(recent_values)
+        stats = self._window(readings, 'humidity')
+        current = stats.latest
         
         # Get optimal range for the crop
         min_optimal, max_optimal = self.crop_requirements.get(
@@ -260,13 +243,9 @@ class AgriculturalAI:
         if not temperature_readings or not humidity_readings:
             return None
         
-        # Extract recent values
-        temp_values = [reading['data'].get('temperature', 0) for reading in temperature_readings[-24:]]
-        humidity_values = [reading['data'].get('humidity', 0) for reading in humidity_readings[-24:]]
-        
-        # Calculate averages
-        avg_temp = np.mean(temp_values)
-        avg_humidity = np.mean(humidity_values)
+        # Averages over the recent readings
+        avg_temp = self._window(temperature_readings, 'temperature').mean
+        avg_humidity = self._window(humidity_readings, 'humidity').mean
         
         # Simple risk model: higher risk when warm and humid
         # This is a simplified example - a real model would be more sophisticated
@@ -334,13 +313,9 @@ class AgriculturalAI:
         if not temperature_readings or not soil_moisture_readings:
             return None
         
-        # Extract recent values
-        temp_values = [reading['data'].get('temperature', 0) for reading in temperature_readings[-24:]]
-        moisture_values = [reading['data'].get('soil_moisture', 0) for reading in soil_moisture_readings[-24:]]
-        
-        # Calculate averages
-        avg_temp = np.mean(temp_values)
-        avg_moisture = np.mean(moisture_values)
+        # Averages over the recent readings
+        avg_temp = self._window(temperature_readings, 'temperature').mean
+        avg_moisture = self._window(soil_moisture_readings, 'soil_moisture').mean
         
         # Get optimal ranges for the crop
         temp_range = self.crop_requirements.get(
@@ -466,4 +441,345 @@ class AgriculturalAI:
         if not important_recommendations and recommendations:
             important_recommendations = [recommendations[0]]
         
-        return important_recommendations
\ No newline at end of file
+        return important_recommendations
+    
+    def _crop_range_arrays(self, crop_types, n_fields, measurement):
+        """Build per-field min/max arrays and range tuples for a measurement"""
+        if isinstance(crop_types, str):
+            crop_types = [crop_types] * n_fields
+        
+        # Resolve each distinct crop once and broadcast back to the fields
+        names, inverse = np.unique(np.asarray(crop_types, dtype=str), return_inverse=True)
+        range_tuples = [
+            self.crop_requirements.get(name.lower(), self.crop_requirements['maize'])[measurement]
+            for name in names
+        ]
+        ranges = np.array(range_tuples, dtype=float)
+        
+        return ranges[inverse, 0], ranges[inverse, 1], [range_tuples[i] for i in inverse.tolist()]
+    
+    @staticmethod
+    def _batch_trend(window):
+        """Least-squares slope of each row against its sample index"""
+        n = window.shape[1]
+        if n < 2:
+            return np.zeros(window.shape[0])
+        
+        x = np.arange(n, dtype=float)
+        x_centered = x - x.mean()
+        return (window - window.mean(axis=1, keepdims=True)) @ x_centered / (x_centered @ x_centered)
+    
+    def _batch_soil_moisture(self, values, crop_types):
+        """Vectorized counterpart of analyze_soil_moisture"""
+        recent = values[:, -24:]
+        current = values[:, -1]
+        trend = self._batch_trend(recent)
+        min_optimal, max_optimal, optimal_ranges = self._crop_range_arrays(crop_types, len(values), 'soil_moisture')
+        
+        low = current < min_optimal
+        high = current > max_optimal
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hours_until_critical = np.where(trend < 0, (min_optimal - current) / trend, 48)
+        depleting = ~low & ~high & (trend < -0.5) & (hours_until_critical < 24)
+        
+        recommendations = []
+        for i in range(len(values)):
+            data = {
+                'current': current[i].item(),
+                'optimal_range': optimal_ranges[i],
+                'trend': trend[i].item()
+            }
+            if low[i]:
+                if trend[i] < 0:
+                    severity = 'high'
+                    message = f'Soil moisture is low ({current[i]:.1f}%) and decreasing. Immediate irrigation recommended.'
+                else:
+                    severity = 'medium'
+                    message = f'Soil moisture is low ({current[i]:.1f}%), but trend is stable or increasing. Consider irrigation in the next 24 hours.'
+            elif high[i]:
+                severity = 'low'
+                message = f'Soil moisture is high ({current[i]:.1f}%). Delay irrigation until levels decrease.'
+            elif depleting[i]:
+                severity = 'medium'
+                message = f'Soil moisture is decreasing. Irrigation will be needed within {int(hours_until_critical[i])} hours.'
+                data['hours_until_critical'] = hours_until_critical[i].item()
+            else:
+                severity = 'low'
+                message = f'Soil moisture is within optimal range ({current[i]:.1f}%).'
+            
+            recommendations.append({
+                'type': 'irrigation',
+                'severity': severity,
+                'message': message,
+                'data': data
+            })
+        
+        return recommendations
+    
+    def _batch_temperature(self, values, crop_types):
+        """Vectorized counterpart of analyze_temperature"""
+        recent = values[:, -24:]
+        current = values[:, -1]
+        min_val = recent.min(axis=1)
+        max_val = recent.max(axis=1)
+        variation = max_val - min_val
+        min_optimal, max_optimal, optimal_ranges = self._crop_range_arrays(crop_types, len(values), 'temperature')
+        
+        high = current > max_optimal
+        low = ~high & (current < min_optimal)
+        variable = ~high & ~low & (variation > 15)
+        
+        recommendations = []
+        for i in range(len(values)):
+            if high[i]:
+                severity = 'high'
+                message = f'Temperature is high ({current[i]:.1f}°C). Consider shade or irrigation to cool crops.'
+            elif low[i]:
+                severity = 'medium'
+                message = f'Temperature is low ({current[i]:.1f}°C). Monitor for frost risk.'
+            elif variable[i]:
+                severity = 'low'
+                message = f'Large temperature variations detected (min: {min_val[i]:.1f}°C, max: {max_val[i]:.1f}°C). Consider protective measures for sensitive crops.'
+            else:
+                severity = 'low'
+                message = f'Temperature is within optimal range ({current[i]:.1f}°C).'
+            
+            recommendations.append({
+                'type': 'temperature',
+                'severity': severity,
+                'message': message,
+                'data': {
+                    'current': current[i].item(),
+                    'optimal_range': optimal_ranges[i],
+                    'daily_variation': variation[i].item()
+                }
+            })
+        
+        return recommendations
+    
+    def _batch_humidity(self, values, crop_types):
+        """Vectorized counterpart of analyze_humidity"""
+        current = values[:, -1]
+        min_optimal, max_optimal, optimal_ranges = self._crop_range_arrays(crop_types, len(values), 'humidity')
+        
+        high = current > max_optimal
+        low = ~high & (current < min_optimal)
+        
+        recommendations = []
+        for i in range(len(values)):
+            if high[i]:
+                severity = 'medium'
+                message = f'Humidity is high ({current[i]:.1f}%). Monitor for fungal diseases.'
+            elif low[i]:
+                severity = 'medium'
+                message = f'Humidity is low ({current[i]:.1f}%). Consider irrigation to increase local humidity.'
+            else:
+                severity = 'low'
+                message = f'Humidity is within optimal range ({current[i]:.1f}%).'
+            
+            recommendations.append({
+                'type': 'humidity',
+                'severity': severity,
+                'message': message,
+                'data': {
+                    'current': current[i].item(),
+                    'optimal_range': optimal_ranges[i]
+                }
+            })
+        
+        return recommendations
+    
+    def _batch_pest_risk(self, temperature_values, humidity_values):
+        """Vectorized counterpart of predict_pest_risk"""
+        avg_temp = temperature_values[:, -24:].mean(axis=1)
+        avg_humidity = humidity_values[:, -24:].mean(axis=1)
+        
+        # Same rule order as predict_pest_risk; the first matching rule wins
+        conditions = [
+            (avg_temp > 25) & (avg_humidity > 70),
+            (avg_temp > 30) & (avg_humidity < 50),
+            (avg_temp > 22) & (avg_humidity >= 50) & (avg_humidity <= 70),
+            (avg_temp < 20) & (avg_humidity > 80)
+        ]
+        risk_scores = [0.8, 0.7, 0.5, 0.6, 0.2]
+        pest_groups = [
+            ['aphids', 'whiteflies', 'spider mites'],
+            ['thrips', 'mites'],
+            ['grasshoppers', 'beetles'],
+            ['slugs', 'fungal pathogens'],
+            ['general pests']
+        ]
+        rule = np.select(conditions, range(len(conditions)), default=len(conditions))
+        
+        recommendations = []
+        for i in rule.tolist():
+            pest_risk = risk_scores[i]
+            pest_types = list(pest_groups[i])
+            if pest_risk > 0.7:
+                recommendations.append({
+                    'type': 'pest_control',
+                    'severity': 'high',
+                    'message': f'High risk of pest infestation. Monitor for {", ".join(pest_types)}.',
+                    'data': {
+                        'risk_score': pest_risk,
+                        'potential_pests': pest_types
+                    }
+                })
+            elif pest_risk > 0.4:
+                recommendations.append({
+                    'type': 'pest_control',
+                    'severity': 'medium',
+                    'message': f'Moderate risk of pest infestation. Consider preventive measures for {", ".join(pest_types)}.',
+                    'data': {
+                        'risk_score': pest_risk,
+                        'potential_pests': pest_types
+                    }
+                })
+            else:
+                recommendations.append({
+                    'type': 'pest_control',
+                    'severity': 'low',
+                    'message': 'Low pest risk currently.',
+                    'data': {
+                        'risk_score': pest_risk
+                    }
+                })
+        
+        return recommendations
+    
+    def _batch_planting(self, temperature_values, moisture_values, crop_types):
+        """Vectorized counterpart of generate_planting_recommendation"""
+        n_fields = len(temperature_values)
+        if isinstance(crop_types, str):
+            crop_types = [crop_types] * n_fields
+        
+        avg_temp = temperature_values[:, -24:].mean(axis=1)
+        avg_moisture = moisture_values[:, -24:].mean(axis=1)
+        temp_min, temp_max, temp_ranges = self._crop_range_arrays(crop_types, n_fields, 'temperature')
+        moisture_min, moisture_max, moisture_ranges = self._crop_range_arrays(crop_types, n_fields, 'soil_moisture')
+        
+        temp_suitable = (temp_min <= avg_temp) & (avg_temp <= temp_max)
+        moisture_suitable = (moisture_min <= avg_moisture) & (avg_moisture <= moisture_max)
+        
+        recommendations = []
+        for i in range(n_fields):
+            crop_type = crop_types[i]
+            if temp_suitable[i] and moisture_suitable[i]:
+                severity = 'high'
+                message = f'Conditions are optimal for planting {crop_type}. Consider planting within the next 3-5 days.'
+            elif moisture_suitable[i]:
+                action = "wait for warmer weather" if avg_temp[i] < temp_min[i] else "wait for cooler weather"
+                severity = 'medium'
+                message = f'Soil moisture is suitable, but temperature is not optimal for planting {crop_type}. Recommend to {action}.'
+            elif temp_suitable[i]:
+                action = "irrigate soil" if avg_moisture[i] < moisture_min[i] else "allow soil to dry"
+                severity = 'medium'
+                message = f'Temperature is suitable, but soil moisture is not optimal for planting {crop_type}. Recommend to {action}.'
+            else:
+                severity = 'low'
+                message = f'Current conditions are not suitable for planting {crop_type}. Monitor and wait for improved conditions.'
+            
+            recommendations.append({
+                'type': 'planting',
+                'severity': severity,
+                'message': message,
+                'data': {
+                    'avg_temperature': avg_temp[i].item(),
+                    'avg_soil_moisture': avg_moisture[i].item(),
+                    'optimal_temp_range': temp_ranges[i],
+                    'optimal_moisture_range': moisture_ranges[i]
+                }
+            })
+        
+        return recommendations
+    
+    def get_batch_recommendations(self, field_readings, crop_types='maize'):
+        """
+        Generate recommendations for many fields at once
+        
+        Args:
+            field_readings: Dictionary mapping sensor types ('soil_moisture',
+                'temperature', 'humidity') to 2D arrays of shape
+                (n_fields, n_readings), oldest reading first
+            crop_types: Crop name shared by all fields, or a sequence with one
+                crop name per field
+        
+        Returns:
+            List with one entry per field, each the list of recommendation
+            dictionaries get_all_recommendations would return for that field
+        """
+        arrays = {
+            sensor_type: np.asarray(values, dtype=float)
+            for sensor_type, values in field_readings.items()
+            if values is not None and np.size(values) > 0
+        }
+        if not arrays:
+            return []
+        
+        n_fields = len(next(iter(arrays.values())))
+        for sensor_type, values in arrays.items():
+            if values.ndim != 2 or len(values) != n_fields:
+                raise ValueError(f"Readings for '{sensor_type}' must have shape (n_fields, n_readings)")
+        
+        soil = arrays.get('soil_moisture')
+        temperature = arrays.get('temperature')
+        humidity = arrays.get('humidity')
+        
+        # Columns are kept in the same order as get_all_recommendations builds them
+        columns = []
+        if soil is not None:
+            columns.append(self._batch_soil_moisture(soil, crop_types))
+        if temperature is not None:
+            columns.append(self._batch_temperature(temperature, crop_types))
+        if humidity is not None:
+            columns.append(self._batch_humidity(humidity, crop_types))
+        if temperature is not None and humidity is not None:
+            columns.append(self._batch_pest_risk(temperature, humidity))
+        if temperature is not None and soil is not None:
+            columns.append(self._batch_planting(temperature, soil, crop_types))
+        
+        results = []
+        for recommendations in zip(*columns):
+            important_recommendations = [rec for rec in recommendations if rec['severity'] != 'low']
+            if not important_recommendations:
+                important_recommendations = [recommendations[0]]
+            results.append(important_recommendations)
+        
+        return results
+    
+    def get_batch_recommendations_from_frame(self, readings_df, crop_types='maize', field_column='field_id'):
+        """
+        Generate recommendations from a long-format pandas DataFrame
+        
+        Args:
+            readings_df: DataFrame with a field column, a 'timestamp' column and
+                one column per sensor type
+            crop_types: Crop name shared by all fields, or a mapping of
+                field ID to crop name
+            field_column: Name of the column identifying the field
+        
+        Returns:
+            Dictionary mapping field ID to its list of recommendations
+        """
+        sensor_types = [
+            column for column in ('soil_moisture', 'temperature', 'humidity')
+            if column in readings_df.columns
+        ]
+        ordered = readings_df.sort_values([field_column, 'timestamp'])
+        
+        # Every field must contribute the same number of readings to form a matrix
+        counts = ordered.groupby(field_column, sort=True).size()
+        n_readings = int(counts.min()) if len(counts) else 0
+        window = ordered.groupby(field_column, sort=True).tail(n_readings)
+        field_ids = counts.index.tolist()
+        
+        field_readings = {
+            sensor_type: window[sensor_type].to_numpy(dtype=float).reshape(len(field_ids), n_readings)
+            for sensor_type in sensor_types
+        }
+        
+        if isinstance(crop_types, dict):
+            crop_types = [crop_types.get(field_id, 'maize') for field_id in field_ids]
+        
+        results = self.get_batch_recommendations(field_readings, crop_types)
+        return dict(zip(field_ids, results))
@@ -0,0 +1,231 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from app.models import sensor as sensor_model
+from app.models import alert as alert_model
+
+# How far a value must recover past a threshold before that alert can fire again
+DEFAULT_HYSTERESIS = {
+    'soil_moisture': 2.0,
+    'temperature': 1.0,
+    'humidity': 3.0
+}
+
+UNITS = {
+    'soil_moisture': '%',
+    'temperature': '°C',
+    'humidity': '%'
+}
+
+class AlertRuleTable:
+    """
+    Per-sensor thresholds compiled into parallel arrays
+    
+    Row i holds the low and high thresholds (NaN when unset) and the
+    hysteresis band of sensor_ids[i], so a batch of readings is checked
+    with a few array comparisons after one lookup of each reading's row.
+    """
+    
+    def __init__(self, sensors):
+        sensors = [
+            sensor for sensor in sensors
+            if sensor.get('status', 'active') == 'active' and self._thresholds(sensor) != (None, None)
+        ]
+        
+        self.sensor_ids = [sensor['id'] for sensor in sensors]
+        self.index = {sensor_id: row for row, sensor_id in enumerate(self.sensor_ids)}
+        self.sensors = sensors
+        
+        thresholds = [self._thresholds(sensor) for sensor in sensors]
+        self.low = np.array([np.nan if low is None else low for low, _ in thresholds], dtype=float)
+        self.high = np.array([np.nan if high is None else high for _, high in thresholds], dtype=float)
+        self.band = np.array([
+            float((sensor.get('configuration') or {}).get('alert_hysteresis', DEFAULT_HYSTERESIS.get(sensor.get('type'), 1.0)))
+            for sensor in sensors
+        ])
+    
+    @staticmethod
+    def _thresholds(sensor):
+        """(low, high) thresholds from a sensor's configuration"""
+        configuration = sensor.get('configuration') or {}
+        # A bare alert_threshold is a minimum (e.g. soil moisture)
+        low = configuration.get('alert_threshold_low', configuration.get('alert_threshold'))
+        high = configuration.get('alert_threshold_high')
+        return (
+            float(low) if low is not None else None,
+            float(high) if high is not None else None
+        )
+    
+    def __len__(self):
+        return len(self.sensor_ids)
+
+class AlertEngine:
+    """
+    Evaluates ingested readings against sensor thresholds
+    
+    Alerts fire on crossings, not on every reading past a threshold: a low
+    alert fires when a value drops below the threshold and cannot fire
+    again until the value has recovered above threshold + band (and the
+    mirror image for high alerts). On top of that, an alert for the same
+    sensor and rule is suppressed if one fired less than dedup_window ago.
+    
+    That state is per process. With several workers each one raises its
+    own copy of an alert, so alerts also carry a dedup_key of (sensor,
+    rule, dedup_window bucket of the reading time) that the store upserts
+    on: across processes at most one alert per sensor and rule is stored
+    per bucket.
+    """
+    
+    def __init__(self, dedup_window=timedelta(hours=1), refresh_interval=60):
+        self.dedup_window = dedup_window
+        self.refresh_interval = refresh_interval
+        
+        self._table = None
+        self._compiled_at = 0
+        self._generation = None
+        
+        # (sensor_id, rule) -> True while the value is past the threshold
+        self._active = {}
+        # (sensor_id, rule) -> reading timestamp of the last alert raised
+        self._last_raised = {}
+        self._lock = threading.Lock()
+    
+    def _rules(self):
+        """Get the compiled rule table, rebuilding it when sensors change"""
+        registry = sensor_model.get_registry()
+        if (self._table is None or registry.generation != self._generation or
+                time.monotonic() - self._compiled_at > self.refresh_interval):
+            self._generation = registry.generation
+            self._table = AlertRuleTable(registry.all())
+            self._compiled_at = time.monotonic()
+        return self._table
+    
+    @staticmethod
+    def _crossings(group_start, trigger, clear, initial):
+        """
+        Run the hysteresis state machine for every sensor in one pass
+        
+        Samples are ordered by sensor, then time; group_start marks each
+        sensor's first sample. Within a group the state is set by the most
+        recent trigger (1) or clear (0) event, else by the state the sensor
+        was in before this batch.
+        
+        Returns:
+            Tuple of (raised, state): where a sample flips the state from 0
+            to 1, and the state after each sample
+        """
+        positions = np.arange(len(trigger))
+        event = np.where(trigger, 1, np.where(clear, 0, -1))
+        
+        starts = np.maximum.accumulate(np.where(group_start, positions, 0))
+        last_event = np.maximum.accumulate(np.where(event >= 0, positions, -1))
+        state = np.where(last_event >= starts, event[np.maximum(last_event, 0)], initial)
+        
+        previous = np.empty_like(state)
+        previous[1:] = state[:-1]
+        previous[group_start] = initial[group_start]
+        return (state == 1) & (previous == 0), state
+    
+    def evaluate(self, samples):
+        """
+        Check a batch of readings against the thresholds
+        
+        Args:
+            samples: Iterable of (sensor_id, timestamp, type_name, value)
+        
+        Returns:
+            List of alert dictionaries to store
+        """
+        samples = list(samples)
+        with self._lock:
+            table = self._rules()
+            if not samples or not len(table):
+                return []
+            
+            rows = np.array([table.index.get(sample[0], -1) for sample in samples])
+            known = np.flatnonzero(rows >= 0)
+            if not len(known):
+                return []
+            
+            timestamps = np.array([samples[i][1] for i in known], dtype='datetime64[us]')
+            values = np.array([samples[i][3] for i in known], dtype=float)
+            rows = rows[known]
+            
+            # Sort by sensor, then time, so state carries forward per sensor
+            order = np.lexsort((timestamps, rows))
+            rows, timestamps, values = rows[order], timestamps[order], values[order]
+            sample_index = known[order]
+            
+            group_start = np.ones(len(rows), dtype=bool)
+            group_start[1:] = rows[1:] != rows[:-1]
+            group_end = np.ones(len(rows), dtype=bool)
+            group_end[:-1] = group_start[1:]
+            
+            low, high, band = table.low[rows], table.high[rows], table.band[rows]
+            rules = {
+                # NaN thresholds compare False, so unset rules never trigger
+                'low': (values < low, values >= low + band, low),
+                'high': (values > high, values <= high - band, high)
+            }
+            
+            sensor_ids = [table.sensor_ids[row] for row in rows.tolist()]
+            alerts = []
+            for rule, (trigger, clear, thresholds) in rules.items():
+                initial = np.array([int(self._active.get((sensor_id, rule), False)) for sensor_id in sensor_ids])
+                raised, state = self._crossings(group_start, trigger, clear, initial)
+                
+                for position in np.flatnonzero(group_end).tolist():
+                    self._active[(sensor_ids[position], rule)] = bool(state[position])
+                
+                for position in np.flatnonzero(raised).tolist():
+                    sensor = table.sensors[rows[position]]
+                    _, timestamp, type_name, value = samples[sample_index[position]]
+                    
+                    key = (sensor['id'], rule)
+                    last = self._last_raised.get(key)
+                    if last is not None and timestamp - last < self.dedup_window:
+                        continue
+                    self._last_raised[key] = timestamp
+                    
+                    alerts.append(self._build_alert(sensor, rule, type_name, value, float(thresholds[position]),
+                                                    float(band[position]), timestamp))
+            
+            return alerts
+    
+    def _dedup_key(self, sensor_id, rule, timestamp):
+        """Key shared by every process's copy of an alert; timestamp is naive UTC"""
+        bucket = (timestamp - datetime(1970, 1, 1)) // self.dedup_window
+        return f'{sensor_id}:{rule}:{bucket}'
+    
+    def _build_alert(self, sensor, rule, type_name, value, threshold, band, timestamp):
+        unit = UNITS.get(type_name, '')
+        label = type_name.replace('_', ' ')
+        overshoot = threshold - value if rule == 'low' else value - threshold
+        direction = 'dropped to' if rule == 'low' else 'rose to'
+        side = 'below' if rule == 'low' else 'above'
+        
+        return {
+            'farmer_id': sensor.get('farmer_id'),
+            'sensor_id': sensor['id'],
+            'field_id': sensor.get('field_id'),
+            # Far past the threshold is critical, otherwise a warning
+            'type': 'danger' if overshoot >= 2 * band else 'warning',
+            'rule': rule,
+            'measurement': type_name,
+            'value': value,
+            'threshold': threshold,
+            'message': f"{sensor.get('name', sensor['id'])}: {label} {direction} {value:.1f}{unit}, {side} the {threshold:g}{unit} threshold.",
+            'reading_timestamp': timestamp.isoformat(),
+            'dedup_key': self._dedup_key(sensor['id'], rule, timestamp)
+        }
+    
+    def process(self, samples):
+        """Evaluate a batch of readings and store the resulting alerts"""
+        alerts = self.evaluate(samples)
+        if not alerts:
+            return []
+        return alert_model.create_alerts(alerts)
+
+# Shared by the ingest path in this process
+alert_engine = AlertEngine()
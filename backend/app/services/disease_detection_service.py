@@ -130,9 +130,8 @@ class DiseaseDetectionService:
             ]
         }
         
-        # Create uploads directory if it doesn't exist
+        # The uploads directory is created when the first image is saved
         self.upload_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads')
-        os.makedirs(self.upload_dir, exist_ok=True)
     
     def analyze_image(self, image_data, crop_type='maize'):
         """
@@ -176,6 +175,7 @@ class DiseaseDetectionService:
                 image_path = os.path.join(self.upload_dir, filename)
                 
                 # Save the image
+                os.makedirs(self.upload_dir, exist_ok=True)
                 with open(image_path, 'wb') as f:
                     f.write(image_bytes)
                 
@@ -0,0 +1,183 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+class SubscriberLimitReached(Exception):
+    """Raised when the hub already holds its maximum number of subscribers"""
+
+class Subscription:
+    """
+    One client's stream of events for a farmer
+    
+    Events wait in a bounded buffer until the client's connection takes
+    them. Publishers never block on a slow client: when the buffer is full
+    the subscription is marked as overflowed and stops receiving events, so
+    the stream can tell the client to resync and close.
+    """
+    
+    __slots__ = ('farmer_id', 'buffer_size', 'overflowed', '_buffer', '_ready')
+    
+    def __init__(self, farmer_id, buffer_size):
+        self.farmer_id = farmer_id
+        self.buffer_size = buffer_size
+        self.overflowed = False
+        self._buffer = deque()
+        self._ready = threading.Event()
+    
+    def _offer(self, frame):
+        if self.overflowed:
+            return
+        if len(self._buffer) >= self.buffer_size:
+            self.overflowed = True
+        else:
+            self._buffer.append(frame)
+        self._ready.set()
+    
+    def wait(self, timeout):
+        """
+        Wait for events
+        
+        Returns:
+            List of SSE frames, empty if none arrived within `timeout` seconds
+        """
+        self._ready.wait(timeout)
+        # Clear before draining so a frame added meanwhile sets it again
+        self._ready.clear()
+        frames = []
+        while self._buffer:
+            frames.append(self._buffer.popleft())
+        return frames
+
+class EventHub:
+    """
+    In-process publish/subscribe hub for per-farmer events
+    
+    Each event is serialized once into an SSE frame and the same string is
+    handed to every subscriber of the farmer. A short history of recent
+    frames is kept per watched farmer so a client that reconnects with
+    Last-Event-ID gets what it missed instead of refetching everything.
+    Farmers nobody has subscribed to are skipped without serializing.
+    
+    State is per process; a client only sees events published by the worker
+    it is connected to.
+    """
+    
+    def __init__(self, buffer_size=256, history_size=100, max_subscribers=5000, max_farmers=10000):
+        self.buffer_size = buffer_size
+        self.history_size = history_size
+        self.max_subscribers = max_subscribers
+        self.max_farmers = max_farmers
+        
+        # farmer_id -> set of Subscription
+        self._subscribers = {}
+        self._subscriber_count = 0
+        # farmer_id -> {'frames': deque of (event_id, frame), 'evicted': last evicted event_id}
+        self._history = OrderedDict()
+        # Start from the clock so IDs keep increasing across restarts
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._lock = threading.Lock()
+    
+    def has_watchers(self):
+        """Whether any farmer has (or recently had) a subscriber"""
+        return bool(self._history)
+    
+    def subscribe(self, farmer_id, last_event_id=None):
+        """
+        Register a client for a farmer's events
+        
+        Args:
+            farmer_id: Farmer whose events to receive
+            last_event_id: ID of the last event the client saw; newer events
+                still in the history are queued right away
+        
+        Returns:
+            Subscription
+        
+        Raises:
+            SubscriberLimitReached: If the hub is at max_subscribers
+        """
+        with self._lock:
+            if self._subscriber_count >= self.max_subscribers:
+                raise SubscriberLimitReached(f'Limit of {self.max_subscribers} subscribers reached')
+            
+            subscription = Subscription(farmer_id, self.buffer_size)
+            self._subscribers.setdefault(farmer_id, set()).add(subscription)
+            self._subscriber_count += 1
+            
+            history = self._watch(farmer_id)
+            if last_event_id is not None:
+                if last_event_id < history['evicted']:
+                    # Some of the missed events are gone
+                    subscription.overflowed = True
+                for event_id, frame in history['frames']:
+                    if event_id > last_event_id:
+                        subscription._offer(frame)
+            return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.farmer_id)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            self._subscriber_count -= 1
+            if not subscribers:
+                # The history stays so a reconnecting client can catch up
+                del self._subscribers[subscription.farmer_id]
+    
+    def _watch(self, farmer_id):
+        """Get a farmer's history, creating it; caller holds the lock"""
+        history = self._history.get(farmer_id)
+        if history is None:
+            history = self._history[farmer_id] = {'frames': deque(), 'evicted': 0}
+            # Forget the least recently watched farmers that have no subscribers
+            for stale in list(self._history):
+                if len(self._history) <= self.max_farmers:
+                    break
+                if stale not in self._subscribers:
+                    del self._history[stale]
+        self._history.move_to_end(farmer_id)
+        return history
+    
+    def publish(self, farmer_id, event, data):
+        """
+        Send an event to a farmer's subscribers
+        
+        Args:
+            farmer_id: Farmer the event belongs to
+            event: Event name, e.g. 'readings' or 'alert'
+            data: JSON-serializable payload
+        
+        Returns:
+            The event ID, or None if nobody watches the farmer
+        """
+        if farmer_id not in self._history:
+            return None
+        payload = json.dumps(data, default=str)
+        
+        with self._lock:
+            history = self._history.get(farmer_id)
+            if history is None:
+                return None
+            
+            event_id = next(self._ids)
+            frame = f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'
+            
+            frames = history['frames']
+            if len(frames) >= self.history_size:
+                history['evicted'] = frames.popleft()[0]
+            frames.append((event_id, frame))
+            
+            for subscription in self._subscribers.get(farmer_id, ()):
+                subscription._offer(frame)
+            return event_id
+
+# Shared by the publishers and the stream route in this process
+event_hub = EventHub(
+    buffer_size=int(os.environ.get('EVENT_BUFFER_SIZE', 256)),
+    history_size=int(os.environ.get('EVENT_HISTORY_SIZE', 100)),
+    max_subscribers=int(os.environ.get('EVENT_MAX_SUBSCRIBERS', 5000))
+)
@@ -1,98 +1,321 @@
 import requests
+import copy
 import json
 import os
 import random
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+
+# Kenya's 47 counties with approximate coordinates
+KENYA_COUNTIES = {
+    (0.5167, 35.2833): "Baringo",
+    (0.6667, 37.2500): "Embu",
+    (1.6000, 40.3000): "Garissa",
+    (-0.2333, 34.7500): "Homa Bay",
+    (-0.2167, 37.7500): "Machakos",
+    (-0.5383, 39.4521): "Kilifi",
+    (-3.3623, 38.5623): "Kwale",
+    (-0.4547, 39.6583): "Mombasa",
+    (-1.2864, 36.8172): "Nairobi",
+    (-1.5167, 37.2667): "Makueni",
+    (-0.7500, 37.2833): "Kitui",
+    (-0.3031, 34.7519): "Kisumu",
+    (-0.3333, 34.9833): "Kericho",
+    (0.3667, 34.7833): "Nandi",
+    (0.5667, 35.3000): "Uasin Gishu",
+    (0.0500, 37.6500): "Meru",
+    (0.4167, 37.7000): "Tharaka-Nithi",
+    (0.2833, 37.8333): "Isiolo",
+    (1.1000, 40.0000): "Marsabit",
+    (2.9833, 39.9833): "Mandera",
+    (0.4500, 39.6500): "Wajir",
+    (0.0333, 35.7167): "Nakuru",
+    (-0.6667, 34.7667): "Kisii",
+    (-3.2167, 40.1167): "Lamu",
+    (-0.3833, 36.9500): "Nyeri",
+    (-0.5333, 37.4500): "Kirinyaga",
+    (0.4000, 35.7333): "Laikipia",
+    (1.0167, 35.0000): "West Pokot",
+    (0.8667, 34.7500): "Trans Nzoia",
+    (1.7500, 37.5833): "Samburu",
+    (0.0167, 34.5833): "Kakamega",
+    (-0.2000, 37.3000): "Murang'a",
+    (-0.8833, 35.1833): "Bomet",
+    (-0.7833, 35.5833): "Narok",
+    (-1.7667, 37.6833): "Kajiado",
+    (-0.1333, 36.0000): "Nyandarua",
+    (-0.3700, 34.5100): "Vihiga",
+    (0.0167, 34.9000): "Bungoma",
+    (-0.4717, 39.3553): "Taita-Taveta",
+    (0.2833, 34.7500): "Busia",
+    (0.1167, 35.2500): "Elgeyo-Marakwet",
+    (1.5167, 35.6000): "Turkana",
+    (-1.0333, 36.8667): "Kiambu",
+    (-0.3833, 34.5000): "Siaya",
+    (-0.8789, 36.5250): "Tana River",
+    (-1.1667, 38.3333): "Nyamira",
+    (-0.9667, 37.0833): "Migori"
+}
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres; accepts scalars or arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+class CountyIndex:
+    """
+    Nearest-county lookup by great-circle distance
+    
+    Points are stored as unit vectors, where the largest dot product is the
+    smallest great-circle distance. With only 47 counties a single matrix
+    product over all of them beats a tree, and it vectorizes over many
+    query points at once.
+    """
+    
+    def __init__(self, counties):
+        coordinates = np.array(list(counties.keys()), dtype=float)
+        self.names = list(counties.values())
+        self.latitudes = coordinates[:, 0]
+        self.longitudes = coordinates[:, 1]
+        self._vectors = self._unit_vectors(self.latitudes, self.longitudes)
+    
+    @staticmethod
+    def _unit_vectors(lats, lons):
+        lat = np.radians(lats)
+        lon = np.radians(lons)
+        return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+    
+    def locate_many(self, lats, lons, chunk_size=65536):
+        """
+        Find the nearest county for many points
+        
+        Args:
+            lats: Sequence of latitudes in degrees
+            lons: Sequence of longitudes in degrees
+            chunk_size: Points processed per matrix product, bounding memory
+        
+        Returns:
+            Tuple of (county indexes array, distances in km array)
+        """
+        lats = np.asarray(lats, dtype=float).ravel()
+        lons = np.asarray(lons, dtype=float).ravel()
+        if lats.shape != lons.shape:
+            raise ValueError('Latitudes and longitudes must have the same length')
+        
+        indexes = np.empty(len(lats), dtype=np.intp)
+        for start in range(0, len(lats), chunk_size):
+            stop = start + chunk_size
+            similarity = self._unit_vectors(lats[start:stop], lons[start:stop]) @ self._vectors.T
+            indexes[start:stop] = np.argmax(similarity, axis=1)
+        
+        distances = haversine_km(lats, lons, self.latitudes[indexes], self.longitudes[indexes])
+        return indexes, distances
+    
+    def nearest(self, lat, lon):
+        """Get (county name, distance in km) for a single point"""
+        indexes, distances = self.locate_many([lat], [lon])
+        return self.names[indexes[0]], float(distances[0])
+
+# Built once at import and shared by every ExternalWeatherService
+COUNTY_INDEX = CountyIndex(KENYA_COUNTIES)
+
+class WeatherClient:
+    """
+    Process-wide HTTP client for the weather API with a grid-cell cache
+    
+    Coordinates are snapped to a grid cell (0.1° is roughly 11 km) and the
+    upstream API is queried once per cell; the answer is cached with a TTL
+    and least-recently-used eviction. Concurrent requests for a cell that is
+    already being fetched wait for that fetch instead of issuing their own.
+    """
+    
+    def __init__(self, base_url, api_key, cell_size=0.1, ttl=600, max_entries=10000,
+                 timeout=5, pool_size=20):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.cell_size = cell_size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+    
+    def cell_for(self, lat, lon):
+        """Get the grid cell key for a coordinate"""
+        return (round(lat / self.cell_size), round(lon / self.cell_size))
+    
+    def cell_center(self, cell):
+        """Get the coordinate queried upstream for a grid cell"""
+        return (round(cell[0] * self.cell_size, 6), round(cell[1] * self.cell_size, 6))
+    
+    def _fetch(self, cell):
+        lat, lon = self.cell_center(cell)
+        response = self.session.get(
+            self.base_url,
+            params={'lat': lat, 'lon': lon, 'units': 'metric', 'appid': self.api_key},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def get(self, lat, lon):
+        """
+        Get current weather for a coordinate, served from cache when fresh
+        
+        Raises:
+            requests.RequestException: If the upstream request fails
+        """
+        cell = self.cell_for(lat, lon)
+        
+        with self._lock:
+            entry = self._cache.get(cell)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(cell)
+                return copy.deepcopy(entry[1])
+            
+            flight = self._in_flight.get(cell)
+            leader = flight is None
+            if leader:
+                flight = {'event': threading.Event(), 'result': None, 'error': None}
+                self._in_flight[cell] = flight
+        
+        if not leader:
+            flight['event'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return copy.deepcopy(flight['result'])
+        
+        try:
+            flight['result'] = self._fetch(cell)
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                if flight['error'] is None:
+                    self._cache[cell] = (time.monotonic() + self.ttl, flight['result'])
+                    self._cache.move_to_end(cell)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+                del self._in_flight[cell]
+            flight['event'].set()
+        
+        return copy.deepcopy(flight['result'])
+    
+    def clear(self):
+        """Drop all cached responses"""
+        with self._lock:
+            self._cache.clear()
+
+_weather_client = None
+_weather_client_lock = threading.Lock()
+
+def get_weather_client():
+    """Get the process-wide weather client, creating it on first use"""
+    global _weather_client
+    if _weather_client is None:
+        with _weather_client_lock:
+            if _weather_client is None:
+                _weather_client = WeatherClient(
+                    os.environ.get('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5/weather'),
+                    os.environ.get('OPENWEATHER_API_KEY', 'demo_key'),
+                    cell_size=float(os.environ.get('WEATHER_CACHE_CELL_SIZE', 0.1)),
+                    ttl=int(os.environ.get('WEATHER_CACHE_TTL', 600))
+                )
+    return _weather_client
 
 class ExternalWeatherService:
     def __init__(self):
         # In a real app, you would use an actual API key
         self.api_key = os.environ.get('OPENWEATHER_API_KEY', 'demo_key')
-        self.base_url = 'https://api.openweathermap.org/data/2.5/weather'
+        self.base_url = os.environ.get('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5/weather')
         
         # For simulation, we'll use local data
-        self.simulated = True
-        
-        # Kenya's 47 counties with approximate coordinates
-        self.kenya_counties = {
-            (0.5167, 35.2833): "Baringo",
-            (0.6667, 37.2500): "Embu",
-            (1.6000, 40.3000): "Garissa",
-            (-0.2333, 34.7500): "Homa Bay",
-            (-0.2167, 37.7500): "Machakos",
-            (-0.5383, 39.4521): "Kilifi",
-            (-3.3623, 38.5623): "Kwale",
-            (-0.4547, 39.6583): "Mombasa",
-            (-1.2864, 36.8172): "Nairobi",
-            (-1.5167, 37.2667): "Makueni",
-            (-0.7500, 37.2833): "Kitui",
-            (-0.3031, 34.7519): "Kisumu",
-            (-0.3333, 34.9833): "Kericho",
-            (0.3667, 34.7833): "Nandi",
-            (0.5667, 35.3000): "Uasin Gishu",
-            (0.0500, 37.6500): "Meru",
-            (0.4167, 37.7000): "Tharaka-Nithi",
-            (0.2833, 37.8333): "Isiolo",
-            (1.1000, 40.0000): "Marsabit",
-            (2.9833, 39.9833): "Mandera",
-            (0.4500, 39.6500): "Wajir",
-            (0.0333, 35.7167): "Nakuru",
-            (-0.6667, 34.7667): "Kisii",
-            (-3.2167, 40.1167): "Lamu",
-            (-0.3833, 36.9500): "Nyeri",
-            (-0.5333, 37.4500): "Kirinyaga",
-            (0.4000, 35.7333): "Laikipia",
-            (1.0167, 35.0000): "West Pokot",
-            (0.8667, 34.7500): "Trans Nzoia",
-            (1.7500, 37.5833): "Samburu",
-            (0.0167, 34.5833): "Kakamega",
-            (-0.2000, 37.3000): "Murang'a",
-            (-0.8833, 35.1833): "Bomet",
-            (-0.7833, 35.5833): "Narok",
-            (-1.7667, 37.6833): "Kajiado",
-            (-0.1333, 36.0000): "Nyandarua",
-            (-0.3700, 34.5100): "Vihiga",
-            (0.0167, 34.9000): "Bungoma",
-            (-0.4717, 39.3553): "Taita-Taveta",
-            (0.2833, 34.7500): "Busia",
-            (0.1167, 35.2500): "Elgeyo-Marakwet",
-            (1.5167, 35.6000): "Turkana",
-            (-1.0333, 36.8667): "Kiambu",
-            (-0.3833, 34.5000): "Siaya",
-            (-0.8789, 36.5250): "Tana River",
-            (-1.1667, 38.3333): "Nyamira",
-            (-0.9667, 37.0833): "Migori"
-        }
+        self.simulated = os.environ.get('WEATHER_SIMULATED', 'True') == 'True'
+        
+        # Kenya's 47 counties with approximate coordinates (shared, built once)
+        self.kenya_counties = KENYA_COUNTIES
     
     def get_weather_by_coordinates(self, lat, lon):
         """Get current weather by coordinates"""
         if self.simulated:
             return self._get_simulated_weather(lat, lon)
         
-        # In a real app, you would make an actual API call
-        params = {
-            'lat': lat,
-            'lon': lon,
-            'units': 'metric',
-            'appid': self.api_key
-        }
+        # Shared, pooled and cached per grid cell
+        return get_weather_client().get(lat, lon)
+    
+    def get_weather_many(self, coordinates, max_workers=8):
+        """
+        Get current weather for many coordinates, one lookup per grid cell
         
-        response = requests.get(self.base_url, params=params)
-        return response.json()
+        Args:
+            coordinates: Sequence of (lat, lon) pairs
+            max_workers: Maximum number of concurrent upstream requests
+        
+        Returns:
+            List aligned with the input, each item holding 'lat', 'lon' and
+            either 'weather' or 'error'
+        """
+        client = get_weather_client()
+        
+        # Group input positions by grid cell so each cell is fetched once
+        cells = OrderedDict()
+        for i, (lat, lon) in enumerate(coordinates):
+            cells.setdefault(client.cell_for(lat, lon), []).append(i)
+        
+        def fetch(positions):
+            lat, lon = coordinates[positions[0]]
+            try:
+                return {'weather': self.get_weather_by_coordinates(lat, lon)}
+            except requests.RequestException as e:
+                return {'error': f'Weather provider unavailable: {e}'}
+        
+        if self.simulated or len(cells) <= 1:
+            cell_results = [fetch(positions) for positions in cells.values()]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(cells))) as executor:
+                cell_results = list(executor.map(fetch, cells.values()))
+        
+        results = [None] * len(coordinates)
+        for positions, cell_result in zip(cells.values(), cell_results):
+            for i in positions:
+                lat, lon = coordinates[i]
+                results[i] = {'lat': lat, 'lon': lon, **cell_result}
+        
+        return results
     
     def _get_location_name(self, lat, lon):
         """Get the name of the closest county based on coordinates"""
-        closest_county = "Nairobi"  # Default to Nairobi
-        closest_distance = float('inf')
+        return COUNTY_INDEX.nearest(lat, lon)[0]
+    
+    def locate_many(self, lats, lons):
+        """
+        Get the closest county for many coordinates in one vectorized pass
         
-        for coords, name in self.kenya_counties.items():
-            # Simple distance calculation (not accounting for Earth's curvature)
-            distance = ((lat - coords[0])**2 + (lon - coords[1])**2)**0.5
-            if distance < closest_distance:
-                closest_distance = distance
-                closest_county = name
+        Args:
+            lats: Sequence of latitudes
+            lons: Sequence of longitudes
         
-        return closest_county
+        Returns:
+            List of county names, aligned with the input
+        """
+        indexes, _ = COUNTY_INDEX.locate_many(lats, lons)
+        return [COUNTY_INDEX.names[i] for i in indexes.tolist()]
     
     def _get_simulated_weather(self, lat, lon):
         """Generate simulated weather data"""
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 import random
 import numpy as np
+from app.utils.reading_series import latest_value
 
 class IrrigationService:
     def __init__(self):
@@ -74,7 +75,7 @@ class IrrigationService:
         Generate an irrigation schedule based on soil moisture readings and weather forecast
         
         Args:
-            soil_moisture_readings: List of soil moisture readings
+            soil_moisture_readings: ReadingSeries or list of soil moisture readings
             weather_forecast: List of weather forecast data
             crop_type: Type of crop
             area_square_meters: Area of the field in square meters
@@ -83,7 +84,7 @@ class IrrigationService:
             Dictionary with irrigation schedule information
         """
         # Get current soil moisture (from most recent reading)
-        current_moisture = soil_moisture_readings[-1]['data'].get('soil_moisture', 50) if soil_moisture_readings else 50
+        current_moisture = latest_value(soil_moisture_readings, 'soil_moisture', 50)
         
         # Calculate base irrigation need
         irrigation_need = self.calculate_irrigation_need(current_moisture, crop_type)
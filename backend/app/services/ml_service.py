@@ -1,24 +1,93 @@
 import numpy as np
 import pickle
 import os
+import hashlib
+import threading
+import time
 from datetime import datetime
 import random
-from sklearn.linear_model import LinearRegression
+
+class ModelRegistry:
+    """
+    Keeps unpickled models resident in memory, keyed by file path
+    
+    A model is loaded once and reused until its file changes. The file is
+    stat'ed at most once per check interval; when its mtime or size moves,
+    the content hash decides whether the model really needs reloading.
+    """
+    
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._models = {}
+        self._lock = threading.Lock()
+    
+    def _file_hash(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _load(self, path):
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        return {
+            'model': pickle.loads(content),
+            'signature': (stat.st_mtime_ns, stat.st_size),
+            'hash': hashlib.sha256(content).hexdigest(),
+            'checked_at': time.monotonic()
+        }
+    
+    def get(self, path):
+        """Get the model stored at path, loading or reloading it if needed"""
+        entry = self._models.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry['checked_at'] < self.check_interval:
+            return entry['model']
+        
+        with self._lock:
+            entry = self._models.get(path)
+            if entry is None:
+                entry = self._load(path)
+                self._models[path] = entry
+                return entry['model']
+            
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature != entry['signature']:
+                # Only unpickle again if the content actually changed
+                if self._file_hash(path) != entry['hash']:
+                    entry = self._load(path)
+                    self._models[path] = entry
+                else:
+                    entry['signature'] = signature
+            entry['checked_at'] = now
+            return entry['model']
+    
+    def invalidate(self, path=None):
+        """Drop one cached model, or all of them"""
+        with self._lock:
+            if path is None:
+                self._models.clear()
+            else:
+                self._models.pop(path, None)
+
+# Shared by all MLService instances in the process
+model_registry = ModelRegistry()
 
 class MLService:
     def __init__(self):
         self.models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ml', 'models')
-        os.makedirs(self.models_dir, exist_ok=True)
         
-        # Initialize model paths
+        # Initialize model paths; missing models are created on first use
         self.yield_model_path = os.path.join(self.models_dir, 'yield_prediction_model.pkl')
-        
-        # Create models if they don't exist
-        if not os.path.exists(self.yield_model_path):
-            self._create_yield_prediction_model()
     
     def _create_yield_prediction_model(self):
         """Create and save a simple yield prediction model"""
+        # scikit-learn is slow to import, so only pay for it when training
+        from sklearn.linear_model import LinearRegression
+        
         print("Creating yield prediction model...")
         
         # Generate synthetic training data
@@ -61,23 +130,23 @@ class MLService:
         model.fit(X, y)
         
         # Save the model
+        os.makedirs(self.models_dir, exist_ok=True)
         with open(self.yield_model_path, 'wb') as f:
             pickle.dump(model, f)
         
         print("Yield prediction model created and saved.")
+        model_registry.invalidate(self.yield_model_path)
+    
+    def _get_yield_model(self):
+        """Get the resident yield model, creating it if the file is missing"""
+        if not os.path.exists(self.yield_model_path):
+            self._create_yield_prediction_model()
+        return model_registry.get(self.yield_model_path)
     
     def predict_yield(self, features):
         """Predict yield using the trained model"""
         try:
-            # Load the model
-            if os.path.exists(self.yield_model_path):
-                with open(self.yield_model_path, 'rb') as f:
-                    model = pickle.load(f)
-            else:
-                # Fallback if model doesn't exist
-                self._create_yield_prediction_model()
-                with open(self.yield_model_path, 'rb') as f:
-                    model = pickle.load(f)
+            model = self._get_yield_model()
             
             # Make prediction
             prediction = model.predict(np.array([features]))
@@ -88,6 +157,29 @@ class MLService:
             # Fallback to simple estimation if model fails
             return self._simple_yield_estimate(features)
     
+    def predict_yield_batch(self, features_matrix):
+        """
+        Predict yields for many feature rows in one model call
+        
+        Args:
+            features_matrix: Array-like of shape (n_samples, 5) with rows of
+                [avg_temperature, total_rainfall, avg_soil_moisture,
+                sunlight_hours, fertilizer]
+        
+        Returns:
+            List of predicted yields, one per row
+        """
+        features_matrix = np.asarray(features_matrix, dtype=float)
+        if features_matrix.size == 0:
+            return []
+        
+        try:
+            model = self._get_yield_model()
+            return model.predict(features_matrix).astype(float).tolist()
+        except Exception as e:
+            print(f"Error predicting yield batch: {e}")
+            return [self._simple_yield_estimate(features) for features in features_matrix.tolist()]
+    
     def _simple_yield_estimate(self, features):
         """Simple rule-based estimation as fallback"""
         # Extract features
@@ -0,0 +1,284 @@
+import heapq
+import itertools
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP sessions reused across messages
+    
+    Opening a session costs a TCP connect, STARTTLS and a login, so idle
+    sessions are kept and handed out again. A session that sat idle for a
+    while is probed with NOOP before reuse and replaced if it went stale.
+    """
+    
+    def __init__(self, host, port, username=None, password=None, use_tls=True,
+                 max_idle_connections=4, timeout=10, probe_after=5, max_idle_time=60):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_idle_connections = max_idle_connections
+        self.timeout = timeout
+        self.probe_after = probe_after
+        self.max_idle_time = max_idle_time
+        
+        # Stack of (session, last_used); the most recently used session is reused first
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+    
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+    
+    def _is_alive(self, server):
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """Get a ready-to-use SMTP session"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                server, last_used = self._idle.pop()
+            
+            idle_time = time.monotonic() - last_used
+            if idle_time > self.max_idle_time or (idle_time > self.probe_after and not self._is_alive(server)):
+                self._close(server)
+                continue
+            return server
+        
+        return self._open()
+    
+    def release(self, server):
+        """Return a healthy session to the pool"""
+        with self._lock:
+            if len(self._idle) < self.max_idle_connections:
+                self._idle.append((server, time.monotonic()))
+                return
+        self._close(server)
+    
+    def discard(self, server):
+        """Drop a session that failed mid-use"""
+        try:
+            server.close()
+        except Exception:
+            pass
+    
+    @contextmanager
+    def session(self):
+        """
+        Acquire a session for a `with` block and always give it back
+        
+        The session returns to the pool when the block succeeds or the
+        server merely rejected a message; on any other error (a dropped
+        connection, a socket timeout, a bug) its state is unknown and it is
+        discarded.
+        """
+        server = self.acquire()
+        try:
+            yield server
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            self.release(server)
+            raise
+        except BaseException:
+            self.discard(server)
+            raise
+        self.release(server)
+    
+    def close_all(self):
+        """Close every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            self._close(server)
+
+class NotificationDispatcher:
+    """
+    Background queue that delivers notifications outside the request
+    
+    Jobs are handed to a pool of worker threads. Each worker drains up to
+    batch_size queued jobs at once and passes them to the deliver callback
+    grouped by channel, so a burst of emails shares one SMTP session.
+    Failed jobs are retried with exponential backoff.
+    
+    The deliver callback receives (channel, jobs) and returns a dictionary
+    mapping the ID of every failed job to its exception. It should set
+    job['sent'] = True as each job goes out: if it raises partway through a
+    batch, only the jobs not marked as sent are retried.
+    """
+    
+    def __init__(self, deliver, on_failure=None, workers=4, batch_size=20,
+                 max_retries=3, backoff_base=2.0, max_queue_size=10000, max_tracked=10000):
+        self.deliver = deliver
+        self.on_failure = on_failure
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_tracked = max_tracked
+        
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._statuses = OrderedDict()
+        self._status_lock = threading.Lock()
+        # Jobs not yet sent or given up on, including those waiting to retry
+        self._pending = 0
+        
+        # Jobs waiting for their retry time: heap of (due, sequence, job)
+        self._delayed = []
+        self._delayed_cond = threading.Condition()
+        self._sequence = itertools.count()
+        
+        self._threads = []
+        self._start_lock = threading.Lock()
+    
+    def _start(self):
+        """Start the worker and retry threads on first use"""
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'notification-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._schedule_retries, name='notification-retry', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def _set_status(self, job_id, status, error=None):
+        with self._status_lock:
+            if status == 'queued':
+                self._pending += 1
+            elif status in ('sent', 'failed'):
+                self._pending -= 1
+            entry = self._statuses.setdefault(job_id, {'id': job_id})
+            entry['status'] = status
+            if error is not None:
+                entry['error'] = str(error)
+            self._statuses.move_to_end(job_id)
+            while len(self._statuses) > self.max_tracked:
+                self._statuses.popitem(last=False)
+    
+    def enqueue(self, channel, recipient, subject, body, block=False, timeout=None):
+        """
+        Queue a notification for delivery
+        
+        Args:
+            block: Wait for room in the queue instead of failing when full,
+                so bulk producers are slowed down to the delivery rate
+            timeout: Maximum time to wait when blocking
+        
+        Returns:
+            The notification ID, usable with get_status
+        
+        Raises:
+            queue.Full: If the queue is at capacity
+        """
+        self._start()
+        job = {
+            'id': uuid.uuid4().hex,
+            'channel': channel,
+            'recipient': recipient,
+            'subject': subject,
+            'body': body,
+            'attempts': 0
+        }
+        self._set_status(job['id'], 'queued')
+        try:
+            self._queue.put(job, block=block, timeout=timeout)
+        except queue.Full:
+            self._set_status(job['id'], 'failed', 'Notification queue is full')
+            raise
+        return job['id']
+    
+    def get_status(self, job_id):
+        """Get the delivery status of a queued notification, or None"""
+        with self._status_lock:
+            entry = self._statuses.get(job_id)
+            return dict(entry) if entry else None
+    
+    def _next_batch(self):
+        """Block for one job, then take whatever else is already queued"""
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            
+            by_channel = OrderedDict()
+            for job in batch:
+                by_channel.setdefault(job['channel'], []).append(job)
+            
+            for channel, jobs in by_channel.items():
+                try:
+                    failures = self.deliver(channel, jobs) or {}
+                except Exception as e:
+                    # Last resort; jobs already sent must not be sent twice
+                    failures = {job['id']: e for job in jobs if not job.get('sent')}
+                
+                for job in jobs:
+                    if job['id'] in failures:
+                        self._retry_or_fail(job, failures[job['id']])
+                    else:
+                        self._set_status(job['id'], 'sent')
+    
+    def _retry_or_fail(self, job, error):
+        job['attempts'] += 1
+        if job['attempts'] > self.max_retries:
+            print(f"Giving up on {job['channel']} notification to {job['recipient']}: {error}")
+            self._set_status(job['id'], 'failed', error)
+            if self.on_failure:
+                self.on_failure(job, error)
+            return
+        
+        delay = self.backoff_base ** (job['attempts'] - 1)
+        self._set_status(job['id'], 'retrying', error)
+        with self._delayed_cond:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._sequence), job))
+            self._delayed_cond.notify()
+    
+    def _schedule_retries(self):
+        """Move delayed jobs back onto the queue once their backoff expires"""
+        while True:
+            with self._delayed_cond:
+                while not self._delayed or self._delayed[0][0] > time.monotonic():
+                    timeout = self._delayed[0][0] - time.monotonic() if self._delayed else None
+                    self._delayed_cond.wait(timeout)
+                _, _, job = heapq.heappop(self._delayed)
+            self._queue.put(job)
+    
+    def join(self, timeout=None):
+        """Wait until every queued job has been processed (for tests/shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._status_lock:
+                if self._pending == 0:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
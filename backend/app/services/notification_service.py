@@ -1,37 +1,154 @@
 import json
 import os
-import smtplib
+import queue
+import sqlite3
+import string
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
+from app.services.notification_dispatcher import NotificationDispatcher, SMTPConnectionPool
+
+class NotificationLog:
+    """
+    Append-only notification history stored in SQLite
+    
+    The database runs in WAL mode so appends never rewrite earlier entries
+    and readers don't block the writer. IDs come from an AUTOINCREMENT key,
+    so they stay unique and monotonic across threads and processes.
+    """
+    
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        self._local = threading.local()
+        
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS notifications ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'type TEXT NOT NULL, '
+            'recipient TEXT NOT NULL, '
+            'subject TEXT, '
+            'message TEXT, '
+            'timestamp TEXT NOT NULL, '
+            'status TEXT NOT NULL)'
+        )
+        conn.commit()
+        
+        if legacy_json_path and os.path.exists(legacy_json_path):
+            self._import_legacy(legacy_json_path)
+    
+    def _connect(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+    
+    def _import_legacy(self, json_path):
+        """Copy notifications from the old JSON file into an empty log"""
+        conn = self._connect()
+        with conn:
+            # BEGIN IMMEDIATE so only one process performs the import
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('SELECT 1 FROM notifications LIMIT 1').fetchone():
+                return
+            
+            try:
+                with open(json_path, 'r') as f:
+                    notifications = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error importing notifications: {e}")
+                return
+            
+            conn.executemany(
+                'INSERT INTO notifications (type, recipient, subject, message, timestamp, status) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (n.get('type'), n.get('recipient'), n.get('subject'), n.get('message'),
+                     n.get('timestamp'), n.get('status', 'sent'))
+                    for n in sorted(notifications, key=lambda n: n.get('id', 0))
+                ]
+            )
+    
+    def append(self, type, recipient, subject, message, status='sent'):
+        """Append a notification and return it with its assigned ID"""
+        notification = {
+            'type': type,
+            'recipient': recipient,
+            'subject': subject,
+            'message': message,
+            'timestamp': datetime.now().isoformat(),
+            'status': status
+        }
+        
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO notifications (type, recipient, subject, message, timestamp, status) '
+                'VALUES (:type, :recipient, :subject, :message, :timestamp, :status)',
+                notification
+            )
+        
+        return {'id': cursor.lastrowid, **notification}
+    
+    def tail(self, limit=20):
+        """Get the most recent notifications, newest first"""
+        rows = self._connect().execute(
+            'SELECT id, type, recipient, subject, message, timestamp, status '
+            'FROM notifications ORDER BY id DESC LIMIT ?',
+            (limit,)
+        ).fetchall()
+        return [dict(row) for row in rows]
 
 class NotificationService:
     def __init__(self):
-        # In a real app, you would fetch these from environment variables or config
-        self.email_enabled = False  # Set to True when email credentials are available
+        # Delivery is simulated unless enabled through the environment
+        self.email_enabled = os.environ.get('EMAIL_ENABLED', 'False') == 'True'
         self.sms_enabled = False    # Set to True when SMS credentials are available
         
         # Email settings
-        self.email_sender = "farmsystem@example.com"
-        self.email_password = "password"  # Would use environment variable in production
-        self.smtp_server = "smtp.example.com"
-        self.smtp_port = 587
+        self.email_sender = os.environ.get('EMAIL_SENDER', "farmsystem@example.com")
+        self.email_password = os.environ.get('EMAIL_PASSWORD', "password")
+        self.smtp_server = os.environ.get('SMTP_SERVER', "smtp.example.com")
+        self.smtp_port = int(os.environ.get('SMTP_PORT', 587))
+        self.smtp_use_tls = os.environ.get('SMTP_USE_TLS', 'True') == 'True'
+        
+        # Authenticated SMTP sessions shared by all sends
+        self.smtp_pool = SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            username=self.email_sender if self.email_password else None,
+            password=self.email_password,
+            use_tls=self.smtp_use_tls
+        )
+        
+        # Background delivery used by the enqueue_* methods
+        self.dispatcher = NotificationDispatcher(
+            self._deliver_batch,
+            on_failure=self._record_failure,
+            workers=int(os.environ.get('NOTIFICATION_WORKERS', 4))
+        )
         
         # SMS settings (using a hypothetical SMS gateway)
         self.sms_api_key = "sms-api-key"  # Would use environment variable in production
         self.sms_sender = "FARMSYS"
         
-        # For simulation, we'll store notifications in a file
+        # For simulation, we'll store notifications in a local log
         self.notifications_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data')
-        self.notifications_file = os.path.join(self.notifications_dir, 'notifications.json')
+        self.notifications_file = os.path.join(self.notifications_dir, 'notifications.db')
         
         # Create directory if it doesn't exist
         os.makedirs(self.notifications_dir, exist_ok=True)
         
-        # Create notifications file if it doesn't exist
-        if not os.path.exists(self.notifications_file):
-            with open(self.notifications_file, 'w') as f:
-                json.dump([], f)
+        # Entries from the old notifications.json are imported on first use
+        self.notification_log = NotificationLog(
+            self.notifications_file,
+            legacy_json_path=os.path.join(self.notifications_dir, 'notifications.json')
+        )
     
     def send_email(self, recipient_email, subject, body):
         """Send an email notification"""
@@ -42,25 +159,25 @@ class NotificationService:
             return self._store_notification('email', recipient_email, subject, body)
         
         try:
-            message = MIMEMultipart()
-            message['From'] = self.email_sender
-            message['To'] = recipient_email
-            message['Subject'] = subject
-            
-            # Attach the body of the message
-            message.attach(MIMEText(body, 'plain'))
-            
-            # Connect to the SMTP server
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()  # Secure the connection
-                server.login(self.email_sender, self.email_password)
-                server.send_message(message)
+            with self.smtp_pool.session() as server:
+                server.send_message(self._build_email(recipient_email, subject, body))
             
             return self._store_notification('email', recipient_email, subject, body)
         except Exception as e:
             print(f"Error sending email: {e}")
             return False
     
+    def _build_email(self, recipient_email, subject, body):
+        """Build the MIME message for an email notification"""
+        message = MIMEMultipart()
+        message['From'] = self.email_sender
+        message['To'] = recipient_email
+        message['Subject'] = subject
+        
+        # Attach the body of the message
+        message.attach(MIMEText(body, 'plain'))
+        return message
+    
     def send_sms(self, phone_number, message):
         """Send an SMS notification"""
         if not self.sms_enabled:
@@ -78,29 +195,137 @@ class NotificationService:
             print(f"Error sending SMS: {e}")
             return False
     
-    def _store_notification(self, type, recipient, subject, message):
-        """Store notification in the simulated database"""
-        try:
-            # Read existing notifications
-            with open(self.notifications_file, 'r') as f:
-                notifications = json.load(f)
+    def enqueue_email(self, recipient_email, subject, body):
+        """Queue an email for background delivery and return its notification ID"""
+        return self.dispatcher.enqueue('email', recipient_email, subject, body)
+    
+    def enqueue_sms(self, phone_number, message):
+        """Queue an SMS for background delivery and return its notification ID"""
+        return self.dispatcher.enqueue('sms', phone_number, 'Alert', message)
+    
+    def broadcast(self, channel, recipients, subject, message_template, enqueue_timeout=30):
+        """
+        Queue one notification for each distinct recipient
+        
+        Args:
+            channel: 'email' or 'sms'
+            recipients: Iterable of addresses (email or phone), or of
+                dictionaries with an 'email'/'phone' key plus any fields used
+                by the template; consumed lazily
+            subject: Subject line (ignored for SMS)
+            message_template: Message text, optionally with str.format
+                placeholders such as {name} filled from each recipient
+            enqueue_timeout: Seconds to wait for room in a full queue
+        
+        Returns:
+            Generator of one result dictionary per recipient, then a summary
+            dictionary
+        
+        Raises:
+            ValueError: If the template is malformed (e.g. an unmatched brace);
+                raised here, before anything is queued
+        """
+        # Parse the template once; without placeholders it is rendered once too
+        fields = {field for _, field, _, _ in string.Formatter().parse(message_template) if field}
+        return self._broadcast(channel, recipients, subject, message_template, fields, enqueue_timeout)
+    
+    def _broadcast(self, channel, recipients, subject, message_template, fields, enqueue_timeout):
+        address_key = 'email' if channel == 'email' else 'phone'
+        
+        seen = set()
+        counts = {'queued': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+        
+        for recipient in recipients:
+            if isinstance(recipient, dict):
+                address = recipient.get(address_key)
+                context = recipient
+            else:
+                address = recipient
+                context = {}
             
-            # Add new notification
-            notification = {
-                'id': len(notifications) + 1,
-                'type': type,
-                'recipient': recipient,
-                'subject': subject,
-                'message': message,
-                'timestamp': datetime.now().isoformat(),
-                'status': 'sent'
-            }
-            notifications.append(notification)
+            address = str(address).strip() if address else ''
+            if not address:
+                counts['invalid'] += 1
+                yield {'recipient': None, 'status': 'invalid'}
+                continue
             
-            # Write back to file
-            with open(self.notifications_file, 'w') as f:
-                json.dump(notifications, f, indent=2)
+            dedupe_key = address.lower() if channel == 'email' else address
+            if dedupe_key in seen:
+                counts['duplicate'] += 1
+                continue
+            seen.add(dedupe_key)
+            
+            if fields:
+                try:
+                    body = message_template.format_map({field: context.get(field, '') for field in fields})
+                except (ValueError, KeyError, IndexError, AttributeError):
+                    body = message_template
+            else:
+                body = message_template
+            
+            try:
+                notification_id = self.dispatcher.enqueue(
+                    channel, address, subject if channel == 'email' else 'Alert', body,
+                    block=True, timeout=enqueue_timeout
+                )
+            except queue.Full:
+                counts['failed'] += 1
+                yield {'recipient': address, 'status': 'failed', 'error': 'Notification queue is full'}
+                continue
+            
+            counts['queued'] += 1
+            yield {'recipient': address, 'status': 'queued', 'notification_id': notification_id}
+        
+        yield {'summary': counts}
+    
+    def get_delivery_status(self, notification_id):
+        """Get the status of a queued notification, or None if unknown"""
+        return self.dispatcher.get_status(notification_id)
+    
+    def _deliver_batch(self, channel, jobs):
+        """Deliver a batch of queued notifications; returns failures by job ID"""
+        failures = {}
+        
+        if channel == 'sms':
+            for job in jobs:
+                if self.send_sms(job['recipient'], job['body']):
+                    job['sent'] = True
+                else:
+                    failures[job['id']] = RuntimeError('SMS delivery failed')
+            return failures
+        
+        if not self.email_enabled:
+            for job in jobs:
+                self.send_email(job['recipient'], job['subject'], job['body'])
+                job['sent'] = True
+            return failures
+        
+        # Each send hands the session straight back, so the whole batch
+        # reuses one pooled session unless it breaks
+        for job in jobs:
+            try:
+                # Built first, so a bad header doesn't cost the session
+                message = self._build_email(job['recipient'], job['subject'], job['body'])
+                with self.smtp_pool.session() as server:
+                    server.send_message(message)
+            except Exception as e:
+                # Only this job failed; the ones already sent must not go out again
+                failures[job['id']] = e
+                continue
             
+            job['sent'] = True
+            self._store_notification('email', job['recipient'], job['subject'], job['body'])
+        
+        return failures
+    
+    def _record_failure(self, job, error):
+        """Log a notification that could not be delivered after all retries"""
+        self._store_notification(job['channel'], job['recipient'], job['subject'], job['body'], status='failed')
+    
+    def _store_notification(self, type, recipient, subject, message, status='sent'):
+        """Store notification in the simulated database"""
+        try:
+            self.notification_log.append(type, recipient, subject, message, status=status)
             return True
         except Exception as e:
             print(f"Error storing notification: {e}")
@@ -109,12 +334,7 @@ class NotificationService:
     def get_notifications(self, limit=20):
         """Get recent notifications"""
         try:
-            with open(self.notifications_file, 'r') as f:
-                notifications = json.load(f)
-            
-            # Sort by timestamp descending and limit
-            notifications.sort(key=lambda x: x['timestamp'], reverse=True)
-            return notifications[:limit]
+            return self.notification_log.tail(limit)
         except Exception as e:
             print(f"Error getting notifications: {e}")
             return []
\ No newline at end of file
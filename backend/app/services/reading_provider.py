@@ -0,0 +1,205 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from app.utils.reading_series import ReadingSeries
+
+# Measurement name and unit per sensor type
+SENSOR_UNITS = {
+    'soil_moisture': '%',
+    'temperature': '°C',
+    'humidity': '%',
+    'unknown': 'units'
+}
+
+class SimulatedReadingProvider:
+    """
+    Hourly simulated readings shared by every route that needs them
+    
+    Each sensor keeps a window of hourly values as NumPy arrays. A value is
+    generated once for its (sensor_id, hour) and reused by every caller
+    until it falls out of the window; when the hour rolls over only the new
+    hours are generated and the oldest ones are dropped. The list-of-dicts
+    form is built once per sensor, window length and hour, so callers must
+    treat returned readings as read-only.
+    
+    At most `max_hours` hours are kept per sensor; longer requests are
+    capped to that. Both caches are LRUs bounded by `max_sensors` and
+    `max_readings`, since sensor IDs come straight from query strings.
+    """
+    
+    def __init__(self, max_hours=168, max_sensors=1024, max_readings=256, seed=None):
+        self.max_hours = max_hours
+        self.max_sensors = max_sensors
+        self.max_readings = max_readings
+        self.rng = np.random.default_rng(seed)
+        
+        # sensor_id -> {'type', 'first_hour', 'values'}, least recently used first
+        self._series = OrderedDict()
+        # (sensor_id, hours) -> readings list for self._current_hour, least recently used first
+        self._readings = OrderedDict()
+        self._current_hour = None
+        self._lock = threading.Lock()
+    
+    def _resolve_type(self, sensor_id):
+        """Infer the measurement type from the sensor ID"""
+        if 'soil_moisture' in sensor_id or 'moisture' in sensor_id:
+            return 'soil_moisture'
+        elif 'temp' in sensor_id:
+            return 'temperature'
+        elif 'humid' in sensor_id:
+            return 'humidity'
+        return 'unknown'
+    
+    def _generate(self, type_name, hours):
+        """Generate values for an array of hour numbers (hours since the epoch)"""
+        n = len(hours)
+        if type_name == 'soil_moisture':
+            values = self.rng.uniform(30, 70, n)
+        elif type_name == 'temperature':
+            # Daily temperature cycle, peaking at 2 PM local time
+            hour_of_day = np.array([datetime.fromtimestamp(hour * 3600).hour for hour in hours.tolist()])
+            base_temp = 22 + 5 * (1 - np.abs(hour_of_day - 14) / 14)
+            values = base_temp + self.rng.uniform(-2, 2, n)
+        elif type_name == 'humidity':
+            values = self.rng.uniform(50, 80, n)
+        else:
+            values = self.rng.uniform(0, 100, n)
+        return np.round(values, 1)
+    
+    def _roll_over(self, current_hour):
+        """Drop the materialized readings once a new hour starts"""
+        if current_hour != self._current_hour:
+            self._current_hour = current_hour
+            self._readings.clear()
+    
+    def _window(self, sensor_id, hours, current_hour):
+        """Get (series, first_hour) for the hours ending at current_hour; caller holds the lock"""
+        series = self._series.get(sensor_id)
+        if series is None:
+            type_name = self._resolve_type(sensor_id)
+            series = {'type': type_name, 'first_hour': current_hour + 1, 'values': np.empty(0)}
+            self._series[sensor_id] = series
+            if len(self._series) > self.max_sensors:
+                self._series.popitem(last=False)
+        else:
+            self._series.move_to_end(sensor_id)
+        
+        oldest = current_hour - self.max_hours + 1
+        first_hour = max(current_hour - hours + 1, oldest)
+        cached_first, values = series['first_hour'], series['values']
+        cached_last = cached_first + len(values) - 1
+        
+        if not len(values) or cached_last > current_hour or cached_last < oldest:
+            # Nothing reusable (or the clock went backwards); start over
+            cached_first, cached_last, values = current_hour + 1, current_hour, np.empty(0)
+        elif cached_first < oldest:
+            # Evict hours that fell out of the window
+            values = values[oldest - cached_first:]
+            cached_first = oldest
+        
+        parts = [values]
+        if first_hour < cached_first:
+            # This caller wants older hours than are cached
+            parts.insert(0, self._generate(series['type'], np.arange(first_hour, cached_first)))
+            cached_first = first_hour
+        if cached_last < current_hour:
+            # Hours that started since the last call
+            parts.append(self._generate(series['type'], np.arange(cached_last + 1, current_hour + 1)))
+        
+        if len(parts) > 1:
+            values = np.concatenate(parts)
+        values.setflags(write=False)
+        series['first_hour'], series['values'] = cached_first, values
+        return series, first_hour
+    
+    def get_arrays(self, sensor_id, hours=48):
+        """
+        Get the last `hours` hourly readings of a sensor as arrays
+        
+        At most max_hours (a week by default) are returned; asking for more
+        gets the whole window.
+        
+        Returns:
+            Tuple of (timestamps, values): epoch seconds of each hour start
+            (int64) and the readings (float64), oldest first. Both arrays are
+            read-only and shared with other callers.
+        """
+        current_hour = int(datetime.now().timestamp()) // 3600
+        with self._lock:
+            self._roll_over(current_hour)
+            series, first_hour = self._window(sensor_id, hours, current_hour)
+            values = series['values'][first_hour - series['first_hour']:]
+        
+        timestamps = np.arange(first_hour, current_hour + 1, dtype=np.int64) * 3600
+        timestamps.setflags(write=False)
+        return timestamps, values
+    
+    def get_series(self, sensor_id, hours=48):
+        """Get the last `hours` (at most max_hours) hourly readings of a sensor as a ReadingSeries"""
+        timestamps, values = self.get_arrays(sensor_id, hours)
+        type_name = self.get_type(sensor_id)
+        return ReadingSeries(sensor_id, type_name, timestamps, values, SENSOR_UNITS[type_name])
+    
+    def get_type(self, sensor_id):
+        """Get the measurement type the provider generates for a sensor"""
+        with self._lock:
+            series = self._series.get(sensor_id)
+            if series is not None:
+                return series['type']
+        return self._resolve_type(sensor_id)
+    
+    def get_latest(self, sensor_id, type_name=None, default=None):
+        """
+        Get the most recent reading value of a sensor
+        
+        Args:
+            type_name: Expected measurement type; if the sensor reports a
+                different one, `default` is returned instead
+        """
+        if type_name is not None and self.get_type(sensor_id) != type_name:
+            return default
+        _, values = self.get_arrays(sensor_id, 1)
+        return float(values[-1]) if len(values) else default
+    
+    def get_readings(self, sensor_id, hours=48):
+        """
+        Get the last `hours` hourly readings in the API list-of-dicts format
+        
+        The list is built once per hour and shared, so it must not be modified.
+        Like get_arrays, at most max_hours readings are returned.
+        """
+        # Longer windows all give the same readings; share one cache entry
+        hours = min(hours, self.max_hours)
+        current_hour = int(datetime.now().timestamp()) // 3600
+        with self._lock:
+            self._roll_over(current_hour)
+            readings = self._readings.get((sensor_id, hours))
+            if readings is not None:
+                self._readings.move_to_end((sensor_id, hours))
+                return readings
+        
+        timestamps, values = self.get_arrays(sensor_id, hours)
+        type_name = self.get_type(sensor_id)
+        unit = SENSOR_UNITS[type_name]
+        readings = [
+            {
+                'sensor_id': sensor_id,
+                'timestamp': datetime.fromtimestamp(timestamp).isoformat(),
+                'data': {
+                    type_name: value,
+                    'unit': unit
+                }
+            }
+            for timestamp, value in zip(timestamps.tolist(), values.tolist())
+        ]
+        
+        with self._lock:
+            if self._current_hour == current_hour:
+                readings = self._readings.setdefault((sensor_id, hours), readings)
+                if len(self._readings) > self.max_readings:
+                    self._readings.popitem(last=False)
+        return readings
+
+# Shared by all routes in the process
+reading_provider = SimulatedReadingProvider()
@@ -1,6 +1,8 @@
 from datetime import datetime
 from app.services.ai_service import AgriculturalAI
 from app.models import recommendation as rec_model
+from app.utils.reading_series import ReadingSeries
+from app.utils.window_stats import SlidingWindowStats
 
 class RecommendationGenerator:
     def __init__(self):
@@ -12,16 +14,22 @@ class RecommendationGenerator:
         
         Args:
             farmer_id: ID of the farmer
-            sensor_data: Dictionary of sensor readings organized by sensor type
+            sensor_data: Dictionary of sensor readings (ReadingSeries, lists or
+                SlidingWindowStats) keyed by sensor ID
             crop_type: Type of crop (defaults to 'maize')
         
         Returns:
-            List of generated recommendations
+            List of newly stored recommendations (duplicates of open
+            recommendations are skipped)
         """
         # Organize sensor readings by sensor type
         organized_readings = {}
         
         for sensor_id, readings in sensor_data.items():
+            if isinstance(readings, (ReadingSeries, SlidingWindowStats)):
+                organized_readings[readings.type_name] = readings
+                continue
+            
             # Get sensor type from the first reading
             if readings and len(readings) > 0:
                 # Extract the data type from the first reading
@@ -32,18 +40,15 @@ class RecommendationGenerator:
         # Generate AI recommendations
         ai_recommendations = self.ai.get_all_recommendations(organized_readings, crop_type)
         
-        # Store recommendations in the database
-        stored_recommendations = []
-        for ai_rec in ai_recommendations:
-            stored_rec = rec_model.create_recommendation(
-                farmer_id=farmer_id,
-                type=ai_rec['type'],
-                details={
+        # Store recommendations in the database, in one insert
+        return rec_model.create_recommendations(farmer_id, [
+            {
+                'type': ai_rec['type'],
+                'details': {
                     'message': ai_rec['message'],
                     'severity': ai_rec['severity'],
                     'data': ai_rec.get('data', {})
                 }
-            )
-            stored_recommendations.append(stored_rec)
-        
-        return stored_recommendations
\ No newline at end of file
+            }
+            for ai_rec in ai_recommendations
+        ])
\ No newline at end of file
@@ -1,8 +1,25 @@
+import os
 import random
+import threading
+import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
+# Constants of the splitmix64 mixing function used for counter-based noise
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+def _splitmix64(x):
+    """Vectorized splitmix64 finalizer over a uint64 array"""
+    with np.errstate(over='ignore'):
+        x = x + _GOLDEN_GAMMA
+        x = (x ^ (x >> np.uint64(30))) * _MIX_1
+        x = (x ^ (x >> np.uint64(27))) * _MIX_2
+        return x ^ (x >> np.uint64(31))
+
 class WeatherService:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.conditions = [
             'Sunny', 'Partly Cloudy', 'Cloudy', 'Light Rain', 
             'Heavy Rain', 'Thunderstorm', 'Foggy', 'Clear'
@@ -14,6 +31,23 @@ class WeatherService:
             'longitude': 0.0,
             'elevation': 100
         }
+        
+        # Forecasts are a pure function of (seed, location cell, date), so the
+        # same farm gets the same forecast on every call and in every worker
+        self.seed = int(os.environ.get('WEATHER_FORECAST_SEED', 42)) if seed is None else seed
+        self.forecast_cell_size = 0.1  # degrees, roughly 11 km
+        self.forecast_weights = np.array([0.3, 0.3, 0.2, 0.1, 0.05, 0.02, 0.03, 0.0])
+        # Inclusive precipitation chance ranges, matching _get_precipitation_chance
+        self.precipitation_ranges = np.array([
+            (0, 10), (10, 30), (20, 50), (60, 80), (80, 100), (80, 100), (30, 50), (0, 10)
+        ])
+        
+        # Memoized forecasts keyed by (location cell, date), least recently used first
+        self._forecast_cache = OrderedDict()
+        self._forecast_cache_size = 50000
+        # Day the cache was last swept of forecasts for days that are over
+        self._forecast_cache_day = None
+        self._forecast_lock = threading.Lock()
     
     def get_current_weather(self, location=None):
         """Get current weather for a location"""
@@ -59,41 +93,130 @@ class WeatherService:
             'timestamp': now.isoformat()
         }
     
-    def get_forecast(self, days=5):
+    def get_forecast(self, days=5, location=None):
         """Get weather forecast for the next few days"""
-        forecast = []
-        now = datetime.now()
+        return self.get_forecast_many([location or self.location], days)[0]
+    
+    def get_forecast_many(self, locations, days=5, start_date=None):
+        """
+        Get forecasts for many locations at once
+        
+        Args:
+            locations: List of dictionaries with 'latitude' and 'longitude'
+            days: Number of days per forecast
+            start_date: First forecast day (defaults to today)
         
-        for day in range(days):
-            date = now + timedelta(days=day)
-            daily_forecast = self._generate_daily_forecast(date)
-            forecast.append(daily_forecast)
+        Returns:
+            List with one forecast (list of daily dictionaries) per location
+        """
+        start = (start_date or datetime.now()).date()
+        dates = [start + timedelta(days=day) for day in range(days)]
+        cells = [self._forecast_cell(location) for location in locations]
         
-        return forecast
+        today = datetime.now().date()
+        with self._forecast_lock:
+            if self._forecast_cache_day != today:
+                # Forget days that are already over; entries are in LRU order,
+                # not date order, so this is a full pass, once a day
+                self._forecast_cache_day = today
+                for key in [key for key in self._forecast_cache if key[1] < today]:
+                    del self._forecast_cache[key]
+            cached = {}
+            missing_cells = set()
+            for cell in set(cells):
+                for date in dates:
+                    daily = self._forecast_cache.get((cell, date))
+                    if daily is None:
+                        missing_cells.add(cell)
+                    else:
+                        self._forecast_cache.move_to_end((cell, date))
+                        cached[(cell, date)] = daily
+        
+        missing_cells = sorted(missing_cells)
+        if missing_cells:
+            generated = self._generate_forecasts(missing_cells, dates)
+            with self._forecast_lock:
+                for cell, forecast in zip(missing_cells, generated):
+                    for date, daily in zip(dates, forecast):
+                        self._forecast_cache[(cell, date)] = daily
+                        cached[(cell, date)] = daily
+                while len(self._forecast_cache) > self._forecast_cache_size:
+                    self._forecast_cache.popitem(last=False)
+        
+        # Copies, so callers can't alter the memoized forecasts
+        return [[dict(cached[(cell, date)]) for date in dates] for cell in cells]
     
-    def _generate_daily_forecast(self, date):
-        """Generate forecast for a specific day"""
-        # Slight random variation in base temperature for the day
-        daily_base_temp = self.base_temp + random.uniform(-3, 3)
+    def _forecast_cell(self, location):
+        """Snap a location to the grid cell its forecast is keyed on"""
+        return (
+            round(float(location.get('latitude', 0)) / self.forecast_cell_size),
+            round(float(location.get('longitude', 0)) / self.forecast_cell_size)
+        )
+    
+    def _forecast_uniforms(self, cells, dates, n_draws):
+        """
+        Deterministic uniform draws in [0, 1) for every (cell, date) pair
         
-        # Generate high and low temperatures
-        high_temp = daily_base_temp + random.uniform(3, 8)
-        low_temp = daily_base_temp - random.uniform(5, 10)
+        Returns:
+            Array of shape (len(cells), len(dates), n_draws); each value
+            depends only on the seed, the cell, the date and the draw index
+        """
+        lat_keys = np.array([cell[0] for cell in cells], dtype=np.int64).astype(np.uint64)
+        lon_keys = np.array([cell[1] for cell in cells], dtype=np.int64).astype(np.uint64)
+        ordinals = np.array([date.toordinal() for date in dates], dtype=np.uint64)
         
-        # Choose a primary weather condition for the day
-        # Weights can be adjusted based on season, etc.
-        condition = random.choices(self.conditions, weights=[0.3, 0.3, 0.2, 0.1, 0.05, 0.02, 0.03, 0.0])[0]
+        key = _splitmix64(np.full(len(cells), self.seed, dtype=np.int64).astype(np.uint64))
+        key = _splitmix64(key ^ lat_keys)
+        key = _splitmix64(key ^ lon_keys)
+        key = _splitmix64(key[:, None] ^ ordinals[None, :])
+        draws = _splitmix64(key[:, :, None] ^ np.arange(1, n_draws + 1, dtype=np.uint64))
         
-        return {
-            'date': date.strftime('%Y-%m-%d'),
-            'day_of_week': date.strftime('%A'),
-            'condition': condition,
-            'high_temp': round(high_temp, 1),
-            'low_temp': round(low_temp, 1),
-            'humidity': round(random.uniform(40, 90), 1),
-            'wind_speed': round(random.uniform(0, 20), 1),
-            'precipitation_chance': self._get_precipitation_chance(condition)
-        }
+        # Top 53 bits give an evenly spaced double in [0, 1)
+        return (draws >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    
+    def _generate_forecasts(self, cells, dates):
+        """Generate daily forecasts for every cell and date in one vectorized pass"""
+        u = self._forecast_uniforms(cells, dates, 7)
+        
+        daily_base_temp = self.base_temp + (u[..., 0] * 6 - 3)
+        high_temp = np.round(daily_base_temp + (3 + u[..., 1] * 5), 1).tolist()
+        low_temp = np.round(daily_base_temp - (5 + u[..., 2] * 5), 1).tolist()
+        
+        cumulative = np.cumsum(self.forecast_weights)
+        condition_index = np.minimum(
+            np.searchsorted(cumulative / cumulative[-1], u[..., 3], side='right'),
+            len(self.conditions) - 1
+        )
+        
+        humidity = np.round(40 + u[..., 4] * 50, 1).tolist()
+        wind_speed = np.round(u[..., 5] * 20, 1).tolist()
+        
+        low, high = self.precipitation_ranges[condition_index, 0], self.precipitation_ranges[condition_index, 1]
+        precipitation = (low + np.floor(u[..., 6] * (high - low + 1))).astype(int).tolist()
+        condition_index = condition_index.tolist()
+        
+        labels = [(date.strftime('%Y-%m-%d'), date.strftime('%A')) for date in dates]
+        
+        return [
+            [
+                {
+                    'date': labels[j][0],
+                    'day_of_week': labels[j][1],
+                    'condition': self.conditions[condition_index[i][j]],
+                    'high_temp': high_temp[i][j],
+                    'low_temp': low_temp[i][j],
+                    'humidity': humidity[i][j],
+                    'wind_speed': wind_speed[i][j],
+                    'precipitation_chance': f"{precipitation[i][j]}%"
+                }
+                for j in range(len(dates))
+            ]
+            for i in range(len(cells))
+        ]
+    
+    def _generate_daily_forecast(self, date):
+        """Generate forecast for a specific day"""
+        return self._generate_forecasts([self._forecast_cell(self.location)], [date.date() if isinstance(date, datetime) else date])[0][0]
     
     def _get_diurnal_adjustment(self, hour):
         """Calculate temperature adjustment based on time of day"""
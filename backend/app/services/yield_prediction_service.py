@@ -67,6 +67,35 @@ class YieldPredictionService:
                 'weight': 0.1  # Impact weight
             }
         }
+        
+        self._build_range_arrays()
+    
+    def _build_range_arrays(self):
+        """Precompute per-crop optimal ranges as arrays for predict_yield_many"""
+        # Index 0 holds the defaults used for unknown crops by the scalar methods
+        self.range_crops = list(self.baseline_yields.keys())
+        self.range_crop_index = {crop: i + 1 for i, crop in enumerate(self.range_crops)}
+        
+        default_ranges = {
+            'temperature': (18, 28),
+            'soil_moisture': (45, 65),
+            'rainfall': (400, 600),
+            'sunlight': (6, 8)
+        }
+        self.range_arrays = {
+            factor: np.array(
+                [default] + [
+                    self.factor_impacts[factor]['optimal_range'].get(crop, default)
+                    for crop in self.range_crops
+                ],
+                dtype=float
+            )
+            for factor, default in default_ranges.items()
+        }
+        self.baseline_array = np.array(
+            [4000] + [self.baseline_yields[crop] for crop in self.range_crops],
+            dtype=float
+        )
     
     def get_baseline_yield(self, crop_type):
         """Get baseline yield for the crop type"""
@@ -340,6 +369,217 @@ class YieldPredictionService:
             'timestamp': datetime.now().isoformat()
         }
     
+    def _range_factor(self, values, ranges, cap):
+        """Vectorized optimal-range penalty shared by the range-based factors"""
+        min_optimal, max_optimal = ranges[:, 0], ranges[:, 1]
+        deviation = np.where(
+            values < min_optimal,
+            (min_optimal - values) / min_optimal,
+            np.where(values > max_optimal, (values - max_optimal) / max_optimal, 0.0)
+        )
+        return 1.0 - np.minimum(cap, deviation)
+    
+    def predict_yield_many(self, rows):
+        """
+        Predict yields for many crops and farms in one vectorized pass
+        
+        Args:
+            rows: List of dictionaries with 'crop_type', 'area_hectares' and
+                'conditions' (same keys as predict_yield's current_conditions),
+                or a pandas DataFrame with 'crop_type', 'area_hectares' and one
+                column per condition
+        
+        Returns:
+            List of prediction dictionaries, row-aligned with the input, in
+            the same format as predict_yield
+        """
+        defaults = {
+            'temperature': 25,
+            'soil_moisture': 60,
+            'rainfall': 500,
+            'sunlight': 7,
+            'pest_disease_level': 0.1,
+            'fertilizer_adequacy': 0.8
+        }
+        
+        if hasattr(rows, 'columns'):
+            n_rows = len(rows)
+            crop_types = rows['crop_type'].astype(str).tolist()
+            areas = rows['area_hectares'].tolist()
+            inputs = {
+                key: (rows[key].fillna(default).tolist() if key in rows.columns else [default] * n_rows)
+                for key, default in defaults.items()
+            }
+        else:
+            rows = list(rows)
+            n_rows = len(rows)
+            crop_types = [row.get('crop_type', 'maize') for row in rows]
+            areas = [row.get('area_hectares', 1.0) for row in rows]
+            inputs = {
+                key: [(row.get('conditions') or {}).get(key, default) for row in rows]
+                for key, default in defaults.items()
+            }
+        
+        if n_rows == 0:
+            return []
+        
+        crop_index = np.array([self.range_crop_index.get(crop.lower(), 0) for crop in crop_types])
+        values = {key: np.asarray(column, dtype=float) for key, column in inputs.items()}
+        area_array = np.asarray(areas, dtype=float)
+        
+        ranges = {factor: array[crop_index] for factor, array in self.range_arrays.items()}
+        factors = {
+            'temperature': self._range_factor(values['temperature'], ranges['temperature'], 0.5),
+            'soil_moisture': self._range_factor(values['soil_moisture'], ranges['soil_moisture'], 0.5),
+            'rainfall': self._range_factor(values['rainfall'], ranges['rainfall'], 0.5),
+            'sunlight': self._range_factor(values['sunlight'], ranges['sunlight'], 0.3),
+            'pests_diseases': 1.0 - values['pest_disease_level'] * 0.5,
+            'fertilizer': 0.7 + values['fertilizer_adequacy'] * 0.3
+        }
+        
+        weighted_impact = sum(
+            factors[factor] * self.factor_impacts[factor]['weight']
+            for factor in ('temperature', 'soil_moisture', 'rainfall', 'sunlight', 'pests_diseases', 'fertilizer')
+        )
+        variation = np.random.uniform(0.95, 1.05, n_rows)
+        yield_per_hectare = self.baseline_array[crop_index] * weighted_impact * variation
+        total_yield = yield_per_hectare * area_array
+        confidence = np.random.uniform(0.7, 0.95, n_rows)
+        
+        categories = np.select(
+            [weighted_impact >= 0.9, weighted_impact >= 0.8, weighted_impact >= 0.7, weighted_impact >= 0.6],
+            ['Excellent', 'Good', 'Average', 'Below Average'],
+            default='Poor'
+        )
+        
+        # Limiting factors and recommendations depend only on which factors are
+        # limited and in which direction, so each distinct combination is
+        # rendered once and shared between rows
+        flag_names = [
+            'temperature', 'soil_moisture', 'rainfall', 'sunlight', 'pests_diseases', 'fertilizer',
+            'temperature_low', 'soil_moisture_low', 'rainfall_low'
+        ]
+        flags = [factors[factor] < 0.9 for factor in flag_names[:6]] + [
+            values[factor] < ranges[factor][:, 0] for factor in ('temperature', 'soil_moisture', 'rainfall')
+        ]
+        codes = sum(flag.astype(np.int64) << bit for bit, flag in enumerate(flags)).tolist()
+        rendered = {}
+        
+        # Harvest windows come from a small set of offsets, so dates are cached too
+        harvest_offsets = np.random.randint(0, 16, n_rows).tolist()
+        harvest_lengths = (15 + np.random.randint(0, 11, n_rows)).tolist()
+        harvest_windows = {}
+        now = datetime.now()
+        timestamp = now.isoformat()
+        
+        yield_list = np.round(yield_per_hectare, 2).tolist()
+        total_list = np.round(total_yield, 2).tolist()
+        confidence_list = confidence.tolist()
+        category_list = categories.tolist()
+        factor_lists = {factor: np.round(impact, 2).tolist() for factor, impact in factors.items()}
+        
+        results = []
+        for i in range(n_rows):
+            code = codes[i]
+            if code not in rendered:
+                rendered[code] = self._render_limiting_factors(
+                    {name: bool(code >> bit & 1) for bit, name in enumerate(flag_names)}
+                )
+            limiting_factors, recommendations = rendered[code]
+            
+            window_key = (harvest_offsets[i], harvest_lengths[i])
+            if window_key not in harvest_windows:
+                harvest_start = now + timedelta(days=90 + window_key[0])
+                harvest_end = harvest_start + timedelta(days=window_key[1])
+                harvest_windows[window_key] = (harvest_start.strftime('%Y-%m-%d'), harvest_end.strftime('%Y-%m-%d'))
+            start_date, end_date = harvest_windows[window_key]
+            
+            results.append({
+                'crop_type': crop_types[i],
+                'area_hectares': areas[i],
+                'predicted_yield_per_hectare': yield_list[i],
+                'total_predicted_yield': total_list[i],
+                'yield_category': category_list[i],
+                'confidence_level': confidence_list[i],
+                'limiting_factors': list(limiting_factors),
+                'improvement_recommendations': list(recommendations),
+                'harvest_window': {
+                    'start_date': start_date,
+                    'end_date': end_date
+                },
+                'impact_factors': {
+                    'temperature': {
+                        'value': inputs['temperature'][i],
+                        'impact': factor_lists['temperature'][i]
+                    },
+                    'soil_moisture': {
+                        'value': inputs['soil_moisture'][i],
+                        'impact': factor_lists['soil_moisture'][i]
+                    },
+                    'rainfall': {
+                        'value': inputs['rainfall'][i],
+                        'impact': factor_lists['rainfall'][i]
+                    },
+                    'sunlight': {
+                        'value': inputs['sunlight'][i],
+                        'impact': factor_lists['sunlight'][i]
+                    },
+                    'pests_diseases': {
+                        'value': inputs['pest_disease_level'][i],
+                        'impact': factor_lists['pests_diseases'][i]
+                    },
+                    'fertilizer': {
+                        'value': inputs['fertilizer_adequacy'][i],
+                        'impact': factor_lists['fertilizer'][i]
+                    }
+                },
+                'timestamp': timestamp
+            })
+        
+        return results
+    
+    def _render_limiting_factors(self, flags):
+        """Build limiting factor and recommendation lists for one flag combination"""
+        limiting_factors = []
+        recommendations = []
+        
+        if flags['temperature']:
+            limiting_factors.append("Temperature too low" if flags['temperature_low'] else "Temperature too high")
+        if flags['soil_moisture']:
+            limiting_factors.append("Soil moisture too low" if flags['soil_moisture_low'] else "Soil moisture too high")
+        if flags['rainfall']:
+            limiting_factors.append("Insufficient rainfall" if flags['rainfall_low'] else "Excessive rainfall")
+        if flags['sunlight']:
+            limiting_factors.append("Suboptimal sunlight hours")
+        if flags['pests_diseases']:
+            limiting_factors.append("Pest or disease pressure")
+        if flags['fertilizer']:
+            limiting_factors.append("Inadequate fertilization")
+        
+        if flags['soil_moisture']:
+            recommendations.append(
+                "Increase irrigation frequency or volume" if flags['soil_moisture_low']
+                else "Improve drainage and reduce irrigation"
+            )
+        if flags['rainfall']:
+            recommendations.append(
+                "Implement irrigation to supplement rainfall" if flags['rainfall_low']
+                else "Improve drainage systems and consider raised beds"
+            )
+        if flags['temperature']:
+            recommendations.append(
+                "Consider using greenhouse or row covers for temperature management" if flags['temperature_low']
+                else "Implement shade structures or change planting time"
+            )
+        if flags['sunlight']:
+            recommendations.append("Ensure plants are not shaded and consider adjusting planting density")
+        if flags['pests_diseases']:
+            recommendations.append("Implement integrated pest management strategies")
+        if flags['fertilizer']:
+            recommendations.append("Adjust fertilizer application based on soil tests")
+        
+        return limiting_factors, recommendations
+    
     def get_historical_yields(self, crop_type, num_years=5):
         """
         Get simulated historical yield data for the crop type
@@ -0,0 +1,26 @@
+import threading
+
+class LazyService:
+    """
+    Stand-in for a service that is only created on first use
+    
+    Route modules keep their module-level service objects, but importing
+    the module no longer pays for constructing them (threads, files,
+    models); the first attribute access does, once, in a thread-safe way.
+    """
+    
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """Get the service, creating it if needed"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+    
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,99 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class HasherBusy(Exception):
+    """Raised when too many password hashes are already waiting to run"""
+
+def _b64encode(data):
+    return base64.b64encode(data).decode('ascii')
+
+def _b64decode(text):
+    return base64.b64decode(text.encode('ascii'))
+
+class PasswordHasher:
+    """
+    scrypt password hashing run in a bounded thread pool
+    
+    Hashes are stored as 'scrypt$n$r$p$salt$hash' (base64 salt and hash), so
+    the cost parameters travel with each hash and can be raised later:
+    needs_rehash() tells when a stored hash was made with other parameters,
+    or is a legacy salted SHA-256 hex digest, and should be replaced at the
+    next successful login.
+    
+    scrypt releases the GIL, but each hash takes tens of milliseconds and
+    128 * n * r bytes of memory, so at most `workers` run at once and at
+    most `max_pending` wait; beyond that HasherBusy is raised instead of
+    letting logins pile up behind each other.
+    """
+    
+    def __init__(self, n=2 ** 14, r=8, p=1, salt_size=16, key_size=32, workers=2, max_pending=64,
+                 legacy_salt=''):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.salt_size = salt_size
+        self.key_size = key_size
+        self.legacy_salt = legacy_salt
+        
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+    
+    def _scrypt(self, password, salt, n, r, p, key_size):
+        # Leave headroom over the 128 * n * r * p bytes scrypt needs
+        maxmem = 256 * n * r * p + 1024 * 1024
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=key_size)
+    
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('Too many password checks in progress')
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._slots.release()
+    
+    def _hash(self, password):
+        salt = os.urandom(self.salt_size)
+        key = self._scrypt(password, salt, self.n, self.r, self.p, self.key_size)
+        return f'scrypt${self.n}${self.r}${self.p}${_b64encode(salt)}${_b64encode(key)}'
+    
+    def _verify(self, password, stored_hash):
+        if not stored_hash:
+            return False
+        
+        if not stored_hash.startswith('scrypt$'):
+            # Legacy hashes are a single salted SHA-256
+            legacy_hash = hashlib.sha256((password + self.legacy_salt).encode()).hexdigest()
+            return hmac.compare_digest(legacy_hash, stored_hash)
+        
+        try:
+            _, n, r, p, salt, key = stored_hash.split('$')
+            n, r, p, salt, key = int(n), int(r), int(p), _b64decode(salt), _b64decode(key)
+        except ValueError:
+            return False
+        return hmac.compare_digest(self._scrypt(password, salt, n, r, p, len(key)), key)
+    
+    def hash(self, password):
+        """
+        Hash a password with the current parameters
+        
+        Raises:
+            HasherBusy: If the pool's queue is full
+        """
+        return self._run(self._hash, password)
+    
+    def verify(self, password, stored_hash):
+        """
+        Check a password against a stored scrypt or legacy hash
+        
+        Raises:
+            HasherBusy: If the pool's queue is full
+        """
+        return self._run(self._verify, password, stored_hash)
+    
+    def needs_rehash(self, stored_hash):
+        """Whether a stored hash should be replaced by one with the current parameters"""
+        return not (stored_hash or '').startswith(f'scrypt${self.n}${self.r}${self.p}$')
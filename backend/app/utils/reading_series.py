@@ -0,0 +1,119 @@
+from datetime import datetime
+import numpy as np
+
+def to_float(value):
+    """
+    Convert a NumPy scalar to a Python float
+    
+    float32 values are converted through their shortest repr, so a stored
+    45.3 comes back as 45.3 rather than 45.29999923706055.
+    """
+    if isinstance(value, np.float32):
+        return float(str(value))
+    return float(value)
+
+class ReadingSeries:
+    """
+    Readings of one sensor measurement stored as two NumPy arrays
+    
+    Timestamps are int64 seconds since the epoch and values are float32,
+    about 12 bytes per reading instead of three nested dicts and an ISO
+    string. Convert with from_readings/to_readings only at the API edge.
+    
+    Slicing returns a ReadingSeries sharing the same arrays; indexing with an
+    integer returns that reading in the API dict format, so code written for
+    lists of readings keeps working.
+    """
+    
+    __slots__ = ('sensor_id', 'type_name', 'unit', 'timestamps', 'values')
+    
+    def __init__(self, sensor_id, type_name, timestamps, values, unit=None):
+        self.sensor_id = sensor_id
+        self.type_name = type_name
+        self.unit = unit
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float32)
+        
+        if self.timestamps.shape != self.values.shape or self.values.ndim != 1:
+            raise ValueError('Timestamps and values must be 1-D arrays of the same length')
+    
+    def __len__(self):
+        return len(self.values)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ReadingSeries(self.sensor_id, self.type_name, self.timestamps[index], self.values[index], self.unit)
+        return self._reading(self.timestamps[index], self.values[index])
+    
+    def __iter__(self):
+        for timestamp, value in zip(self.timestamps, self.values):
+            yield self._reading(timestamp, value)
+    
+    def __repr__(self):
+        return f'ReadingSeries(sensor_id={self.sensor_id!r}, type_name={self.type_name!r}, length={len(self)})'
+    
+    def _reading(self, timestamp, value):
+        reading = {
+            'sensor_id': self.sensor_id,
+            'timestamp': datetime.fromtimestamp(int(timestamp)).isoformat(),
+            'data': {self.type_name: to_float(value)}
+        }
+        if self.unit is not None:
+            reading['data']['unit'] = self.unit
+        return reading
+    
+    @property
+    def latest(self):
+        """Most recent value, or None for an empty series"""
+        return to_float(self.values[-1]) if len(self.values) else None
+    
+    @classmethod
+    def from_readings(cls, readings, type_name=None, sensor_id=None):
+        """
+        Build a series from readings in the API dict format
+        
+        Args:
+            readings: List of {'sensor_id', 'timestamp', 'data'} dictionaries
+            type_name: Measurement to extract (defaults to the one in the
+                first reading)
+            sensor_id: Defaults to the sensor_id of the first reading
+        
+        Naive ISO timestamps are read as local time, like datetime.now().
+        """
+        readings = list(readings)
+        if type_name is None:
+            measurements = [key for key in readings[0]['data'].keys() if key != 'unit'] if readings else []
+            type_name = measurements[0] if measurements else 'unknown'
+        if sensor_id is None and readings:
+            sensor_id = readings[0].get('sensor_id')
+        
+        # Missing measurements count as 0, as the analyzers always did
+        values = [reading['data'].get(type_name, 0) for reading in readings]
+        timestamps = [int(datetime.fromisoformat(reading['timestamp']).timestamp()) for reading in readings]
+        unit = readings[0]['data'].get('unit') if readings else None
+        return cls(sensor_id, type_name, timestamps, values, unit)
+    
+    def to_readings(self):
+        """Convert back to a list of readings in the API dict format"""
+        return [self._reading(timestamp, value) for timestamp, value in zip(self.timestamps.tolist(), self.values)]
+
+def measurement_values(readings, type_name):
+    """
+    Values of one measurement as a NumPy array
+    
+    Accepts a ReadingSeries or a list of reading dicts. A series of another
+    measurement type yields zeros, like readings lacking the measurement.
+    """
+    if isinstance(readings, ReadingSeries):
+        if readings.type_name == type_name:
+            return readings.values
+        return np.zeros(len(readings), dtype=np.float32)
+    return np.array([reading['data'].get(type_name, 0) for reading in readings], dtype=float)
+
+def latest_value(readings, type_name, default=None):
+    """Most recent value of a measurement from a ReadingSeries or a list of reading dicts"""
+    if not readings:
+        return default
+    if isinstance(readings, ReadingSeries):
+        return readings.latest if readings.type_name == type_name else default
+    return readings[-1]['data'].get(type_name, default)
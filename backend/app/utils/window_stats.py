@@ -0,0 +1,217 @@
+import threading
+from collections import deque
+import numpy as np
+from app.utils.reading_series import to_float
+
+class SlidingWindowStats:
+    """
+    Running statistics over the last `size` values of one sensor
+    
+    Each push updates the sums behind the least-squares slope (value against
+    sample index, as the analyzers use) plus the mean, in O(1). Min and max
+    come from monotonic deques, O(1) amortized. Because evicting values
+    subtracts from the sums, they are recomputed from the window every
+    `size` evictions to stop rounding error from building up.
+    """
+    
+    __slots__ = ('size', 'type_name', 'last_timestamp', '_values', '_sum', '_weighted_sum',
+                 '_min_candidates', '_max_candidates', '_index', '_evictions')
+    
+    def __init__(self, size=24, type_name=None):
+        self.size = size
+        self.type_name = type_name
+        self.last_timestamp = None
+        
+        self._values = deque()
+        self._sum = 0.0
+        # Sum of index * value, with the oldest value in the window at index 0
+        self._weighted_sum = 0.0
+        
+        # (absolute index, value) pairs; the front is the current min / max
+        self._min_candidates = deque()
+        self._max_candidates = deque()
+        self._index = 0
+        self._evictions = 0
+    
+    @classmethod
+    def from_values(cls, values, size=24, type_name=None):
+        """Build a window holding the last `size` of `values` in one pass"""
+        stats = cls(size, type_name)
+        values = np.asarray(values)[-size:]
+        if values.dtype == np.float32:
+            # Through the shortest repr, as to_float does
+            values = values.astype(str)
+        values = values.astype(float).tolist()
+        
+        stats._values.extend(values)
+        stats._sum = sum(values)
+        stats._weighted_sum = sum(i * value for i, value in enumerate(values))
+        stats._index = len(values)
+        
+        # The candidates are the values smaller (larger) than everything after them
+        lowest = highest = None
+        for index in range(len(values) - 1, -1, -1):
+            value = values[index]
+            if lowest is None or value < lowest:
+                stats._min_candidates.appendleft((index, value))
+                lowest = value
+            if highest is None or value > highest:
+                stats._max_candidates.appendleft((index, value))
+                highest = value
+        return stats
+    
+    def push(self, value, timestamp=None):
+        """Add the newest value, evicting the oldest once the window is full"""
+        value = to_float(value)
+        
+        if len(self._values) == self.size:
+            oldest = self._values.popleft()
+            self._sum -= oldest
+            # Every remaining value moves one index down
+            self._weighted_sum -= self._sum
+            self._evictions += 1
+            if self._evictions >= self.size:
+                self._recompute()
+        
+        self._weighted_sum += len(self._values) * value
+        self._sum += value
+        self._values.append(value)
+        
+        index = self._index
+        self._index += 1
+        window_start = self._index - len(self._values)
+        
+        while self._min_candidates and self._min_candidates[-1][1] >= value:
+            self._min_candidates.pop()
+        self._min_candidates.append((index, value))
+        while self._min_candidates[0][0] < window_start:
+            self._min_candidates.popleft()
+        
+        while self._max_candidates and self._max_candidates[-1][1] <= value:
+            self._max_candidates.pop()
+        self._max_candidates.append((index, value))
+        while self._max_candidates[0][0] < window_start:
+            self._max_candidates.popleft()
+        
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+    
+    def copy(self):
+        """Independent copy, safe to read while the original keeps changing"""
+        other = SlidingWindowStats(self.size, self.type_name)
+        other.last_timestamp = self.last_timestamp
+        other._values = deque(self._values)
+        other._sum = self._sum
+        other._weighted_sum = self._weighted_sum
+        other._min_candidates = deque(self._min_candidates)
+        other._max_candidates = deque(self._max_candidates)
+        other._index = self._index
+        other._evictions = self._evictions
+        return other
+    
+    def _recompute(self):
+        self._sum = sum(self._values)
+        self._weighted_sum = sum(i * value for i, value in enumerate(self._values))
+        self._evictions = 0
+    
+    def __len__(self):
+        return len(self._values)
+    
+    @property
+    def count(self):
+        return len(self._values)
+    
+    @property
+    def latest(self):
+        return self._values[-1] if self._values else None
+    
+    @property
+    def mean(self):
+        return self._sum / len(self._values) if self._values else None
+    
+    @property
+    def min(self):
+        return self._min_candidates[0][1] if self._min_candidates else None
+    
+    @property
+    def max(self):
+        return self._max_candidates[0][1] if self._max_candidates else None
+    
+    @property
+    def slope(self):
+        """Least-squares slope per sample; 0 with fewer than two values"""
+        n = len(self._values)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self._weighted_sum - sum_x * self._sum) / (n * sum_xx - sum_x * sum_x)
+    
+    def samples_until(self, threshold):
+        """
+        Samples until the trend line reaches `threshold` from the latest value
+        
+        Returns:
+            None if the value is not moving towards the threshold
+        """
+        slope = self.slope
+        if not self._values or slope == 0 or (threshold - self.latest) / slope < 0:
+            return None
+        return (threshold - self.latest) / slope
+    
+    def to_dict(self):
+        return {
+            'type': self.type_name,
+            'count': self.count,
+            'latest': self.latest,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'slope': self.slope,
+            'last_timestamp': self.last_timestamp.isoformat() if self.last_timestamp else None
+        }
+
+class WindowStatsRegistry:
+    """
+    Live SlidingWindowStats per sensor, fed as readings are ingested
+    
+    State is per process; each worker sees the readings it ingested itself.
+    """
+    
+    def __init__(self, size=24):
+        self.size = size
+        self._windows = {}
+        self._lock = threading.Lock()
+    
+    def update(self, sensor_id, value, timestamp=None, type_name=None):
+        """
+        Push one reading into a sensor's window
+        
+        Readings older than the latest one seen for the sensor are ignored,
+        since the window only moves forwards.
+        """
+        with self._lock:
+            window = self._windows.get(sensor_id)
+            if window is None:
+                window = self._windows[sensor_id] = SlidingWindowStats(self.size, type_name)
+            if timestamp is not None and window.last_timestamp is not None and timestamp < window.last_timestamp:
+                return
+            window.push(value, timestamp)
+    
+    def update_many(self, samples):
+        """Push (sensor_id, timestamp, type_name, value) tuples in timestamp order"""
+        for sensor_id, timestamp, type_name, value in sorted(samples, key=lambda sample: sample[1]):
+            self.update(sensor_id, value, timestamp, type_name)
+    
+    def get(self, sensor_id):
+        """Get a snapshot of a sensor's window, or None"""
+        with self._lock:
+            window = self._windows.get(sensor_id)
+            return window.copy() if window is not None else None
+    
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+# Shared by the ingest path and the analyzers in this process
+live_windows = WindowStatsRegistry()
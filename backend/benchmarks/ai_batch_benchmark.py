@@ -0,0 +1,81 @@
+"""Compare per-field and batch recommendation throughput.
+
+The per-field path also runs on SlidingWindowStats, so the gap is mostly
+the per-field Python overhead and the dict readings it consumes; expect a
+single-digit speedup rather than orders of magnitude.
+
+Run from the backend directory:
+    python -m benchmarks.ai_batch_benchmark --fields 10000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.ai_service import AgriculturalAI
+
+
+def build_readings(n_fields, n_readings, seed=42):
+    """Generate random soil moisture, temperature and humidity matrices"""
+    rng = np.random.default_rng(seed)
+    return {
+        'soil_moisture': rng.uniform(30, 70, (n_fields, n_readings)),
+        'temperature': rng.uniform(12, 36, (n_fields, n_readings)),
+        'humidity': rng.uniform(40, 90, (n_fields, n_readings))
+    }
+
+
+def to_reading_dicts(field_readings, field_index):
+    """Convert one field's matrix rows into the list-of-dicts reading format"""
+    now = datetime.now()
+    readings = {}
+    for sensor_type, values in field_readings.items():
+        row = values[field_index]
+        readings[sensor_type] = [
+            {
+                'timestamp': (now - timedelta(hours=len(row) - i)).isoformat(),
+                'data': {sensor_type: float(value)}
+            }
+            for i, value in enumerate(row)
+        ]
+    return readings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fields', type=int, default=10000)
+    parser.add_argument('--readings', type=int, default=48)
+    args = parser.parse_args()
+    
+    ai = AgriculturalAI()
+    crops = np.array(['maize', 'beans', 'tomatoes'])[np.arange(args.fields) % 3]
+    field_readings = build_readings(args.fields, args.readings)
+    
+    # The scalar path also pays for building the dict readings it consumes
+    per_field_inputs = [to_reading_dicts(field_readings, i) for i in range(args.fields)]
+    
+    start = time.perf_counter()
+    scalar_results = [
+        ai.get_all_recommendations(per_field_inputs[i], crops[i])
+        for i in range(args.fields)
+    ]
+    scalar_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batch_results = ai.get_batch_recommendations(field_readings, crops)
+    batch_seconds = time.perf_counter() - start
+    
+    mismatches = sum(
+        [(r['type'], r['severity']) for r in a] != [(r['type'], r['severity']) for r in b]
+        for a, b in zip(scalar_results, batch_results)
+    )
+    
+    print(f"Fields: {args.fields}, readings per sensor: {args.readings}")
+    print(f"Per-field: {scalar_seconds:.3f}s ({args.fields / scalar_seconds:,.0f} fields/s)")
+    print(f"Batch:     {batch_seconds:.3f}s ({args.fields / batch_seconds:,.0f} fields/s)")
+    print(f"Speedup:   {scalar_seconds / batch_seconds:.1f}x, mismatched fields: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
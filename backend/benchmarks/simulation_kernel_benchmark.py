@@ -0,0 +1,83 @@
+"""Compare per-object sensor reads with the vectorized simulation kernels.
+
+Run from the backend directory:
+    python -m benchmarks.simulation_kernel_benchmark --fields 10000
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+import numpy as np
+
+from simulation import kernels
+from simulation.humidity_sensor import HumiditySensor
+from simulation.simulator import SENSOR_RANGES
+from simulation.soil_moisture_sensor import SoilMoistureSensor
+from simulation.temperature_sensor import TemperatureSensor
+
+
+def build_sensors(n_fields):
+    """One temperature, humidity and soil moisture sensor per field"""
+    fields = []
+    for i in range(n_fields):
+        temperature = TemperatureSensor(f'temp-{i}', f'field-{i}')
+        humidity = HumiditySensor(f'hum-{i}', f'field-{i}')
+        humidity.set_temperature_sensor(temperature)
+        fields.append((temperature, humidity, SoilMoistureSensor(f'soil-{i}', f'field-{i}')))
+    return fields
+
+
+def run_kernels(n_fields, steps, seed):
+    """Advance every field `steps` times; returns the final value arrays"""
+    rng = np.random.default_rng(seed)
+    field_codes = np.arange(n_fields)
+    ranges = {name: (np.full(n_fields, low, dtype=float), np.full(n_fields, high, dtype=float))
+              for name, (low, high) in SENSOR_RANGES.items()}
+    soil = np.full(n_fields, 50.0)
+    start = datetime.utcnow()
+    
+    for step in range(steps):
+        hour = kernels.hour_of_day(start, step * 900)
+        temperature = kernels.temperature_step(*ranges['temperature'], hour, rng)
+        field_temperature = kernels.field_mean(field_codes, temperature, n_fields)
+        humidity = kernels.humidity_step(field_temperature[field_codes], *ranges['humidity'], rng)
+        soil = kernels.soil_moisture_step(soil, *ranges['soil_moisture'], rng)
+    
+    return temperature, humidity, soil
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--fields', type=int, default=10000)
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    fields = build_sensors(args.fields)
+    random.seed(args.seed)
+    
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        for temperature, humidity, soil in fields:
+            temperature.read()
+            humidity.read()
+            soil.read()
+    object_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    first = run_kernels(args.fields, args.steps, args.seed)
+    kernel_seconds = time.perf_counter() - start
+    
+    second = run_kernels(args.fields, args.steps, args.seed)
+    reproducible = all(np.array_equal(a, b) for a, b in zip(first, second))
+    
+    readings = 3 * args.fields * args.steps
+    print(f"Fields: {args.fields}, steps: {args.steps} ({readings:,} readings)")
+    print(f"Per-object: {object_seconds:.3f}s ({readings / object_seconds:,.0f} readings/s)")
+    print(f"Kernels:    {kernel_seconds:.3f}s ({readings / kernel_seconds:,.0f} readings/s)")
+    print(f"Speedup:    {object_seconds / kernel_seconds:.1f}x, reproducible under seed: {reproducible}")
+
+
+if __name__ == '__main__':
+    main()
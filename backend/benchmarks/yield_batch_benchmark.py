@@ -0,0 +1,68 @@
+"""Compare scalar and vectorized yield prediction throughput.
+
+Run from the backend directory:
+    python -m benchmarks.yield_batch_benchmark --rows 10000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.yield_prediction_service import YieldPredictionService
+
+
+def build_rows(n_rows, seed=42):
+    """Generate random (crop_type, area, conditions) rows"""
+    rng = np.random.default_rng(seed)
+    crops = ['maize', 'beans', 'tomatoes', 'wheat', 'rice', 'potatoes', 'sorghum']
+    return [
+        {
+            'crop_type': crops[i % len(crops)],
+            'area_hectares': float(rng.uniform(0.5, 20)),
+            'conditions': {
+                'temperature': float(rng.uniform(10, 38)),
+                'soil_moisture': float(rng.uniform(25, 95)),
+                'rainfall': float(rng.uniform(200, 1600)),
+                'sunlight': float(rng.uniform(4, 11)),
+                'pest_disease_level': float(rng.uniform(0, 1)),
+                'fertilizer_adequacy': float(rng.uniform(0, 1))
+            }
+        }
+        for i in range(n_rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+    
+    service = YieldPredictionService()
+    rows = build_rows(args.rows)
+    
+    start = time.perf_counter()
+    scalar_results = [
+        service.predict_yield(row['crop_type'], row['area_hectares'], row['conditions'])
+        for row in rows
+    ]
+    scalar_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    batch_results = service.predict_yield_many(rows)
+    batch_seconds = time.perf_counter() - start
+    
+    # Yields carry random variation, so compare the deterministic parts
+    mismatches = sum(
+        (a['yield_category'], a['limiting_factors'], a['impact_factors'])
+        != (b['yield_category'], b['limiting_factors'], b['impact_factors'])
+        for a, b in zip(scalar_results, batch_results)
+    )
+    
+    print(f"Rows: {args.rows}")
+    print(f"Scalar:     {scalar_seconds:.3f}s ({args.rows / scalar_seconds:,.0f} rows/s)")
+    print(f"Vectorized: {batch_seconds:.3f}s ({args.rows / batch_seconds:,.0f} rows/s)")
+    print(f"Speedup:    {scalar_seconds / batch_seconds:.1f}x, mismatched rows: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+# Default minutes between readings per sensor type (matches the sensor configuration defaults)
+DEFAULT_READING_INTERVALS = {
+    'soil_moisture': 30,
+    'temperature': 15,
+    'humidity': 30
+}
+
+class BaseSensor:
+    def __init__(self, id, type_name, field_id, min_value, max_value, initial_value=None, reading_interval=None):
+        self.id = id
+        self.type_name = type_name
+        self.field_id = field_id
+        self.min_value = min_value
+        self.max_value = max_value
+        
+        # Start in the middle of the range unless told otherwise
+        self.value = initial_value if initial_value is not None else (min_value + max_value) / 2
+        
+        # Minutes between readings
+        self.reading_interval = reading_interval or DEFAULT_READING_INTERVALS.get(type_name, 30)
+    
+    def read(self):
+        """Advance the sensor and return a reading in the ingest API format"""
+        raise NotImplementedError
+    
+    def _get_base_reading(self):
+        """Fields shared by every reading; subclasses fill in 'data'"""
+        return {
+            'sensor_id': self.id,
+            'field_id': self.field_id,
+            'timestamp': datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,60 @@
+"""Vectorized sensor physics.
+
+Each kernel advances a whole array of sensors in one NumPy step and
+mirrors the read() logic of the matching sensor class. Randomness comes
+from the Generator passed in, so a seeded Generator gives reproducible
+runs.
+"""
+import numpy as np
+
+def hour_of_day(start, seconds):
+    """
+    Fractional hour of day at `seconds` past `start`
+    
+    Args:
+        start: datetime the simulation clock is measured from
+        seconds: Scalar or array of elapsed seconds
+    """
+    start_seconds = start.hour * 3600 + start.minute * 60 + start.second
+    return ((start_seconds + np.asarray(seconds)) % 86400) / 3600.0
+
+def soil_moisture_step(values, min_values, max_values, rng, max_change=2.0):
+    """Slow clamped random walk; soil moisture only drifts between readings"""
+    change = rng.uniform(-max_change, max_change, len(values))
+    return np.clip(values + change, min_values, max_values)
+
+def temperature_step(min_values, max_values, hour, rng, amplitude=5.0, noise=0.5):
+    """
+    Daily temperature cycle around the middle of each sensor's range
+    
+    Coolest at 4 AM and warmest at 2 PM, plus uniform noise. `hour` may be
+    a scalar (all sensors share a clock) or one value per sensor.
+    """
+    base = (min_values + max_values) / 2
+    daily_cycle = amplitude * np.sin(np.pi * (np.asarray(hour) - 4) / 12)
+    values = base + daily_cycle + rng.uniform(-noise, noise, len(base))
+    return np.clip(values, min_values, max_values)
+
+def humidity_step(temperatures, min_values, max_values, rng, noise=5.0):
+    """
+    Relative humidity coupled inversely to temperature
+    
+    Args:
+        temperatures: Temperature seen by each sensor; NaN where there is no
+            temperature reading, which falls back to a 60% baseline
+    """
+    temp_factor = np.maximum(0, (40 - temperatures) / 30)  # 0 at 40°C, 1 at 10°C
+    base = np.where(np.isnan(temperatures), 60, 40 + temp_factor * 40)
+    values = base + rng.uniform(-noise, noise, len(base))
+    return np.clip(values, min_values, max_values)
+
+def field_mean(field_codes, values, n_fields):
+    """
+    Mean of `values` per field
+    
+    Returns:
+        Array of length n_fields, NaN for fields without any value
+    """
+    totals = np.bincount(field_codes, weights=values, minlength=n_fields)
+    counts = np.bincount(field_codes, minlength=n_fields)
+    return np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
@@ -0,0 +1,353 @@
+"""Discrete-event simulator for large sensor fleets.
+
+Replays readings in virtual time into a file or the ingest API:
+    python -m simulation.simulator --sensors 100000 --days 120 --file readings.ndjson
+    python -m simulation.simulator --sensors 1000 --days 1 --api http://localhost:5000
+"""
+import argparse
+import heapq
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import requests
+
+from .base_sensor import DEFAULT_READING_INTERVALS
+from . import kernels
+
+# Sensor types by integer code, as stored in the fleet arrays
+SENSOR_TYPES = ['soil_moisture', 'temperature', 'humidity']
+
+# Value ranges and units, matching the per-sensor classes
+SENSOR_RANGES = {
+    'soil_moisture': (10, 90),
+    'temperature': (5, 40),
+    'humidity': (30, 95)
+}
+SENSOR_UNITS = {
+    'soil_moisture': '%',
+    'temperature': '°C',
+    'humidity': '%'
+}
+
+class SensorFleet:
+    """
+    Sensor state stored as parallel NumPy arrays (struct of arrays)
+    
+    Row i of every array describes one sensor, so a group of sensors is
+    advanced with a single array operation instead of one read() call
+    per sensor object.
+    """
+    
+    def __init__(self, sensor_ids, field_ids, types, values=None, intervals=None,
+                 min_values=None, max_values=None):
+        """
+        Args:
+            sensor_ids: Sensor IDs
+            field_ids: Field ID of each sensor
+            types: Type name of each sensor (one of SENSOR_TYPES)
+            values: Initial values (defaults to the middle of each range)
+            intervals: Minutes between readings (defaults per type)
+            min_values, max_values: Value ranges (default per type)
+        """
+        self.sensor_ids = [str(sensor_id) for sensor_id in sensor_ids]
+        self.field_ids = [str(field_id) for field_id in field_ids]
+        self.types = list(types)
+        
+        unknown = set(self.types) - set(SENSOR_TYPES)
+        if unknown:
+            raise ValueError(f"Unsupported sensor types: {', '.join(sorted(unknown))}")
+        
+        type_index = {name: code for code, name in enumerate(SENSOR_TYPES)}
+        self.type_codes = np.array([type_index[name] for name in self.types], dtype=np.int8)
+        
+        # Dense field index per sensor, for per-field aggregates
+        field_names, field_codes = np.unique(np.array(self.field_ids, dtype=object), return_inverse=True)
+        self.field_codes = field_codes.reshape(-1).astype(np.int64)
+        self.n_fields = len(field_names)
+        
+        ranges = np.array([SENSOR_RANGES[name] for name in SENSOR_TYPES], dtype=np.float64)
+        self.min_values = ranges[self.type_codes, 0] if min_values is None else np.asarray(min_values, dtype=np.float64)
+        self.max_values = ranges[self.type_codes, 1] if max_values is None else np.asarray(max_values, dtype=np.float64)
+        
+        if values is None:
+            self.values = (self.min_values + self.max_values) / 2
+        else:
+            self.values = np.asarray(values, dtype=np.float64).copy()
+        
+        if intervals is None:
+            defaults = np.array([DEFAULT_READING_INTERVALS[name] for name in SENSOR_TYPES])
+            intervals = defaults[self.type_codes]
+        # Stored in seconds of virtual time
+        self.intervals = (np.asarray(intervals, dtype=np.float64) * 60).astype(np.int64)
+        if (self.intervals <= 0).any():
+            raise ValueError('Reading intervals must be positive')
+    
+    def __len__(self):
+        return len(self.sensor_ids)
+    
+    @classmethod
+    def from_sensors(cls, sensors):
+        """Build a fleet from BaseSensor objects"""
+        return cls(
+            sensor_ids=[sensor.id for sensor in sensors],
+            field_ids=[sensor.field_id for sensor in sensors],
+            types=[sensor.type_name for sensor in sensors],
+            values=[sensor.value for sensor in sensors],
+            intervals=[sensor.reading_interval for sensor in sensors],
+            min_values=[sensor.min_value for sensor in sensors],
+            max_values=[sensor.max_value for sensor in sensors]
+        )
+    
+    @classmethod
+    def from_configs(cls, sensors):
+        """Build a fleet from sensor documents as stored by app.models.sensor"""
+        sensors = [sensor for sensor in sensors if sensor.get('type') in SENSOR_TYPES]
+        return cls(
+            sensor_ids=[sensor['id'] for sensor in sensors],
+            field_ids=[sensor.get('field_id') for sensor in sensors],
+            types=[sensor['type'] for sensor in sensors],
+            intervals=[
+                (sensor.get('configuration') or {}).get('reading_interval') or DEFAULT_READING_INTERVALS[sensor['type']]
+                for sensor in sensors
+            ]
+        )
+    
+    @classmethod
+    def generate(cls, n_sensors, sensors_per_field=3):
+        """Build a synthetic fleet; each field gets one sensor of each type in turn"""
+        sensors_per_field = max(1, sensors_per_field)
+        return cls(
+            sensor_ids=[f'sim-{i:06d}' for i in range(n_sensors)],
+            field_ids=[f'sim-field-{i // sensors_per_field:06d}' for i in range(n_sensors)],
+            types=[SENSOR_TYPES[(i % sensors_per_field) % len(SENSOR_TYPES)] for i in range(n_sensors)]
+        )
+    
+    def to_readings(self, indices, values, timestamp):
+        """Convert one batch into readings in the ingest API format"""
+        timestamp = timestamp.isoformat()
+        return [
+            {
+                'sensor_id': self.sensor_ids[i],
+                'field_id': self.field_ids[i],
+                'timestamp': timestamp,
+                'data': {
+                    self.types[i]: value,
+                    'unit': SENSOR_UNITS[self.types[i]]
+                }
+            }
+            for i, value in zip(indices.tolist(), np.round(values, 2).tolist())
+        ]
+
+class FileSink:
+    """Write readings as newline-delimited JSON in the ingest API format"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._templates = None
+    
+    def _build_templates(self, fleet):
+        # The JSON around each value is fixed per sensor, so it is rendered once
+        prefixes = [
+            '{"sensor_id": %s, "field_id": %s, "timestamp": "' % (json.dumps(sensor_id), json.dumps(field_id))
+            for sensor_id, field_id in zip(fleet.sensor_ids, fleet.field_ids)
+        ]
+        middles = {name: '", "data": {%s: ' % json.dumps(name) for name in SENSOR_TYPES}
+        suffixes = {name: ', "unit": %s}}\n' % json.dumps(SENSOR_UNITS[name]) for name in SENSOR_TYPES}
+        self._templates = (
+            fleet,
+            prefixes,
+            [middles[name] for name in fleet.types],
+            [suffixes[name] for name in fleet.types]
+        )
+    
+    def write(self, fleet, indices, values, timestamp):
+        if self._templates is None or self._templates[0] is not fleet:
+            self._build_templates(fleet)
+        _, prefixes, middles, suffixes = self._templates
+        
+        timestamp = timestamp.isoformat()
+        self._file.write(''.join([
+            f'{prefixes[i]}{timestamp}{middles[i]}{value}{suffixes[i]}'
+            for i, value in zip(indices.tolist(), np.round(values, 2).tolist())
+        ]))
+    
+    def close(self):
+        self._file.close()
+
+class IngestAPISink:
+    """POST readings to the backend's /api/readings/ ingest endpoint in batches"""
+    
+    def __init__(self, base_url, batch_size=5000, timeout=60):
+        self.url = base_url.rstrip('/') + '/api/readings/'
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._buffer = []
+    
+    def write(self, fleet, indices, values, timestamp):
+        self._buffer.extend(fleet.to_readings(indices, values, timestamp))
+        while len(self._buffer) >= self.batch_size:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            self._post(batch)
+    
+    def _post(self, readings):
+        response = self.session.post(self.url, json={'readings': readings}, timeout=self.timeout)
+        response.raise_for_status()
+    
+    def close(self):
+        if self._buffer:
+            self._post(self._buffer)
+            self._buffer = []
+        self.session.close()
+
+class FleetSimulator:
+    """
+    Discrete-event scheduler that advances a SensorFleet in virtual time
+    
+    Every sensor gets a random phase within its reading interval, snapped
+    to `tick` seconds. Sensors sharing type, interval and phase always
+    report together, so each such group is one event on a heap ordered by
+    its next due time. Popping an event advances the whole group with one
+    vectorized step, hands the batch to the sink and reschedules the group
+    one interval later.
+    """
+    
+    def __init__(self, fleet, sink, start=None, tick=60, seed=None, speed=None):
+        """
+        Args:
+            fleet: SensorFleet to simulate
+            sink: Object with write(fleet, indices, values, timestamp) and close()
+            start: Virtual start time (defaults to now, UTC)
+            tick: Phase resolution in seconds
+            seed: Seed for phases and sensor noise
+            speed: Virtual seconds per wall-clock second, or None to run flat out
+        """
+        self.fleet = fleet
+        self.sink = sink
+        self.start = start or datetime.utcnow().replace(second=0, microsecond=0)
+        self.speed = speed
+        self.rng = np.random.default_rng(seed)
+        self.now = 0  # virtual seconds since start
+        
+        steps = np.maximum(fleet.intervals // tick, 1)
+        phases = self.rng.integers(0, steps) * tick
+        
+        # Group sensors by (type, interval, phase); each group is one heap event
+        keys = np.stack([fleet.type_codes.astype(np.int64), fleet.intervals, phases], axis=1)
+        group_keys, group_of = np.unique(keys, axis=0, return_inverse=True)
+        group_of = group_of.reshape(-1)
+        order = np.argsort(group_of, kind='stable')
+        bounds = np.searchsorted(group_of[order], np.arange(len(group_keys) + 1))
+        
+        self._groups = [
+            (int(type_code), int(interval), order[bounds[g]:bounds[g + 1]])
+            for g, (type_code, interval, _) in enumerate(group_keys)
+        ]
+        self._events = [(int(phase), g) for g, (_, _, phase) in enumerate(group_keys)]
+        heapq.heapify(self._events)
+        
+        # Running sum of the latest temperature per field; humidity sensors
+        # read their field's mean temperature from it
+        is_temperature = fleet.type_codes == SENSOR_TYPES.index('temperature')
+        self._temperature_counts = np.bincount(fleet.field_codes[is_temperature], minlength=fleet.n_fields)
+        self._temperature_totals = np.bincount(
+            fleet.field_codes[is_temperature], weights=fleet.values[is_temperature], minlength=fleet.n_fields
+        )
+    
+    def _step(self, type_code, indices, t):
+        """Advance one group of same-type sensors to virtual time t"""
+        fleet = self.fleet
+        low, high = fleet.min_values[indices], fleet.max_values[indices]
+        name = SENSOR_TYPES[type_code]
+        
+        if name == 'soil_moisture':
+            values = kernels.soil_moisture_step(fleet.values[indices], low, high, self.rng)
+        elif name == 'temperature':
+            values = kernels.temperature_step(low, high, kernels.hour_of_day(self.start, t), self.rng)
+            fields = fleet.field_codes[indices]
+            self._temperature_totals += np.bincount(
+                fields, weights=values - fleet.values[indices], minlength=fleet.n_fields
+            )
+        else:
+            fields = fleet.field_codes[indices]
+            counts = self._temperature_counts[fields]
+            temperatures = np.where(counts > 0, self._temperature_totals[fields] / np.maximum(counts, 1), np.nan)
+            values = kernels.humidity_step(temperatures, low, high, self.rng)
+        
+        fleet.values[indices] = values
+        return values
+    
+    def run(self, days=None, seconds=None):
+        """
+        Run until the given amount of virtual time has passed
+        
+        Returns:
+            Dictionary with the number of readings and events, the virtual
+            seconds simulated and the wall-clock time taken
+        """
+        duration = seconds if seconds is not None else int((days or 1) * 86400)
+        end = self.now + duration
+        readings = 0
+        events = 0
+        started = time.perf_counter()
+        
+        while self._events and self._events[0][0] < end:
+            t, g = heapq.heappop(self._events)
+            type_code, interval, indices = self._groups[g]
+            
+            if self.speed:
+                # Hold back until wall-clock time catches up with virtual time
+                delay = (t - self.now) / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            
+            values = self._step(type_code, indices, t)
+            self.sink.write(self.fleet, indices, values, self.start + timedelta(seconds=t))
+            readings += len(indices)
+            events += 1
+            
+            heapq.heappush(self._events, (t + interval, g))
+        
+        self.now = end
+        return {
+            'readings': readings,
+            'events': events,
+            'virtual_seconds': duration,
+            'wall_seconds': round(time.perf_counter() - started, 3)
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate a sensor fleet in virtual time')
+    parser.add_argument('--sensors', type=int, default=1000)
+    parser.add_argument('--sensors-per-field', type=int, default=3)
+    parser.add_argument('--days', type=float, default=1)
+    parser.add_argument('--start', help='Virtual start time (ISO format, UTC)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--speed', type=float, help='Virtual seconds per second (default: as fast as possible)')
+    parser.add_argument('--file', help='Write NDJSON readings to this path')
+    parser.add_argument('--api', help='Backend base URL to POST readings to')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    
+    if bool(args.file) == bool(args.api):
+        parser.error('Give exactly one of --file or --api')
+    
+    fleet = SensorFleet.generate(args.sensors, args.sensors_per_field)
+    sink = FileSink(args.file) if args.file else IngestAPISink(args.api, batch_size=args.batch_size)
+    start = datetime.fromisoformat(args.start) if args.start else None
+    
+    simulator = FleetSimulator(fleet, sink, start=start, seed=args.seed, speed=args.speed)
+    try:
+        stats = simulator.run(days=args.days)
+    finally:
+        sink.close()
+    
+    rate = stats['readings'] / stats['wall_seconds'] if stats['wall_seconds'] else 0
+    print(f"{stats['readings']} readings from {len(fleet)} sensors over {args.days} days "
+          f"in {stats['wall_seconds']}s ({rate:,.0f} readings/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import pytest
+from app import create_app
+from app.config import Config
+from app.models import sensor as sensor_model
+from app.services.alert_engine import alert_engine
+
+class MockMongoConfig(Config):
+    MONGO_MOCK = True
+    MONGO_LAZY_CONNECT = False
+
+@pytest.fixture
+def client():
+    # Fresh in-memory database; drop process-wide state left by other tests
+    app = create_app(MockMongoConfig)
+    sensor_model._registry = None
+    alert_engine._table = None
+    alert_engine._active.clear()
+    alert_engine._last_raised.clear()
+    return app.test_client()
@@ -0,0 +1,62 @@
+from datetime import datetime
+from app.services.alert_engine import AlertEngine
+from app.services.event_hub import event_hub
+
+def ingest(client, sensor_id, type_name, values, hour=0):
+    readings = [
+        {
+            'sensor_id': sensor_id,
+            'timestamp': f'2026-10-17T{hour:02d}:{minute * 10:02d}:00',
+            'data': {type_name: value, 'unit': '%'}
+        }
+        for minute, value in enumerate(values)
+    ]
+    response = client.post('/api/readings/', json=readings)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+def test_ingest_raises_alert_for_default_sensor(client):
+    # sensor-001 is only known through the seeded default sensors
+    result = ingest(client, 'sensor-001', 'soil_moisture', [20, 10])
+    assert result['alerts'] == 1
+    
+    alerts = client.get('/api/alerts/?farmer_id=farmer-001').get_json()
+    assert [(alert['sensor_id'], alert['rule']) for alert in alerts] == [('sensor-001', 'low')]
+
+def test_sensor_created_through_api_gets_alerts(client):
+    response = client.post('/api/sensors/', json={
+        'farmer_id': 'farmer-002',
+        'type': 'humidity',
+        'location': 'Greenhouse',
+        'configuration': {'alert_threshold_high': 85}
+    })
+    assert response.status_code == 201
+    sensor_id = response.get_json()['id']
+    
+    assert ingest(client, sensor_id, 'humidity', [70, 95])['alerts'] == 1
+    
+    # Raising the threshold takes effect on the next batch
+    client.put(f'/api/sensors/{sensor_id}', json={'configuration': {'alert_threshold_high': 99}})
+    assert ingest(client, sensor_id, 'humidity', [80, 97], hour=3)['alerts'] == 0
+
+def test_ingest_publishes_readings_event(client):
+    subscription = event_hub.subscribe('farmer-001')
+    try:
+        ingest(client, 'sensor-003', 'humidity', [60])
+        frames = subscription.wait(0)
+    finally:
+        event_hub.unsubscribe(subscription)
+    
+    assert any('event: readings' in frame and 'sensor-003' in frame for frame in frames)
+
+def test_workers_raising_the_same_alert_store_it_once(client):
+    samples = [
+        ('sensor-001', datetime(2026, 10, 17, 5, 0), 'soil_moisture', 20.0),
+        ('sensor-001', datetime(2026, 10, 17, 5, 10), 'soil_moisture', 10.0)
+    ]
+    # Each engine stands for a worker process with its own in-memory state
+    first, second = AlertEngine(), AlertEngine()
+    
+    assert len(first.process(samples)) == 1
+    assert second.process(samples) == []
+    assert len(client.get('/api/alerts/?farmer_id=farmer-001').get_json()) == 1
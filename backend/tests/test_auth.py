@@ -0,0 +1,136 @@
+import hashlib
+import threading
+import time
+import pytest
+from app.models import user as user_model
+from app.utils.passwords import HasherBusy, PasswordHasher
+
+# Cheap parameters; the format and checks are the same as in production
+FAST = {'n': 2 ** 10, 'r': 8, 'p': 1}
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    user_model.token_cache.clear()
+    yield
+    user_model.token_cache.clear()
+
+def register(client, username='wanjiru', email='wanjiru@example.com'):
+    return client.post('/api/auth/register', json={
+        'username': username, 'email': email, 'password': 'correct horse', 'name': 'Wanjiru'
+    })
+
+def test_scrypt_hash_round_trip():
+    hasher = PasswordHasher(**FAST)
+    stored = hasher.hash('correct horse')
+    
+    assert stored.startswith('scrypt$1024$8$1$')
+    assert hasher.hash('correct horse') != stored  # Fresh salt each time
+    assert hasher.verify('correct horse', stored)
+    assert not hasher.verify('wrong horse', stored)
+    assert not hasher.verify('correct horse', 'scrypt$garbage')
+    assert not hasher.needs_rehash(stored)
+    assert PasswordHasher(n=2 ** 11).needs_rehash(stored)
+
+def test_legacy_sha256_hash_is_accepted_and_flagged():
+    hasher = PasswordHasher(legacy_salt='pepper', **FAST)
+    legacy = hashlib.sha256('correct horse'.encode() + b'pepper').hexdigest()
+    
+    assert hasher.verify('correct horse', legacy)
+    assert not hasher.verify('wrong horse', legacy)
+    assert hasher.needs_rehash(legacy)
+
+def test_login_migrates_legacy_hash(client):
+    legacy = hashlib.sha256(('correct horse' + user_model.SALT).encode()).hexdigest()
+    user_model.users.insert_one({'username': 'otieno', 'email': 'otieno@example.com', 'password_hash': legacy})
+    
+    response = client.post('/api/auth/login', json={'username': 'otieno', 'password': 'correct horse'})
+    
+    assert response.status_code == 200
+    assert 'password_hash' not in response.get_json()['user']
+    stored = user_model.users.find_one({'username': 'otieno'})['password_hash']
+    assert stored.startswith('scrypt$') and user_model.password_hasher.verify('correct horse', stored)
+    
+    # The new hash keeps working
+    assert client.post('/api/auth/login', json={'username': 'otieno', 'password': 'correct horse'}).status_code == 200
+
+def test_full_hasher_pool_returns_503(client, monkeypatch):
+    assert register(client).status_code == 201
+    
+    hasher = PasswordHasher(workers=1, max_pending=0, **FAST)
+    started = threading.Event()
+    release = threading.Event()
+    scrypt = hasher._scrypt
+    
+    def slow_scrypt(*args):
+        started.set()
+        release.wait(5)
+        return scrypt(*args)
+    
+    monkeypatch.setattr(hasher, '_scrypt', slow_scrypt)
+    monkeypatch.setattr(user_model, 'password_hasher', hasher)
+    busy = threading.Thread(target=hasher.hash, args=('x',))
+    busy.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(HasherBusy):
+            hasher.verify('correct horse', 'scrypt$1024$8$1$AA==$AA==')
+        
+        response = client.post('/api/auth/login', json={'username': 'wanjiru', 'password': 'correct horse'})
+        assert response.status_code == 503
+    finally:
+        release.set()
+        busy.join(5)
+
+def test_duplicate_registration_is_rejected_by_unique_index(client):
+    assert register(client).status_code == 201
+    
+    same_username = register(client, email='other@example.com')
+    same_email = register(client, username='other')
+    
+    assert same_username.status_code == 400
+    assert same_email.status_code == 400
+    assert len(user_model.get_all_users()) == 1
+
+def test_token_lookup_is_cached(client, monkeypatch):
+    user_id = register(client).get_json()['user']['_id']
+    token = user_model.generate_token(user_id)
+    lookups = []
+    get_user_by_id = user_model.get_user_by_id
+    monkeypatch.setattr(user_model, 'get_user_by_id', lambda user_id: lookups.append(user_id) or get_user_by_id(user_id))
+    
+    for _ in range(3):
+        response = client.get('/api/auth/me', headers={'Authorization': f'Bearer {token}'})
+        assert response.get_json()['username'] == 'wanjiru'
+    
+    assert lookups == [user_id]
+
+def test_token_cache_expires_entries_by_ttl(monkeypatch):
+    cache = user_model.TokenCache(ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(user_model.time, 'monotonic', lambda: now[0])
+    
+    cache.put('token', {'username': 'a'})
+    now[0] += 59
+    assert cache.get('token') == {'username': 'a'}
+    now[0] += 2
+    assert cache.get('token') is None
+
+def test_token_cache_never_outlives_the_token(monkeypatch):
+    cache = user_model.TokenCache(ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(user_model.time, 'monotonic', lambda: now[0])
+    
+    cache.put('expired', {'username': 'a'}, token_expires_at=time.time() - 1)
+    assert cache.get('expired') is None
+    
+    cache.put('soon', {'username': 'a'}, token_expires_at=time.time() + 5)
+    now[0] += 6
+    assert cache.get('soon') is None
+
+def test_token_cache_is_bounded():
+    cache = user_model.TokenCache(max_size=2)
+    for token in ('a', 'b', 'c'):
+        cache.put(token, {'username': token})
+    
+    assert cache.get('a') is None
+    assert cache.get('c') == {'username': 'c'}
@@ -0,0 +1,66 @@
+import pytest
+from app.routes import event_routes
+from app.services.event_hub import EventHub, SubscriberLimitReached
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = EventHub(buffer_size=3, history_size=5, max_subscribers=2)
+    monkeypatch.setattr(event_routes, 'event_hub', hub)
+    return hub
+
+def open_stream(client, farmer_id='farmer-001'):
+    response = client.get(f'/api/events/stream?farmer_id={farmer_id}', buffered=False)
+    assert response.status_code == 200
+    return response
+
+def test_overflowing_subscriber_gets_resync_and_stream_closes(client, hub):
+    response = open_stream(client)
+    for i in range(hub.buffer_size + 1):
+        hub.publish('farmer-001', 'readings', {'n': i})
+    
+    chunks = [chunk.decode() for chunk in response.response]
+    
+    assert chunks[0].startswith('retry: ')
+    assert chunks[1].count('event: readings') == hub.buffer_size
+    assert chunks[-1] == 'event: resync\ndata: {}\n\n'
+    assert hub._subscriber_count == 0
+    assert 'farmer-001' not in hub._subscribers
+
+def test_subscriber_is_removed_when_client_disconnects(client, hub):
+    response = open_stream(client)
+    next(iter(response.response))
+    assert hub._subscriber_count == 1
+    
+    response.close()
+    
+    assert hub._subscriber_count == 0
+    # History is kept so a reconnecting client can catch up
+    assert 'farmer-001' in hub._history
+
+def test_stream_limit_returns_503(client, hub):
+    streams = [open_stream(client) for _ in range(hub.max_subscribers)]
+    
+    response = client.get('/api/events/stream?farmer_id=farmer-001')
+    assert response.status_code == 503
+    
+    # Closing before anything was streamed still frees the slots
+    for stream in streams:
+        stream.close()
+    assert hub._subscriber_count == 0
+
+def test_reconnect_replays_missed_events_or_asks_for_resync(hub):
+    hub.subscribe('farmer-001')
+    ids = [hub.publish('farmer-001', 'alert', {'n': i}) for i in range(hub.history_size + 2)]
+    
+    caught_up = hub.subscribe('farmer-001', last_event_id=ids[-3])
+    assert len(caught_up.wait(0)) == 2 and not caught_up.overflowed
+    
+    hub.max_subscribers += 1
+    too_old = hub.subscribe('farmer-001', last_event_id=ids[0])
+    assert too_old.overflowed
+
+def test_subscriber_limit_is_enforced(hub):
+    hub.subscribe('a')
+    hub.subscribe('b')
+    with pytest.raises(SubscriberLimitReached):
+        hub.subscribe('c')
@@ -0,0 +1,22 @@
+import time
+from app import create_app
+from app.config import Config
+from app.models.repository import mongo
+
+class UnreachableLazyConfig(Config):
+    MONGO_URI = 'mongodb://127.0.0.1:1/agri_system'
+    MONGO_MOCK = False
+    MONGO_LAZY_CONNECT = True
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = 200
+
+def test_lazy_mode_drops_availability_when_server_is_unreachable():
+    app = create_app(UnreachableLazyConfig)
+    client = app.test_client()
+    
+    deadline = time.monotonic() + 5
+    while mongo.available and time.monotonic() < deadline:
+        time.sleep(0.05)
+    
+    assert client.get('/health').get_json()['database'] is False
+    # Routes fall back to simulated data instead of failing
+    assert client.get('/api/readings/?sensor_id=sensor-001&hours=2').status_code == 200
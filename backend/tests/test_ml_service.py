@@ -0,0 +1,53 @@
+import os
+import pickle
+import numpy as np
+import pytest
+from app.services.ml_service import MLService, ModelRegistry
+
+class ConstantModel:
+    def __init__(self, value):
+        self.value = value
+    
+    def predict(self, features):
+        return np.full(len(features), self.value, dtype=float)
+
+def write_model(path, model, mtime_ns=None):
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_registry_reloads_a_rewritten_model(tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    write_model(path, ConstantModel(1.0), mtime_ns=1_000_000_000)
+    registry = ModelRegistry(check_interval=0)
+    
+    first = registry.get(path)
+    assert registry.get(path) is first
+    
+    # Same content under a new mtime is not unpickled again
+    write_model(path, ConstantModel(1.0), mtime_ns=2_000_000_000)
+    assert registry.get(path) is first
+    
+    write_model(path, ConstantModel(2.0), mtime_ns=3_000_000_000)
+    assert registry.get(path).value == 2.0
+
+def test_registry_waits_for_the_check_interval(tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    write_model(path, ConstantModel(1.0), mtime_ns=1_000_000_000)
+    registry = ModelRegistry(check_interval=3600)
+    
+    registry.get(path)
+    write_model(path, ConstantModel(2.0), mtime_ns=2_000_000_000)
+    assert registry.get(path).value == 1.0
+
+def test_batch_predictions_match_per_row_predictions(tmp_path):
+    service = MLService()
+    service.models_dir = str(tmp_path)
+    service.yield_model_path = str(tmp_path / 'yield_prediction_model.pkl')
+    
+    rows = np.random.default_rng(7).uniform([15, 300, 40, 5, 0], [35, 800, 80, 9, 100], (25, 5))
+    batch = service.predict_yield_batch(rows)
+    
+    assert batch == pytest.approx([service.predict_yield(row.tolist()) for row in rows])
+    assert service.predict_yield_batch([]) == []
@@ -0,0 +1,199 @@
+import socket
+import threading
+import time
+import pytest
+from aiosmtpd.controller import Controller
+from app.services.notification_dispatcher import NotificationDispatcher
+from app.services.notification_service import NotificationService
+
+class FakeSMTP:
+    """SMTP session double that refuses messages to 'broken@' recipients with a non-SMTP error"""
+    
+    def __init__(self, outbox):
+        self.outbox = outbox
+    
+    def send_message(self, message):
+        if message['To'].startswith('broken@'):
+            raise RuntimeError('Unexpected failure')
+        self.outbox.append(message['To'])
+    
+    def close(self):
+        pass
+    
+    def quit(self):
+        pass
+
+class RecordingHandler:
+    """aiosmtpd handler keeping (peer, recipient) of every message received"""
+    
+    def __init__(self):
+        self.received = []
+    
+    async def handle_DATA(self, server, session, envelope):
+        self.received.append((session.peer, envelope.rcpt_tos[0]))
+        return '250 OK'
+
+@pytest.fixture
+def email_service(monkeypatch):
+    monkeypatch.setenv('EMAIL_ENABLED', 'True')
+    monkeypatch.setenv('EMAIL_PASSWORD', '')
+    monkeypatch.setenv('SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setenv('SMTP_USE_TLS', 'False')
+    return NotificationService
+
+def make_job(job_id, channel='email', recipient=None):
+    return {
+        'id': job_id,
+        'channel': channel,
+        'recipient': recipient or f'{job_id}@example.com',
+        'subject': 'Alert',
+        'body': 'Check your field',
+        'attempts': 0
+    }
+
+def test_batches_are_grouped_by_channel():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def deliver(channel, jobs):
+        calls.append((channel, [job['recipient'] for job in jobs]))
+        started.set()
+        release.wait(5)
+        return {}
+    
+    dispatcher = NotificationDispatcher(deliver, workers=1)
+    dispatcher.enqueue('sms', 'first', 'Alert', 'body')
+    assert started.wait(5)
+    # Queued while the worker is busy, so they are drained as one batch
+    for channel, recipient in [('email', 'a'), ('sms', 'b'), ('email', 'c')]:
+        dispatcher.enqueue(channel, recipient, 'Alert', 'body')
+    release.set()
+    
+    assert dispatcher.join(5)
+    assert calls == [('sms', ['first']), ('email', ['a', 'c']), ('sms', ['b'])]
+
+def test_retries_use_exponential_backoff():
+    dispatcher = NotificationDispatcher(lambda channel, jobs: {}, max_retries=5, backoff_base=3.0)
+    job = make_job('job-1')
+    
+    for attempt in range(3):
+        before = time.monotonic()
+        dispatcher._retry_or_fail(job, RuntimeError('down'))
+        due = max(entry[0] for entry in dispatcher._delayed)
+        assert due - before == pytest.approx(3.0 ** attempt, abs=0.1)
+    assert dispatcher.get_status('job-1')['status'] == 'retrying'
+
+def test_failing_jobs_are_retried_then_given_up_on():
+    attempts = {}
+    given_up = []
+    
+    def deliver(channel, jobs):
+        failures = {}
+        for job in jobs:
+            attempts[job['recipient']] = attempts.get(job['recipient'], 0) + 1
+            # 'flaky' fails once, 'dead' always
+            if job['recipient'] == 'dead' or attempts['flaky'] == 1 and job['recipient'] == 'flaky':
+                failures[job['id']] = RuntimeError('Gateway down')
+        return failures
+    
+    attempts['flaky'] = 0
+    dispatcher = NotificationDispatcher(
+        deliver, on_failure=lambda job, error: given_up.append(job['recipient']),
+        max_retries=1, backoff_base=1.0
+    )
+    flaky = dispatcher.enqueue('sms', 'flaky', 'Alert', 'body')
+    dead = dispatcher.enqueue('sms', 'dead', 'Alert', 'body')
+    
+    assert dispatcher.join(10)
+    assert dispatcher.get_status(flaky)['status'] == 'sent'
+    assert dispatcher.get_status(dead) == {'id': dead, 'status': 'failed', 'error': 'Gateway down'}
+    assert attempts == {'flaky': 2, 'dead': 2}
+    assert given_up == ['dead']
+
+def test_join_times_out_while_jobs_are_pending():
+    release = threading.Event()
+    dispatcher = NotificationDispatcher(lambda channel, jobs: release.wait(5) and {})
+    dispatcher.enqueue('sms', 'a', 'Alert', 'body')
+    
+    assert dispatcher.join(0.05) is False
+    release.set()
+    assert dispatcher.join(5) is True
+
+def test_failure_partway_through_a_batch_only_fails_that_job(email_service, monkeypatch):
+    service = email_service()
+    outbox = []
+    monkeypatch.setattr(service.smtp_pool, '_open', lambda: FakeSMTP(outbox))
+    jobs = [make_job('a'), make_job('b', recipient='broken@example.com'), make_job('c')]
+    
+    failures = service._deliver_batch('email', jobs)
+    
+    assert list(failures) == ['b']
+    assert outbox == ['a@example.com', 'c@example.com']
+
+def test_sent_jobs_are_not_retried_when_deliver_raises():
+    delivered = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def deliver(channel, jobs):
+        if channel == 'sms':
+            # Holds the worker so the emails below are drained as one batch
+            started.set()
+            release.wait(5)
+            return {}
+        for job in jobs:
+            if job['recipient'] == 'boom' and job['attempts'] == 0:
+                raise RuntimeError('Unexpected failure')
+            delivered.append(job['recipient'])
+            job['sent'] = True
+        return {}
+    
+    dispatcher = NotificationDispatcher(deliver, workers=1, backoff_base=1.0)
+    dispatcher.enqueue('sms', 'hold', 'Alert', 'body')
+    assert started.wait(5)
+    ids = [dispatcher.enqueue('email', recipient, 'Alert', 'body') for recipient in ['a', 'boom', 'c']]
+    release.set()
+    
+    assert dispatcher.join(10)
+    assert sorted(delivered) == ['a', 'boom', 'c']
+    assert [dispatcher.get_status(job_id)['status'] for job_id in ids] == ['sent'] * 3
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def test_smtp_sessions_are_reused_and_dropped_ones_replaced(email_service, monkeypatch):
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    service = None
+    try:
+        monkeypatch.setenv('SMTP_PORT', str(port))
+        # One worker, so every send goes through the same idle session
+        monkeypatch.setenv('NOTIFICATION_WORKERS', '1')
+        service = email_service()
+        service.dispatcher.backoff_base = 1.0
+        
+        first = [service.enqueue_email(f'user{i}@example.com', 'Alert', 'body') for i in range(3)]
+        assert service.dispatcher.join(5)
+        assert len({peer for peer, _ in handler.received}) == 1
+        
+        # Drop the idle session's connection under the pool
+        (server, _), = service.smtp_pool._idle
+        server.sock.shutdown(socket.SHUT_RDWR)
+        
+        last = service.enqueue_email('late@example.com', 'Alert', 'body')
+        assert service.dispatcher.join(10)
+        
+        assert [service.dispatcher.get_status(job_id)['status'] for job_id in first + [last]] == ['sent'] * 4
+        peers = [peer for peer, _ in handler.received]
+        assert [recipient for _, recipient in handler.received][-1] == 'late@example.com'
+        assert len(peers) == 4 and peers[-1] != peers[0]
+        assert len(service.smtp_pool._idle) == 1
+    finally:
+        if service is not None:
+            service.smtp_pool.close_all()
+        controller.stop()
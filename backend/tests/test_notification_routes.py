@@ -0,0 +1,22 @@
+from app.models import farmer as farmer_model
+
+def test_county_broadcast_by_email_is_rejected(client):
+    response = client.post('/api/notifications/broadcast', json={
+        'channel': 'email', 'county': 'Nairobi', 'subject': 'Alert', 'message': 'Rain expected'
+    })
+    
+    assert response.status_code == 400
+    assert 'sms' in response.get_json()['error']
+
+def test_county_broadcast_by_sms_reaches_farmers_in_the_county(client):
+    farmer_model.create_farmer('Achieng', '+254700000001', {'latitude': -1.2864, 'longitude': 36.8172})
+    farmer_model.create_farmer('Kiprop', '+254700000002', {'latitude': 0.5667, 'longitude': 35.3000})
+    
+    response = client.post('/api/notifications/broadcast', json={
+        'channel': 'sms', 'county': 'Nairobi', 'message': 'Rain expected, {name}'
+    })
+    
+    results = [line for line in response.get_data(as_text=True).splitlines() if line]
+    assert response.status_code == 200
+    assert '"recipient": "+254700000001", "status": "queued"' in results[0]
+    assert results[-1] == '{"summary": {"queued": 1, "duplicate": 0, "invalid": 0, "failed": 0}}'
@@ -0,0 +1,21 @@
+from app.services.reading_provider import SimulatedReadingProvider
+
+def test_caches_are_bounded():
+    provider = SimulatedReadingProvider(max_sensors=3, max_readings=2, seed=1)
+    for i in range(10):
+        provider.get_readings(f'sensor-{i}', 24)
+    assert len(provider._series) == 3
+    assert len(provider._readings) == 2
+
+def test_recently_used_sensor_is_kept():
+    provider = SimulatedReadingProvider(max_sensors=2, seed=1)
+    provider.get_arrays('sensor-a', 24)
+    provider.get_arrays('sensor-b', 24)
+    provider.get_arrays('sensor-a', 24)
+    provider.get_arrays('sensor-c', 24)
+    assert list(provider._series) == ['sensor-a', 'sensor-c']
+
+def test_hours_are_capped_to_the_window():
+    provider = SimulatedReadingProvider(max_hours=48, seed=1)
+    assert len(provider.get_readings('sensor-001', 1000)) == 48
+    assert provider.get_readings('sensor-001', 1000) is provider.get_readings('sensor-001', 48)
@@ -0,0 +1,12 @@
+import pytest
+from app.models.reading import normalize_reading
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), '-inf', 'NaN'])
+def test_normalize_reading_rejects_non_finite_values(value):
+    reading = {'sensor_id': 'sensor-001', 'timestamp': '2026-10-17T00:00:00', 'data': {'soil_moisture': value}}
+    with pytest.raises(ValueError):
+        normalize_reading(reading)
+
+def test_normalize_reading_accepts_numeric_strings():
+    reading = {'sensor_id': 'sensor-001', 'timestamp': '2026-10-17T00:00:00', 'data': {'soil_moisture': '42.5'}}
+    assert normalize_reading(reading)[3] == 42.5
@@ -0,0 +1,22 @@
+from app.models import recommendation as rec_model
+from app.routes import recommendation_routes
+
+def test_generate_returns_open_recommendations_and_publishes_only_new(client, monkeypatch):
+    generated = [{'type': 'irrigation', 'details': {'message': 'Irrigate', 'severity': 'high', 'data': {}}}]
+    monkeypatch.setattr(
+        recommendation_routes.recommendation_generator, 'generate_recommendations',
+        lambda farmer_id, sensor_data, crop_type: rec_model.create_recommendations(farmer_id, generated)
+    )
+    published = []
+    monkeypatch.setattr(
+        recommendation_routes.event_hub, 'publish',
+        lambda farmer_id, event, data: published.append((event, data))
+    )
+    
+    first = client.get('/api/recommendations/?farmer_id=farmer-rec&generate=true').get_json()
+    second = client.get('/api/recommendations/?farmer_id=farmer-rec&generate=true').get_json()
+    
+    # The duplicate is not stored again, but the open one is still listed
+    assert [rec['id'] for rec in second] == [rec['id'] for rec in first]
+    assert len(first) == 1
+    assert [event for event, _ in published] == ['recommendations']
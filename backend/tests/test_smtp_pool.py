@@ -0,0 +1,34 @@
+import smtplib
+import pytest
+from app.services.notification_dispatcher import SMTPConnectionPool
+
+class FakeSMTP:
+    def __init__(self):
+        self.closed = False
+    
+    def close(self):
+        self.closed = True
+    
+    def quit(self):
+        self.closed = True
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = SMTPConnectionPool('localhost', 25)
+    monkeypatch.setattr(pool, '_open', FakeSMTP)
+    return pool
+
+def test_session_returns_server_after_rejected_message(pool):
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        with pool.session() as server:
+            raise smtplib.SMTPRecipientsRefused({})
+    assert [idle for idle, _ in pool._idle] == [server]
+    assert not server.closed
+
+@pytest.mark.parametrize('error', [smtplib.SMTPServerDisconnected(), TimeoutError(), UnicodeEncodeError('ascii', '', 0, 1, '')])
+def test_session_discards_server_on_other_errors(pool, error):
+    with pytest.raises(type(error)):
+        with pool.session() as server:
+            raise error
+    assert pool._idle == []
+    assert server.closed
@@ -0,0 +1,103 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from app.services import external_weather_service
+from app.services.external_weather_service import WeatherClient
+from app.services.weather_service import WeatherService
+
+FARM_A = {'latitude': -1.0, 'longitude': 36.0}
+FARM_B = {'latitude': 0.5, 'longitude': 35.0}
+
+def test_forecast_cache_keeps_recently_used_entries():
+    service = WeatherService(seed=1)
+    service._forecast_cache_size = 2
+    
+    service.get_forecast(1, FARM_A)
+    service.get_forecast(1, FARM_B)
+    service.get_forecast(1, FARM_A)
+    service.get_forecast(1, {'latitude': 3.0, 'longitude': 38.0})
+    
+    cells = [cell for cell, _ in service._forecast_cache]
+    assert service._forecast_cell(FARM_A) in cells
+    assert service._forecast_cell(FARM_B) not in cells
+
+def test_forecast_cache_drops_days_that_are_over():
+    service = WeatherService(seed=1)
+    yesterday = datetime.now() - timedelta(days=1)
+    service.get_forecast_many([FARM_A], 1, start_date=yesterday)
+    service._forecast_cache_day = None
+    
+    service.get_forecast(1, FARM_B)
+    
+    assert all(date >= datetime.now().date() for _, date in service._forecast_cache)
+
+class CountingClient(WeatherClient):
+    """WeatherClient whose upstream is a counting stub"""
+    
+    def __init__(self, delay=0, **kwargs):
+        super().__init__('http://weather.invalid', 'key', **kwargs)
+        self.delay = delay
+        self.fetches = []
+        self._fetch_lock = threading.Lock()
+    
+    def _fetch(self, cell):
+        with self._fetch_lock:
+            self.fetches.append(cell)
+        time.sleep(self.delay)
+        return {'cell': list(cell)}
+
+def test_weather_client_caches_per_grid_cell_until_ttl_expires(monkeypatch):
+    client = CountingClient(ttl=600)
+    now = [1000.0]
+    monkeypatch.setattr(external_weather_service.time, 'monotonic', lambda: now[0])
+    
+    client.get(-1.2864, 36.8172)
+    client.get(-1.2901, 36.8199)  # Same 0.1° cell
+    assert len(client.fetches) == 1
+    
+    now[0] += 601
+    client.get(-1.2864, 36.8172)
+    assert len(client.fetches) == 2
+
+def test_weather_client_evicts_least_recently_used_cell():
+    client = CountingClient(max_entries=2)
+    client.get(0.0, 36.0)
+    client.get(1.0, 36.0)
+    client.get(0.0, 36.0)
+    client.get(2.0, 36.0)
+    
+    assert list(client._cache) == [client.cell_for(0.0, 36.0), client.cell_for(2.0, 36.0)]
+    client.get(0.0, 36.0)
+    assert len(client.fetches) == 3
+
+def test_weather_client_makes_one_upstream_call_for_concurrent_requests():
+    client = CountingClient(delay=0.1)
+    start = threading.Barrier(8)
+    results = []
+    
+    def request():
+        start.wait()
+        results.append(client.get(-0.3031, 34.7519))
+    
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    
+    assert len(client.fetches) == 1
+    assert len(results) == 8 and all(result == results[0] for result in results)
+
+@pytest.mark.parametrize('query', ['lat=nan&lon=36.8', 'lat=1.2&lon=inf', 'lat=91&lon=36.8', 'lat=1.2&lon=-181'])
+@pytest.mark.parametrize('path', ['/api/weather/current', '/api/weather/forecast', '/api/weather/external'])
+def test_invalid_query_coordinates_are_rejected(client, path, query):
+    response = client.get(f'{path}?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid coordinate')
+
+@pytest.mark.parametrize('item', [{'lat': 'nan', 'lon': 36.8}, [1.2, 'inf'], {'lat': -90.5, 'lon': 36.8}])
+def test_invalid_batch_coordinates_are_rejected(client, item):
+    response = client.post('/api/weather/external/batch', json={'coordinates': [[1.2, 36.8], item]})
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid coordinate')